@@ -0,0 +1,109 @@
+"""
+Taux d'échec de lecture des réponses de l'IA : ancien décodage (expression régulière puis
+replace("'", '"') et json.loads) contre ai/response_decoder.decode_response.
+
+Le corpus reprend les noms de fichiers d'un vrai prompt (test/first_organization_prompt.txt)
+et les formes de réponse rencontrées : JSON strict, bloc ```json entouré de texte, guillemets
+simples (apostrophes des noms français non échappées), virgules finales, réponses coupées
+par max_tokens. Une réponse est en échec si une entrée complète du texte n'est pas récupérée.
+
+Usage : python benchmarks/bench_decoder.py [nombre de réponses]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from ai.response_decoder import decode_response
+from bench_prompt import load_sample
+
+THEMES = [('Factures', 'EDF'), ('Cours', 'Histoire'), ('Photos', ''), ('Administratif', 'Impôts'),
+          ('Logiciels', 'Installateurs'), ('Projets', 'Arduino')]
+STYLES = ('json', 'fence', 'single', 'trailing', 'truncated')
+ENTRIES_PER_RESPONSE = 12
+
+
+def render(entries, style, rng):
+    """(texte, positions de fin de chaque entrée) d'une réponse {nom: {theme, sous_theme}}."""
+    if style == 'single':
+        quote = lambda s: "'" + s + "'"
+    else:
+        quote = lambda s: json.dumps(s, ensure_ascii=False)
+    text = 'Voici la classification :\n```json\n{\n' if style in ('fence', 'truncated') else '{'
+    ends = []
+    for i, (name, (theme, sous_theme)) in enumerate(entries):
+        text += f"  {quote(name)}: {{{quote('theme')}: {quote(theme)}, {quote('sous_theme')}: {quote(sous_theme)}}}"
+        ends.append(len(text))
+        if i < len(entries) - 1 or style == 'trailing':
+            text += ',\n'
+    text += '\n}\n```\nN\'hésite pas si tu veux affiner.' if style in ('fence', 'truncated') else '}'
+    if style == 'truncated':
+        text = text[:rng.randint(len(text) // 3, len(text))]
+    return text, ends
+
+
+def build_corpus(names, size, seed=0):
+    """[(texte, entrées complètes attendues)] ; les noms viennent du prompt d'exemple."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        batch = rng.sample(names, min(ENTRIES_PER_RESPONSE, len(names)))
+        entries = [(name, rng.choice(THEMES)) for name in batch]
+        text, ends = render(entries, STYLES[i % len(STYLES)], rng)
+        expected = {name: {'theme': t, 'sous_theme': s} for (name, (t, s)), end in zip(entries, ends) if end <= len(text)}
+        corpus.append((text, expected))
+    return corpus
+
+
+def legacy_decode(response):
+    """Décodage de GeminiValidator._parse_batch_response avant ai/response_decoder."""
+    try:
+        match = re.search(r"```json(.*?)```", response, re.DOTALL) or re.search(r"```(.*?)```", response, re.DOTALL)
+        if match:
+            json_str = match.group(1)
+        else:
+            match = re.search(r"\{[\s\S]*\}", response)
+            json_str = match.group(0) if match else None
+        return json.loads(json_str.replace("'", '"')) if json_str else {}
+    except Exception:
+        return {}
+
+
+def measure(decode, corpus):
+    failures = lost = total = 0
+    start = time.perf_counter()
+    results = [decode(text) for text, _ in corpus]
+    elapsed = time.perf_counter() - start
+    for result, (_, expected) in zip(results, corpus):
+        missing = sum(1 for name, value in expected.items() if result.get(name) != value)
+        failures += 1 if missing else 0
+        lost += missing
+        total += len(expected)
+    return failures, lost, total, elapsed
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    names = sorted({f['name'] for f in load_sample()})
+    # Quelques noms français à apostrophe, absents de l'échantillon
+    names += ["l'école.pdf", "Relevé d'identité bancaire.pdf", "Cours d'anglais - chapitre 2.docx"]
+    corpus = build_corpus(names, size)
+    volume = sum(len(text) for text, _ in corpus) / 1e6
+    print(f"{len(corpus)} réponses ({volume:.1f} Mo), {len(names)} noms de fichiers, styles : {', '.join(STYLES)}")
+    for label, decode in (('ancien décodage', legacy_decode), ('decode_response', decode_response)):
+        failures, lost, total, elapsed = measure(decode, corpus)
+        print(f"  {label:16s} : {100 * failures / len(corpus):5.1f} % de réponses en échec, "
+              f"{100 * lost / max(1, total):5.1f} % d'entrées perdues, {volume / elapsed:6.1f} Mo/s")
+    for style in STYLES:
+        subset = [item for i, item in enumerate(corpus) if STYLES[i % len(STYLES)] == style]
+        failures, _, _, _ = measure(decode_response, subset)
+        legacy, _, _, _ = measure(legacy_decode, subset)
+        print(f"    {style:9s} : échecs {100 * legacy / len(subset):5.1f} % -> {100 * failures / len(subset):5.1f} %")
+
+
+if __name__ == '__main__':
+    main()
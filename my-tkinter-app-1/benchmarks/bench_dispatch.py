@@ -0,0 +1,63 @@
+"""
+Mesure le débit de GeminiValidator.suggest_schema selon le nombre de lots envoyés
+simultanément, face à un fournisseur simulé localement (latence fixe par requête,
+aucun appel réseau).
+
+Usage : python benchmarks/bench_dispatch.py [nombre_de_fichiers] [latence_ms]
+"""
+import os
+import re
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+BATCH_SIZE = 5
+
+
+def install_mock_provider(latency):
+    """Remplace api.gemini par un fournisseur simulé qui répond après `latency` secondes."""
+    def get_ai_response(prompt, max_tokens=512):
+        time.sleep(latency)
+        return {file_id: ['Bench', ''] for file_id in re.findall(r"^(\d+)\|", prompt, re.MULTILINE)}
+
+    module = types.ModuleType('api.gemini')
+    module.get_ai_response = get_ai_response
+    sys.modules['api.gemini'] = module
+
+
+def run(n_files, max_in_flight):
+    from ai.gemini_validator import GeminiValidator
+
+    files = [{'name': f'fichier_{i}.pdf', 'path': f'/bench/fichier_{i}.pdf', 'ctime': 0.0, 'excerpt': ''}
+             for i in range(n_files)]
+    validator = GeminiValidator(max_in_flight=max_in_flight, requests_per_minute=None, classification_cache=False)
+    start = time.perf_counter()
+    result = validator.suggest_schema(files, batch_size=BATCH_SIZE, existing_themes=set(), existing_subthemes=set())
+    elapsed = time.perf_counter() - start
+    assert len(result) == n_files
+    return elapsed
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+    install_mock_provider(latency)
+    # Les traces [DEBUG] par lot faussent la mesure
+    devnull = open(os.devnull, 'w')
+    print(f"{n_files} fichiers, lots de {BATCH_SIZE}, latence simulée {latency * 1000:.0f} ms")
+    baseline = None
+    for max_in_flight in (1, 2, 4, 8, 16):
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            elapsed = run(n_files, max_in_flight)
+        finally:
+            sys.stdout = stdout
+        baseline = baseline or elapsed
+        print(f"  max_in_flight={max_in_flight:2d} : {elapsed:6.2f} s, {n_files / elapsed:7.1f} fichiers/s "
+              f"(x{baseline / elapsed:.1f})")
+
+
+if __name__ == '__main__':
+    main()
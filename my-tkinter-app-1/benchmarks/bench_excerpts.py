@@ -0,0 +1,110 @@
+"""
+Compare les lecteurs d'extraits en flux (organizer/excerpt_readers) aux lectures
+complètes historiques sur de gros documents générés à la volée.
+
+Usage : python benchmarks/bench_excerpts.py [nombre_de_paragraphes]
+(les exports XLSX générés comptent dix fois plus de lignes)
+"""
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from organizer import excerpt_readers
+from organizer.excerpt_readers import docx_excerpt, xlsx_excerpt
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def make_docx(path, paragraphs):
+    body = ''.join(
+        f'<w:p><w:r><w:t>Paragraphe {i} : lorem ipsum dolor sit amet, consectetur adipiscing elit.</w:t></w:r></w:p>'
+        for i in range(paragraphs)
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', RELS)
+        zf.writestr('word/document.xml', document)
+
+
+def make_xlsx(path, rows):
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    sheet = ''.join(
+        f'<row r="{i + 1}"><c t="s"><v>{i % 100}</v></c><c><v>{i}</v></c><c><v>{i * 1.5}</v></c></row>'
+        for i in range(rows)
+    )
+    shared = ''.join(f'<si><t>Client {i}</t></si>' for i in range(100))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('xl/worksheets/sheet1.xml', f'<worksheet {ns}><sheetData>{sheet}</sheetData></worksheet>')
+        zf.writestr('xl/sharedStrings.xml', f'<sst {ns}>{shared}</sst>')
+
+
+def full_docx_excerpt(path, max_chars=300):
+    doc = excerpt_readers.docx.Document(path)
+    text = '\n'.join([p.text for p in doc.paragraphs])
+    return text[:max_chars]
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'gros_document.docx')
+        make_docx(path, paragraphs)
+        print(f"DOCX : {paragraphs} paragraphes, {os.path.getsize(path) / 1e6:.1f} Mo compressés")
+        stream_time, stream_text = timed(docx_excerpt, path)
+        print(f"  flux (iterparse)  : {stream_time * 1000:8.1f} ms")
+        if excerpt_readers.docx:
+            full_time, full_text = timed(full_docx_excerpt, path)
+            print(f"  python-docx       : {full_time * 1000:8.1f} ms (x{full_time / stream_time:.0f})")
+            print(f"  extraits identiques : {stream_text == full_text}")
+        else:
+            print("  python-docx non installé : comparaison impossible")
+
+        # Le coût du lecteur XLSX en flux doit être indépendant de la taille de l'export
+        for rows in (10, paragraphs * 10):
+            path = os.path.join(tmp, f'export_{rows}.xlsx')
+            make_xlsx(path, rows)
+            stream_time, _ = timed(xlsx_excerpt, path)
+            print(f"XLSX : {rows:8d} lignes, {os.path.getsize(path) / 1e6:6.1f} Mo -> {stream_time * 1000:6.2f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
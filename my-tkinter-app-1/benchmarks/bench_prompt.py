@@ -0,0 +1,93 @@
+"""
+Mesure les tokens envoyés par fichier classé : prompt historique (chemins complets,
+longues consignes, listes de thèmes complètes, lots de 5) contre le prompt compact
+d'ai/prompt_builder (table des dossiers, identifiants courts, extraits nettoyés, lots
+remplis au budget de tokens).
+
+Les fichiers sont lus dans test/first_organization_prompt.txt (un vrai prompt de
+première organisation), ou obtenus en scannant le dossier passé en argument.
+
+Usage : python benchmarks/bench_prompt.py [dossier]
+"""
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from ai.batch_packer import BatchPacker, estimate_tokens
+from ai.prompt_builder import build_prompt, packing_line
+from organizer.file_record import file_date
+
+SAMPLE_PROMPT = os.path.join(os.path.dirname(__file__), '..', '..', 'test', 'first_organization_prompt.txt')
+LINE_RE = re.compile(r"^Nom : (.*?) \| Chemin : (.*?) \| Date : (.*?) \| Extrait : ", re.MULTILINE)
+LEGACY_BATCH_SIZE = 5
+# Thèmes déjà proposés au fil des lots (une organisation de taille moyenne)
+THEMES = {f'Thème{i}' for i in range(25)}
+SUBTHEMES = {f'Sous-thème{i}' for i in range(60)}
+
+
+def load_sample(path=SAMPLE_PROMPT):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    matches = list(LINE_RE.finditer(text))
+    files = []
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        files.append({'name': m.group(1), 'path': m.group(2), 'date': m.group(3), 'excerpt': text[m.end():end].strip()})
+    return files
+
+
+def scan(directory):
+    from organizer.file_organizer import iter_files
+    return list(iter_files(directory, index_path=None))
+
+
+def legacy_prompt(batch, batch_num, themes, subthemes):
+    prompt = (
+        f"Batch {batch_num} (ID unique {batch_num}) :\n"
+        "Voici une liste de fichiers avec pour chacun : nom, chemin, date de création et un extrait du contenu s'il est lisible.\n"
+        "Pour chaque fichier, propose :\n"
+        "- un thème principal (ex : Factures, Cours, Photos, Logiciels, etc.)\n"
+        "- un sous-thème (optionnel, ou vide si non pertinent)\n"
+        "Voici la liste des thèmes déjà utilisés : " + ', '.join(sorted(themes)) + "\n"
+        "Voici la liste des sous-thèmes déjà utilisés : " + ', '.join(sorted(subthemes)) + "\n"
+        "Si tu penses qu'un thème ou sous-thème existant doit être modifié ou fusionné, propose-le dans ta réponse.\n"
+        "Retourne un dictionnaire JSON où chaque clé est le nom du fichier et la valeur est un objet avec les clés 'theme' et 'sous_theme'.\n"
+        "Exemple :\n"
+        "{\n  'monfichier.pdf': { 'theme': 'Factures', 'sous_theme': 'EDF' },\n  'autre.docx': { 'theme': 'Cours', 'sous_theme': '' }\n}\n\n"
+    )
+    for f in batch:
+        prompt += f"Nom : {f['name']} | Chemin : {f['path']} | Date : {file_date(f)} | Extrait : {f['excerpt'][:50]}\n"
+    return prompt
+
+
+def main():
+    files = scan(sys.argv[1]) if len(sys.argv) > 1 else load_sample()
+    if not files:
+        print("Aucun fichier.")
+        return
+    n = len(files)
+
+    legacy_batches = [files[i:i + LEGACY_BATCH_SIZE] for i in range(0, n, LEGACY_BATCH_SIZE)]
+    legacy_tokens = sum(estimate_tokens(legacy_prompt(b, i + 1, THEMES, SUBTHEMES)) for i, b in enumerate(legacy_batches))
+
+    packer = BatchPacker(packing_line)
+    overhead = estimate_tokens(build_prompt([], THEMES, SUBTHEMES)[0])
+    compact_batches = list(packer.batches(files, overhead))
+    compact_tokens = sum(estimate_tokens(build_prompt(b, THEMES, SUBTHEMES)[0]) for b in compact_batches)
+    # Même découpage que l'historique : effet du seul format de prompt
+    same_split = sum(estimate_tokens(build_prompt(b, THEMES, SUBTHEMES)[0]) for b in legacy_batches)
+
+    print(f"{n} fichiers, {len(THEMES)} thèmes et {len(SUBTHEMES)} sous-thèmes existants")
+    print(f"  historique (lots de {LEGACY_BATCH_SIZE})      : {len(legacy_batches):4d} requêtes, "
+          f"{legacy_tokens:7d} tokens, {legacy_tokens / n:6.1f} tokens/fichier")
+    print(f"  compact, mêmes lots        : {len(legacy_batches):4d} requêtes, "
+          f"{same_split:7d} tokens, {same_split / n:6.1f} tokens/fichier")
+    print(f"  compact, lots au budget    : {len(compact_batches):4d} requêtes, "
+          f"{compact_tokens:7d} tokens, {compact_tokens / n:6.1f} tokens/fichier "
+          f"(x{legacy_tokens / compact_tokens:.1f} moins)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare le parcours historique (os.walk + os.path.getctime + strftime immédiat)
+au parcours os.scandir de file_organizer.walk_files.
+
+Usage : python benchmarks/bench_walk.py [dossier]
+Sans dossier, une arborescence synthétique est générée dans un dossier temporaire.
+Sous Linux, si strace est disponible, le nombre d'appels système stat/getdents par
+fichier est mesuré pour chaque variante.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+# Importé avant toute mesure : le chargement du module ne doit pas compter dans le parcours
+from organizer.file_organizer import walk_files
+from organizer.ignore_rules import IgnoreRules
+
+STAT_SYSCALLS = 'stat,lstat,fstat,newfstatat,statx,getdents64'
+
+
+def legacy_walk(directory):
+    files = []
+    for root, dirs, filenames in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != '.git']
+        for file in filenames:
+            path = os.path.join(root, file)
+            try:
+                ctime = os.path.getctime(path)
+                date_str = datetime.fromtimestamp(ctime).strftime('%Y-%m-%d %H:%M:%S')
+            except Exception:
+                date_str = ''
+            files.append((file, path, date_str))
+    return files
+
+
+def scandir_walk(directory):
+    # Sans les règles par défaut : les deux variantes visitent les mêmes fichiers (seul .git est exclu)
+    ignore = IgnoreRules(directory, ['.git/'], use_defaults=False)
+    return [(entry.name, entry.path, st.st_ctime) for entry, st in walk_files(directory, ignore)]
+
+
+def make_tree(root, n_dirs=200, files_per_dir=50):
+    for d in range(n_dirs):
+        sub = os.path.join(root, f"dossier_{d // 20}", f"sous_{d}")
+        os.makedirs(sub, exist_ok=True)
+        for f in range(files_per_dir):
+            with open(os.path.join(sub, f"fichier_{f}.txt"), 'w') as fh:
+                fh.write('x')
+    return n_dirs * files_per_dir
+
+
+def count_syscalls(variant, directory):
+    """Relance ce script sous strace pour une variante et retourne le total d'appels stat/getdents."""
+    out = subprocess.run(
+        ['strace', '-f', '-c', '-e', f'trace={STAT_SYSCALLS}', sys.executable, __file__, '--run', variant, directory],
+        capture_output=True, text=True
+    ).stderr
+    for line in out.splitlines():
+        if line.strip().endswith('total'):
+            return int(line.split()[2])
+    return None
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        (legacy_walk if sys.argv[2] == 'legacy' else scandir_walk)(sys.argv[3])
+        return
+    tmp = None
+    if len(sys.argv) > 1:
+        directory = sys.argv[1]
+    else:
+        tmp = tempfile.mkdtemp()
+        directory = tmp
+        make_tree(directory)
+    try:
+        for name, func in (('legacy', legacy_walk), ('scandir', scandir_walk)):
+            start = time.perf_counter()
+            n = len(func(directory))
+            elapsed = time.perf_counter() - start
+            line = f"{name:8s} : {n} fichiers en {elapsed:.3f} s ({elapsed / max(n, 1) * 1e6:.1f} µs/fichier)"
+            if shutil.which('strace'):
+                calls = count_syscalls(name, directory)
+                if calls is not None:
+                    line += f", {calls / max(n, 1):.2f} appels stat/getdents par fichier"
+            print(line)
+        if not shutil.which('strace'):
+            print("strace indisponible : seuls les temps sont mesurés.")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
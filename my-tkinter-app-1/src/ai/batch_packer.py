@@ -0,0 +1,74 @@
+import math
+
+# Approximation sans tokenizer : environ 3,5 caractères par token pour du français/anglais mêlé
+CHARS_PER_TOKEN = 3.5
+# Budgets par requête : prompt complet en entrée, réponse maximum autorisée par le modèle en sortie
+INPUT_TOKEN_BUDGET = 6000
+OUTPUT_TOKEN_BUDGET = 2048
+# Réponse attendue par fichier (identifiant court et paire de thèmes) : "12": ["…", "…"],
+OUTPUT_TOKENS_PER_FILE = 16
+# Réponse : accolades, éventuel bloc ```json et texte d'accompagnement
+OUTPUT_OVERHEAD = 32
+# Marge sur la taille de réponse estimée avant de fixer max_tokens
+OUTPUT_SAFETY = 1.3
+
+
+def estimate_tokens(text):
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+class BatchPacker:
+    """
+    Constitue des lots de fichiers pour l'IA d'après une estimation du nombre de tokens :
+    chaque lot est rempli tant que le prompt reste sous `input_budget` et que la réponse
+    attendue (un objet par fichier) tient sous `output_budget` avec sa marge. Un fichier
+    trop gros pour un lot à lui seul part seul. `render(f)` : ligne du prompt pour le fichier.
+    """
+
+    def __init__(self, render, input_budget=INPUT_TOKEN_BUDGET, output_budget=OUTPUT_TOKEN_BUDGET, max_files=None):
+        self.render = render
+        self.input_budget = input_budget
+        self.output_budget = output_budget
+        self.max_files = max_files
+
+    def input_tokens(self, f):
+        return estimate_tokens(self.render(f))
+
+    def output_tokens(self, f):
+        return OUTPUT_TOKENS_PER_FILE
+
+    def max_tokens(self, batch):
+        """Valeur de max_tokens pour la requête d'un lot : réponse estimée plus la marge."""
+        expected = OUTPUT_OVERHEAD + sum(self.output_tokens(f) for f in batch)
+        return min(self.output_budget, int(expected * OUTPUT_SAFETY))
+
+    def batches(self, files, overhead=0):
+        """
+        Générateur de lots à partir d'un itérable (éventuellement un flux).
+        `overhead` : tokens du prompt hors fichiers, ou fonction appelée au début de chaque
+        lot (le prompt grandit avec la liste des thèmes déjà proposés).
+        """
+        batch = []
+        used_in = used_out = 0
+        base = 0
+        for f in files:
+            if not batch:
+                base = overhead() if callable(overhead) else overhead
+                used_in, used_out = base, OUTPUT_OVERHEAD
+            tokens_in = self.input_tokens(f)
+            tokens_out = self.output_tokens(f)
+            full = (
+                used_in + tokens_in > self.input_budget
+                or (used_out + tokens_out) * OUTPUT_SAFETY > self.output_budget
+                or (self.max_files is not None and len(batch) >= self.max_files)
+            )
+            if batch and full:
+                yield batch
+                batch = []
+                base = overhead() if callable(overhead) else overhead
+                used_in, used_out = base, OUTPUT_OVERHEAD
+            batch.append(f)
+            used_in += tokens_in
+            used_out += tokens_out
+        if batch:
+            yield batch
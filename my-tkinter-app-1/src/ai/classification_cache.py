@@ -0,0 +1,74 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+CLASSIFICATION_CACHE_PATH = 'src/data/classification_cache.db'
+
+
+def file_fingerprint(f):
+    """
+    Empreinte stable d'un fichier scanné : nom, taille, date de modification et empreinte de
+    l'extrait. Un fichier inchangé garde la même empreinte d'un scan à l'autre, même déplacé.
+    """
+    excerpt = f.get('excerpt') or ''
+    excerpt_hash = hashlib.blake2b(excerpt.encode('utf-8', 'ignore'), digest_size=8).hexdigest()
+    raw = f"{f['name']}\0{f.get('size', '')}\0{f.get('mtime', '')}\0{excerpt_hash}"
+    return hashlib.blake2b(raw.encode('utf-8', 'ignore'), digest_size=16).hexdigest()
+
+
+class ClassificationCache:
+    """
+    Classification (thème / sous-thème) déjà obtenue pour chaque fichier, indexée par son
+    empreinte (file_fingerprint). suggest_schema n'envoie à l'IA que les fichiers absents.
+    """
+
+    def __init__(self, db_path=CLASSIFICATION_CACHE_PATH):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " theme TEXT NOT NULL,"
+            " sous_theme TEXT NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, f):
+        """{'theme', 'sous_theme'} déjà connus pour `f`, ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT theme, sous_theme FROM classifications WHERE fingerprint = ?", (file_fingerprint(f),)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {'theme': row[0], 'sous_theme': row[1]}
+
+    def store(self, f, suggestion):
+        """Mémorise la classification de `f` (ignorée si elle n'a pas de thème)."""
+        if not isinstance(suggestion, dict) or not suggestion.get('theme'):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (fingerprint, theme, sous_theme, updated) VALUES (?, ?, ?, ?)",
+                (file_fingerprint(f), str(suggestion['theme']), str(suggestion.get('sous_theme') or ''), time.time())
+            )
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -1,6 +1,11 @@
 import os
 import json
-import requests
+
+# Lots envoyés simultanément à l'IA et débit maximum (requêtes par minute, None : illimité)
+MAX_IN_FLIGHT = 4
+REQUESTS_PER_MINUTE = 60
+# Tokens réservés dans chaque lot pour les thèmes ajoutés à la liste pendant l'envoi
+THEME_TOKEN_RESERVE = 200
 
 class GeminiValidator:
     def propose_global_organization(self, file_theme_dict):
@@ -34,108 +39,226 @@ class GeminiValidator:
             print(f"\n--- Prompt organisation globale ---\n{prompt}\n---")
         response = get_ai_response(prompt)
         # On suppose que la réponse contient un JSON avec l'organisation globale
-        if isinstance(response, dict):
-            return response
-        elif isinstance(response, str):
-            try:
-                return json.loads(response)
-            except Exception:
-                return {}
-        return {}
-    def __init__(self, debug=False):
+        from ai.response_decoder import decode_response
+        return decode_response(response)
+    def __init__(self, debug=False, max_in_flight=MAX_IN_FLIGHT, requests_per_minute=REQUESTS_PER_MINUTE,
+                 classification_cache=None, input_tokens=None, output_tokens=None, pre_classifier=None):
+        from api.rate_limit import RateLimiter
+        from ai.batch_packer import INPUT_TOKEN_BUDGET, OUTPUT_TOKEN_BUDGET
+
         self.debug = debug
+        # Budgets de tokens par requête (prompt / réponse) pour le remplissage des lots
+        self.input_tokens = input_tokens or INPUT_TOKEN_BUDGET
+        self.output_tokens = output_tokens or OUTPUT_TOKEN_BUDGET
+        self.max_in_flight = max(1, max_in_flight or 1)
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        # Classifications déjà obtenues par fichier (None : cache par défaut, False : désactivé)
+        self._classification_cache = classification_cache
+        # Pré-classement local (ai/pre_classifier.py) : les fichiers évidents ne partent pas à l'IA
+        self.pre_classifier = pre_classifier
         self.previous_suggestions = {}  # Historique des suggestions (nom_fichier: {theme, sous_theme})
         try:
             self.schema = self.load_schema()
         except Exception:
             self.schema = None
 
+    @classmethod
+    def from_settings(cls, settings, debug=False, files=None):
+        """
+        Construit un validateur à partir de la section 'ai' des paramètres
+        (max_in_flight, requests_per_minute, input_tokens, output_tokens, pre_classify,
+        local_threshold). Le pré-classement local apprend sur settings['organization'] ;
+        `files` (fichiers scannés) fournit le chemin actuel des fichiers déjà organisés.
+        """
+        from ai.pre_classifier import PreClassifier, CONFIDENCE_THRESHOLD
+
+        settings = settings or {}
+        conf = settings.get('ai', {})
+        pre_classifier = None
+        if conf.get('pre_classify', True):
+            paths = {f['name']: f['path'] for f in files or []}
+            pre_classifier = PreClassifier.from_organization(
+                settings.get('organization', {}), paths,
+                threshold=conf.get('local_threshold', CONFIDENCE_THRESHOLD)
+            )
+        return cls(
+            debug=debug,
+            max_in_flight=conf.get('max_in_flight', MAX_IN_FLIGHT),
+            requests_per_minute=conf.get('requests_per_minute', REQUESTS_PER_MINUTE),
+            input_tokens=conf.get('input_tokens'),
+            output_tokens=conf.get('output_tokens'),
+            pre_classifier=pre_classifier
+        )
+
+    @property
+    def classification_cache(self):
+        if self._classification_cache is None:
+            from ai.classification_cache import ClassificationCache
+            try:
+                self._classification_cache = ClassificationCache()
+            except Exception as e:
+                print(f"[ERREUR] Cache de classification indisponible : {e}")
+                self._classification_cache = False
+        return self._classification_cache or None
+
     def load_schema(self):
         with open('src/data/schema.json', 'r', encoding='utf-8') as file:
             return json.load(file)
 
-    def suggest_schema(self, files, batch_size=1, max_files=10, existing_themes=set(), existing_subthemes=set(), progress_callback=None):
-        # files est une liste de dicts avec name, path, date, excerpt
-        # On traite par lots pour éviter de dépasser la limite de tokens
-        import math
+    def _parse_batch_response(self, response, batch_num):
+        from ai.response_decoder import decode_response
+
+        if self.debug:
+            print(f"Réponse brute IA pour le batch {batch_num} : {response}\n")
+        # Décodage tolérant : bloc ```json, guillemets simples, apostrophes, réponse tronquée
+        stats = {}
+        batch_suggestions = decode_response(response, stats)
+        if not batch_suggestions:
+            print(f"[DEBUG] Aucun bloc JSON valide trouvé dans la réponse pour le batch {batch_num}.")
+        elif stats['truncated'] or stats['skipped']:
+            print(f"[DEBUG] Réponse du batch {batch_num} incomplète : {len(batch_suggestions)} entrée(s) récupérée(s), "
+                  f"{stats['skipped']} ignorée(s).")
+        return batch_suggestions
+
+    def suggest_schema(self, files, batch_size=None, max_files=10, existing_themes=set(), existing_subthemes=set(), progress_callback=None,
+                       on_entry=None):
+        # files est une liste de dicts avec name, path, ctime, excerpt
+        # On traite par lots pour éviter de dépasser la limite de tokens : chaque lot est rempli
+        # jusqu'au budget de tokens (ai/batch_packer.py), `batch_size` limite en plus le nombre de fichiers
+        # Jusqu'à `max_in_flight` lots sont en cours d'envoi en même temps, au rythme du limiteur de débit
+        # `on_entry(nom, {'theme', 'sous_theme'})` reçoit chaque classement dès qu'il est connu (réponses
+        # en streaming), depuis les threads d'envoi ; le résultat final reste fusionné dans l'ordre des lots
         from api.gemini import get_ai_response
+        from ai.batch_packer import BatchPacker, estimate_tokens
+        from ai.prompt_builder import build_prompt, packing_line, decode_ids
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
         all_results = {}
-        n = len(files)
-        import re
-        total_batches = max(1, (n + batch_size - 1) // batch_size)
-        for batch_num, i in enumerate(range(0, n, batch_size), 1):
-            batch = files[i:i+batch_size]
-            # Prépare la liste des thèmes/sous-thèmes déjà proposés
-            for v in self.previous_suggestions.values():
-                if isinstance(v, dict):
-                    theme = v.get('theme', '')
-                    sous_theme = v.get('sous_theme', '')
-                    if theme:
-                        existing_themes.add(theme)
-                    if sous_theme:
-                        existing_subthemes.add(sous_theme)
-            prompt = (
-                f"Batch {batch_num} (ID unique {batch_num}) :\n"
-                "Voici une liste de fichiers avec pour chacun : nom, chemin, date de création et un extrait du contenu s'il est lisible.\n"
-                "Pour chaque fichier, propose :\n"
-                "- un thème principal (ex : Factures, Cours, Photos, Logiciels, etc.)\n"
-                "- un sous-thème (optionnel, ou vide si non pertinent)\n"
-                "Voici la liste des thèmes déjà utilisés : " + ', '.join(sorted(existing_themes)) + "\n"
-                "Voici la liste des sous-thèmes déjà utilisés : " + ', '.join(sorted(existing_subthemes)) + "\n"
-                "Si tu penses qu'un thème ou sous-thème existant doit être modifié ou fusionné, propose-le dans ta réponse.\n"
-                "Retourne un dictionnaire JSON où chaque clé est le nom du fichier et la valeur est un objet avec les clés 'theme' et 'sous_theme'.\n"
-                "Exemple :\n"
-                "{\n  'monfichier.pdf': { 'theme': 'Factures', 'sous_theme': 'EDF' },\n  'autre.docx': { 'theme': 'Cours', 'sous_theme': '' }\n}\n\n"
-            )
-            for f in batch:
-                prompt += f"Nom : {f['name']} | Chemin : {f['path']} | Date : {f['date']} | Extrait : {f['excerpt'][:50]}\n"
-            if self.debug:
-                print(f"\n--- Prompt envoyé au batch {batch_num} ---\n{prompt}\n---")
-            print(f"[DEBUG] Envoi du lot {batch_num}/{total_batches} à l'IA avec {len(batch)} fichiers.")
-            print(f"[DEBUG] Prompt envoyé : {prompt}")
-            try:
-                response = get_ai_response(prompt)
-            except Exception as e:
-                print(f"[ERREUR] Échec de l'appel à l'IA pour le batch {batch_num} : {e}")
-                continue
-
-            if progress_callback:
-                percent = 10 + int(70 * batch_num / total_batches)  # Progression dynamique
-                progress_callback(percent)
-
-            if self.debug:
-                print(f"Réponse brute IA pour le batch {batch_num} : {response}\n")
-
-            batch_suggestions = {}
-            if isinstance(response, dict):
-                batch_suggestions = response
-            elif isinstance(response, str):
-                # Nettoyage de la réponse pour extraire le bloc JSON
-                json_str = None
-                try:
-                    match = re.search(r"```json(.*?)```", response, re.DOTALL)
-                    if not match:
-                        match = re.search(r"```(.*?)```", response, re.DOTALL)
-                    if match:
-                        json_str = match.group(1)
+        cache = self.classification_cache
+        if cache is not None:
+            # Seuls les fichiers jamais classés (ou modifiés depuis) partent à l'IA
+            def uncached(files):
+                for f in files:
+                    suggestion = cache.lookup(f)
+                    if suggestion is None:
+                        yield f
                     else:
-                        match = re.search(r"\{[\s\S]*\}", response)
-                        if match:
-                            json_str = match.group(0)
-                    if json_str:
-                        json_str_clean = json_str.replace("'", '"')
-                        batch_suggestions = json.loads(json_str_clean)
-                    else:
-                        print(f"[DEBUG] Aucun bloc JSON valide trouvé dans la réponse pour le batch {batch_num}.")
-                except Exception as e:
-                    print(f"[ERREUR] Échec du parsing JSON pour le batch {batch_num} : {e}")
+                        all_results[f['name']] = suggestion
+                        self.previous_suggestions[f['name']] = suggestion
+                        if on_entry is not None:
+                            on_entry(f['name'], suggestion)
+            files = list(uncached(files)) if hasattr(files, '__len__') else uncached(files)
+        local_results = {}
+        if self.pre_classifier is not None:
+            # Les fichiers classés localement avec assez de confiance ne partent pas à l'IA
+            filtered = self.pre_classifier.filter(files, local_results)
+            files = list(filtered) if hasattr(files, '__len__') else filtered
+        packer = BatchPacker(packing_line, input_budget=self.input_tokens,
+                             output_budget=self.output_tokens, max_files=batch_size)
 
-            if batch_suggestions:
-                self.previous_suggestions.update(batch_suggestions)
-                all_results.update(batch_suggestions)
-            else:
-                print(f"[DEBUG] Aucune suggestion valide pour le batch {batch_num}.")
+        def overhead():
+            # Prompt hors fichiers, avec une réserve pour les thèmes proposés entre-temps
+            base = build_prompt([], existing_themes, existing_subthemes)[0]
+            return estimate_tokens(base) + THEME_TOKEN_RESERVE
+
+        # files peut être une liste ou un générateur (iter_files) : les lots partent dès qu'ils sont prêts
+        total_batches = None
+        batches = packer.batches(files, overhead)
+        if hasattr(files, '__len__'):
+            batches = list(batches)
+            total_batches = max(1, len(batches))
+        batches = iter(batches)
+        batch_num = 0
+        exhausted = False
+        in_flight = {}   # future -> (numéro de lot, fichiers du lot, identifiants courts -> noms)
+        completed = {}   # numéro de lot -> (suggestions, fichiers du lot), en attente de fusion
+        next_merge = 1
+        done_count = 0
+
+        def call(batch_num, prompt, max_tokens, ids):
+            self.rate_limiter.acquire()
+            print(f"[DEBUG] Envoi du lot {batch_num}/{total_batches or '?'} à l'IA (max_tokens={max_tokens}).")
+            if on_entry is None:
+                return get_ai_response(prompt, max_tokens=max_tokens)
+
+            def relay(key, value):
+                for name, suggestion in decode_ids({key: value}, ids).items():
+                    on_entry(name, suggestion)
+            return get_ai_response(prompt, max_tokens=max_tokens, on_entry=relay)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='ai-batch') as executor:
+            while True:
+                # Remplit la fenêtre d'envoi
+                while not exhausted and len(in_flight) < self.max_in_flight:
+                    batch = next(batches, None)
+                    if not batch:
+                        exhausted = True
+                        total_batches = batch_num or 1
+                        break
+                    batch_num += 1
+                    # Prépare la liste des thèmes/sous-thèmes déjà proposés (lots déjà fusionnés)
+                    for v in list(self.previous_suggestions.values()) + list(local_results.values()):
+                        if isinstance(v, dict):
+                            theme = v.get('theme', '')
+                            sous_theme = v.get('sous_theme', '')
+                            if theme:
+                                existing_themes.add(theme)
+                            if sous_theme:
+                                existing_subthemes.add(sous_theme)
+                    # Prompt compact : dossiers factorisés, fichiers désignés par un identifiant court
+                    prompt, ids = build_prompt(batch, existing_themes, existing_subthemes)
+                    if self.debug:
+                        print(f"\n--- Prompt envoyé au batch {batch_num} ---\n{prompt}\n---")
+                    max_tokens = packer.max_tokens(batch)
+                    print(f"[DEBUG] Lot {batch_num} préparé avec {len(batch)} fichiers (~{estimate_tokens(prompt)} tokens).")
+                    print(f"[DEBUG] Prompt envoyé : {prompt}")
+                    in_flight[executor.submit(call, batch_num, prompt, max_tokens, ids)] = (batch_num, batch, ids)
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    num, batch, ids = in_flight.pop(future)
+                    try:
+                        completed[num] = (decode_ids(self._parse_batch_response(future.result(), num), ids), batch)
+                    except Exception as e:
+                        print(f"[ERREUR] Échec de l'appel à l'IA pour le batch {num} : {e}")
+                        completed[num] = ({}, batch)
+                    done_count += 1
+                    if progress_callback:
+                        if total_batches:
+                            percent = 10 + int(70 * done_count / total_batches)  # Lots réellement terminés
+                        else:
+                            # Nombre total de lots inconnu (flux) : progression qui tend vers 80 %
+                            percent = 10 + int(70 * done_count / (done_count + 10))
+                        progress_callback(percent)
+
+                # Fusion dans l'ordre des lots, quel que soit l'ordre d'arrivée des réponses
+                while next_merge in completed:
+                    batch_suggestions, batch = completed.pop(next_merge)
+                    if batch_suggestions:
+                        self.previous_suggestions.update(batch_suggestions)
+                        all_results.update(batch_suggestions)
+                        if cache is not None:
+                            for f in batch:
+                                cache.store(f, batch_suggestions.get(f['name']))
+                    else:
+                        print(f"[DEBUG] Aucune suggestion valide pour le batch {next_merge}.")
+                    next_merge += 1
+        # Un fichier classé localement garde ce thème, sauf si un homonyme a été classé par l'IA
+        for name, suggestion in local_results.items():
+            if name not in all_results and on_entry is not None:
+                on_entry(name, suggestion)
+            all_results.setdefault(name, suggestion)
+            self.previous_suggestions.setdefault(name, suggestion)
+        if self.pre_classifier is not None:
+            print(f"[DEBUG] Pré-classement local : {self.pre_classifier.local} fichier(s) classé(s) sans l'IA, "
+                  f"{self.pre_classifier.sent} envoyé(s).")
+        if cache is not None:
+            cache.commit()
+            print(f"[DEBUG] Cache de classification : {cache.hits} fichier(s) déjà classé(s), {cache.misses} envoyé(s) à l'IA.")
+        if progress_callback and done_count:
+            progress_callback(80)
         return all_results
 
     def send_feedback(self, feedback):
@@ -0,0 +1,193 @@
+import re
+import zlib
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ai.prompt_builder import split_path
+
+# Dimension des vecteurs (hachage des n-grammes) et taille maximum de l'échantillon d'apprentissage
+N_FEATURES = 1024
+MAX_TRAINING = 5000
+NGRAM_SIZES = (3, 4)
+# Poids (au carré) du nom et des dossiers dans la similarité cosinus
+NAME_WEIGHT = 0.7 ** 0.5
+PATH_WEIGHT = 0.3 ** 0.5
+PATH_DEPTH = 3
+K_NEIGHBOURS = 5
+# Part des voisins (pondérée par la similarité) qui doit s'accorder, et similarité minimale du plus proche
+CONFIDENCE_THRESHOLD = 0.8
+MIN_SIMILARITY = 0.5
+CHUNK_SIZE = 256
+
+# Règles évidentes : (motif sur le nom, motif sur le chemin, thème, sous-thème).
+# Pas de règle pour ce que le scan ignore déjà (*.exe, Arduino/libraries, voir DEFAULT_IGNORE_PATTERNS)
+RULES = [
+    (r'\.ino$', None, 'Arduino', 'Croquis'),
+    (r'\.msi$', r'[\\/](downloads|téléchargements)[\\/]', 'Logiciels', 'Installateurs'),
+    (r'^(setup|install)[^\\/]*\.msi$', None, 'Logiciels', 'Installateurs'),
+    (r'\.(iso|dmg|img)$', None, 'Logiciels', 'Images disque'),
+    (r'^factures?[ _-].*\.pdf$', None, 'Factures', ''),
+    (r'^(img|dsc|pxl)_\d+.*\.(jpe?g|png|heic)$', None, 'Photos', ''),
+    (r'\.(jpe?g|png|heic)$', r'[\\/]dcim[\\/]', 'Photos', ''),
+]
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode('utf-8')) % N_FEATURES
+
+
+def name_features(name):
+    """Indices des n-grammes de caractères du nom (minuscules, bornes marquées)."""
+    text = f"^{name.lower()}$"
+    return [_hash(text[i:i + n]) for n in NGRAM_SIZES for i in range(len(text) - n + 1)]
+
+
+def path_features(path):
+    """Indices des mots des derniers dossiers du chemin."""
+    directory = split_path(path or '')[0]
+    parts = re.split(r'[\\/]', directory)[-PATH_DEPTH:]
+    return [_hash('d:' + token) for part in parts for token in _TOKEN_RE.findall(part.lower())]
+
+
+def vectorize(items):
+    """Matrice (n, 2 * N_FEATURES) float32 : nom et dossiers, chacun normalisé puis pondéré."""
+    items = list(items)
+    matrix = np.zeros((len(items), 2 * N_FEATURES), dtype=np.float32)
+    for offset, weight, features in ((0, NAME_WEIGHT, name_features), (N_FEATURES, PATH_WEIGHT, path_features)):
+        rows, cols = [], []
+        for row, (name, path) in enumerate(items):
+            indices = features(path if offset else name)
+            rows.extend([row] * len(indices))
+            cols.extend(indices)
+        block = matrix[:, offset:offset + N_FEATURES]
+        np.add.at(block, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        np.divide(block, norms, out=block, where=norms > 0)
+        block *= weight
+    return matrix
+
+
+class PreClassifier:
+    """
+    Pré-classement local, avant l'IA : k plus proches voisins (similarité cosinus sur des
+    n-grammes hachés du nom et des dossiers) appris sur les organisations déjà acceptées,
+    puis règles évidentes sur l'extension et le chemin. Seuls les fichiers classés avec
+    une confiance suffisante sont retenus ; les autres partent à l'IA.
+    Sans NumPy, seules les règles s'appliquent.
+    """
+
+    def __init__(self, threshold=CONFIDENCE_THRESHOLD, k=K_NEIGHBOURS, rules=RULES):
+        self.threshold = threshold
+        self.k = k
+        self.rules = [(re.compile(n, re.I) if n else None, re.compile(p, re.I) if p else None, t, s)
+                      for n, p, t, s in rules]
+        self.labels = []
+        self._matrix = None
+        self._label_ids = None
+        self._themes = {}  # thème en minuscules -> graphie de l'utilisateur
+        self.local = 0
+        self.sent = 0
+
+    @classmethod
+    def from_organization(cls, organization, paths=None, **kwargs):
+        """
+        Apprend sur une organisation acceptée {thème: {sous_thème: [noms]}} (settings['organization']).
+        `paths` (nom -> chemin) complète les noms par leur chemin actuel quand il est connu.
+        """
+        paths = paths or {}
+        samples = []
+        for theme, sous_dict in (organization or {}).items():
+            if not isinstance(sous_dict, dict):
+                continue
+            for sous_theme, names in sous_dict.items():
+                for name in names or []:
+                    samples.append((name, paths.get(name, ''), theme, sous_theme or ''))
+        classifier = cls(**kwargs)
+        classifier.fit(samples)
+        return classifier
+
+    def fit(self, samples):
+        """samples : [(nom, chemin, thème, sous-thème), ...] ; les plus récents en dernier."""
+        samples = list(samples)[-MAX_TRAINING:]
+        self._themes = {theme.lower(): theme for _, _, theme, _ in samples}
+        if np is None or not samples:
+            self._matrix = None
+            return self
+        self.labels = list(dict.fromkeys((theme, sous_theme) for _, _, theme, sous_theme in samples))
+        index = {label: i for i, label in enumerate(self.labels)}
+        self._label_ids = np.array([index[(t, s)] for _, _, t, s in samples], dtype=np.intp)
+        self._matrix = vectorize((name, path) for name, path, _, _ in samples)
+        return self
+
+    def rule(self, f):
+        """Classement par règle, avec la graphie des thèmes de l'utilisateur ; None si aucune règle."""
+        name, path = f['name'], f.get('path') or ''
+        for name_re, path_re, theme, sous_theme in self.rules:
+            if name_re is not None and not name_re.search(name):
+                continue
+            if path_re is not None and not path_re.search(path):
+                continue
+            return {'theme': self._themes.get(theme.lower(), theme), 'sous_theme': sous_theme}
+        return None
+
+    def _neighbours(self, files):
+        """[(suggestion ou None, confiance)] par vote pondéré des k plus proches voisins."""
+        if self._matrix is None:
+            return [(None, 0.0)] * len(files)
+        queries = vectorize((f['name'], f.get('path') or '') for f in files)
+        sims = queries @ self._matrix.T
+        k = min(self.k, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1).clip(min=0)
+        top_labels = self._label_ids[top]
+        results = []
+        for row in range(len(files)):
+            best = top_sims[row].max()
+            if best < MIN_SIMILARITY:
+                results.append((None, 0.0))
+                continue
+            # Les voisins deux fois moins proches que le meilleur ne votent pas
+            weights = np.where(top_sims[row] >= best / 2, top_sims[row], 0.0)
+            votes = np.bincount(top_labels[row], weights=weights, minlength=len(self.labels))
+            label = int(votes.argmax())
+            theme, sous_theme = self.labels[label]
+            results.append(({'theme': theme, 'sous_theme': sous_theme}, float(votes[label] / weights.sum())))
+        return results
+
+    def predict(self, files):
+        """[(suggestion ou None, confiance, 'knn' | 'règle' | None)] pour une liste de fichiers."""
+        results = []
+        for f, (suggestion, confidence) in zip(files, self._neighbours(files)):
+            if suggestion is not None and confidence >= self.threshold:
+                results.append((suggestion, confidence, 'knn'))
+                continue
+            ruled = self.rule(f)
+            if ruled is not None:
+                results.append((ruled, 1.0, 'règle'))
+            else:
+                results.append((suggestion, confidence, None))
+        return results
+
+    def filter(self, files, classified):
+        """
+        Générateur : rend les fichiers incertains (à envoyer à l'IA) et range les autres
+        dans `classified` {nom: {'theme', 'sous_theme'}}. Traite le flux par paquets.
+        """
+        files = iter(files)
+        while True:
+            chunk = list(islice(files, CHUNK_SIZE))
+            if not chunk:
+                return
+            for f, (suggestion, confidence, source) in zip(chunk, self.predict(chunk)):
+                if source is None:
+                    self.sent += 1
+                    yield f
+                else:
+                    self.local += 1
+                    classified[f['name']] = suggestion
@@ -0,0 +1,176 @@
+import re
+
+from organizer.file_record import file_date
+
+# Extrait envoyé par fichier après nettoyage (caractères)
+MAX_EXCERPT_CHARS = 60
+# Au-delà, les listes de thèmes / sous-thèmes existants sont tronquées dans le prompt
+MAX_LISTED_THEMES = 80
+
+PROMPT_HEADER = (
+    'Classe chaque fichier : thème principal et sous-thème ("" si aucun), en réutilisant les thèmes existants si possible.\n'
+    'Réponds uniquement en JSON : {"id": ["thème", "sous-thème"], ...}\n'
+)
+
+# Mots trop fréquents pour aider au classement
+STOPWORDS = {
+    'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'et', 'ou', 'en', 'au', 'aux', 'a', 'à', 'ce', 'ces',
+    'cette', 'est', 'sont', 'pour', 'par', 'sur', 'dans', 'avec', 'que', 'qui', 'ne', 'pas', 'il', 'elle',
+    'the', 'of', 'and', 'or', 'to', 'in', 'on', 'for', 'with', 'is', 'are', 'this', 'that', 'it', 'be', 'as',
+    'an', 'at', 'by', 'from',
+}
+
+_WORD_RE = re.compile(r"[^\W_][\w.,:/@'-]*", re.UNICODE)
+_SEP_RE = re.compile(r'[\\/]')
+
+
+def trim_excerpt(text, max_chars=MAX_EXCERPT_CHARS):
+    """
+    Réduit un extrait à ses mots porteurs d'information : la mise en forme (lignes de
+    '#', '=', balises...), les mots vides et les répétitions sont retirés, puis le texte
+    est coupé à `max_chars` caractères sur une limite de mot.
+    """
+    if not text:
+        return ''
+    words = []
+    seen = set()
+    length = 0
+    for match in _WORD_RE.finditer(text):
+        word = match.group(0).strip(".,:'-")
+        key = word.lower()
+        if not word or key in STOPWORDS or key in seen:
+            continue
+        if length + len(word) + (1 if words else 0) > max_chars:
+            break
+        seen.add(key)
+        words.append(word)
+        length += len(word) + (1 if len(words) > 1 else 0)
+    return ' '.join(words)
+
+
+def split_path(path):
+    """(dossier, nom) quel que soit le séparateur ('/' ou '\\'), pour les chemins Windows comme POSIX."""
+    cut = max(path.rfind('/'), path.rfind('\\'))
+    return (path[:cut], path[cut + 1:]) if cut >= 0 else ('', path)
+
+
+def directory_table(dirs):
+    """
+    Factorise les dossiers d'un lot : (racine commune, {dossier: 'D<n>'}, lignes 'D<n>=chemin relatif').
+    Les fichiers situés directement dans la racine n'ont pas d'identifiant de dossier.
+    """
+    unique = list(dict.fromkeys(dirs))
+    if not unique:
+        return '', {}, []
+    parts = [_SEP_RE.split(d) for d in unique]
+    common = parts[0]
+    for p in parts[1:]:
+        n = 0
+        while n < len(common) and n < len(p) and common[n] == p[n]:
+            n += 1
+        common = common[:n]
+    sep = '\\' if '\\' in unique[0] else '/'
+    root = sep.join(common)
+    ids = {}
+    lines = []
+    for d, p in zip(unique, parts):
+        rel = sep.join(p[len(common):])
+        if not rel:
+            ids[d] = ''
+            continue
+        ids[d] = f"D{len(lines) + 1}"
+        lines.append(f"{ids[d]}={rel}")
+    return root, ids, lines
+
+
+def file_line(f, file_id, dir_id):
+    date = file_date(f)[:10]
+    return f"{file_id}|{dir_id}|{f['name']}|{date}|{trim_excerpt(f.get('excerpt'))}\n"
+
+
+def packing_line(f):
+    """Ligne d'un fichier pour l'estimation des tokens, avec sa part (majorée) de la table des dossiers."""
+    directory = split_path(f['path'])[0]
+    return file_line(f, '000', 'D00') + split_path(directory)[1] + '\n'
+
+
+def _listed(values):
+    values = sorted(v for v in values if v)
+    return ','.join(values[:MAX_LISTED_THEMES])
+
+
+def build_prompt(batch, existing_themes=(), existing_subthemes=()):
+    """
+    Prompt de classification compact pour un lot : consignes minimales, dossiers factorisés
+    dans une table numérotée, fichiers désignés par un identifiant court.
+    Retourne (prompt, ids) où ids associe chaque identifiant au nom du fichier.
+    """
+    dirs = [split_path(f['path'])[0] for f in batch]
+    root, dir_ids, dir_lines = directory_table(dirs)
+    lines = [PROMPT_HEADER]
+    if existing_themes:
+        lines.append(f"Thèmes existants : {_listed(existing_themes)}\n")
+    if existing_subthemes:
+        lines.append(f"Sous-thèmes existants : {_listed(existing_subthemes)}\n")
+    if root:
+        lines.append(f"Racine : {root}\n")
+    if dir_lines:
+        lines.append("Dossiers :\n" + ''.join(line + '\n' for line in dir_lines))
+    lines.append("Fichiers (id|dossier|nom|date|extrait) :\n")
+    ids = {}
+    for number, (f, d) in enumerate(zip(batch, dirs), start=1):
+        file_id = str(number)
+        ids[file_id] = f['name']
+        lines.append(file_line(f, file_id, dir_ids[d]))
+    return ''.join(lines), ids
+
+
+MODIFICATION_HEADER = (
+    'Voici une organisation de fichiers (id|thème|sous-thème|nom). Applique la demande de '
+    "l'utilisateur et redonne le thème et le sous-thème (\"\" si aucun) de chaque fichier.\n"
+    'Réponds uniquement en JSON : {"id": ["thème", "sous-thème"], ...}\n'
+)
+
+
+def build_modification_prompt(user_text, regrouped):
+    """
+    Prompt de modification d'une organisation {thème: {sous_thème: [noms]}} selon la demande
+    `user_text`, au même format de réponse que build_prompt. Retourne (prompt, ids).
+    """
+    lines = [MODIFICATION_HEADER, f"Demande : {user_text}\n", "Organisation actuelle :\n"]
+    ids = {}
+    for theme, sous_dict in regrouped.items():
+        for sous_theme, names in sous_dict.items():
+            for name in names:
+                file_id = str(len(ids) + 1)
+                ids[file_id] = name
+                lines.append(f"{file_id}|{theme}|{sous_theme or ''}|{name}\n")
+    return ''.join(lines), ids
+
+
+def decode_ids(suggestions, ids):
+    """
+    Ramène une réponse indexée par identifiants à {nom: {'theme', 'sous_theme'}}.
+    Accepte aussi les réponses indexées par nom et les valeurs sous forme d'objet ou de texte ;
+    les clés inconnues du lot sont ignorées.
+    """
+    names = set(ids.values())
+    decoded = {}
+    if not isinstance(suggestions, dict):
+        return decoded
+    for key, value in suggestions.items():
+        name = ids.get(str(key).strip(), key if key in names else None)
+        if name is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            theme = value[0] if value else ''
+            sous_theme = value[1] if len(value) > 1 else ''
+        elif isinstance(value, dict):
+            theme = value.get('theme', value.get('t', ''))
+            sous_theme = value.get('sous_theme', value.get('s', ''))
+        else:
+            theme, sous_theme = value, ''
+        if not theme:
+            continue
+        decoded[name] = {'theme': str(theme), 'sous_theme': str(sous_theme or '')}
+    return decoded
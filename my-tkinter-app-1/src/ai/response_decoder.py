@@ -0,0 +1,351 @@
+import re
+import json
+
+_FENCE_RE = re.compile(r"```[A-Za-z]*")
+_WS = ' \t\r\n'
+_ESCAPES = {'"': '"', "'": "'", '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_LITERALS = {'true': True, 'false': False, 'null': None, 'True': True, 'False': False, 'None': None}
+
+
+class _Truncated(Exception):
+    """Fin du texte au milieu d'une valeur (réponse coupée par max_tokens)."""
+
+
+class _Malformed(Exception):
+    pass
+
+
+class _Reader:
+    """
+    Lecteur JSON permissif : chaînes entre guillemets simples ou doubles (un guillemet ne ferme
+    la chaîne que s'il est suivi d'un séparateur, si bien que « l'école.pdf » reste entier),
+    clés sans guillemets, virgules en trop, littéraux Python (True, None...).
+    """
+
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.pos = pos
+
+    def skip(self):
+        text, n, i = self.text, len(self.text), self.pos
+        while i < n and text[i] in _WS:
+            i += 1
+        self.pos = i
+        return text[i] if i < n else None
+
+    def value(self):
+        c = self.skip()
+        if c is None:
+            raise _Truncated()
+        if c == '{':
+            return self.object()
+        if c == '[':
+            return self.array()
+        if c in '"\'':
+            return self.string()
+        if c in ',:}]':
+            raise _Malformed(f"valeur attendue en position {self.pos}")
+        return self.literal()
+
+    def object(self):
+        self.pos += 1
+        result = {}
+        while True:
+            c = self.skip()
+            if c is None:
+                raise _Truncated()
+            if c == '}':
+                self.pos += 1
+                return result
+            if c == ',':
+                self.pos += 1
+                continue
+            key, val = self.entry()
+            result[key] = val
+
+    def entry(self):
+        """Une paire clé : valeur."""
+        c = self.skip()
+        key = self.string() if c in '"\'' else self.bare_key()
+        if self.skip() != ':':
+            if self.pos >= len(self.text):
+                raise _Truncated()
+            raise _Malformed(f"':' attendu en position {self.pos}")
+        self.pos += 1
+        return key, self.value()
+
+    def array(self):
+        self.pos += 1
+        result = []
+        while True:
+            c = self.skip()
+            if c is None:
+                raise _Truncated()
+            if c == ']':
+                self.pos += 1
+                return result
+            if c == ',':
+                self.pos += 1
+                continue
+            result.append(self.value())
+
+    def closes(self, i):
+        """Un guillemet en position i - 1 ferme-t-il la chaîne ?"""
+        text, n = self.text, len(self.text)
+        while i < n and text[i] in _WS:
+            i += 1
+        return i >= n or text[i] in ':,}]'
+
+    def string(self):
+        text, n = self.text, len(self.text)
+        quote = text[self.pos]
+        i = self.pos + 1
+        parts = []
+        start = i
+        while True:
+            j = i
+            while j < n and text[j] != quote and text[j] != '\\':
+                j += 1
+            if j >= n:
+                raise _Truncated()
+            if text[j] == '\\':
+                parts.append(text[start:j])
+                if j + 1 >= n:
+                    raise _Truncated()
+                esc = text[j + 1]
+                if esc == 'u':
+                    if j + 6 > n:
+                        raise _Truncated()
+                    try:
+                        parts.append(chr(int(text[j + 2:j + 6], 16)))
+                    except ValueError:
+                        parts.append(text[j:j + 6])
+                    i = start = j + 6
+                else:
+                    parts.append(_ESCAPES.get(esc, '\\' + esc))
+                    i = start = j + 2
+                continue
+            if self.closes(j + 1):
+                parts.append(text[start:j])
+                self.pos = j + 1
+                return ''.join(parts)
+            # Guillemet à l'intérieur du texte (apostrophe, citation non échappée)
+            i = j + 1
+
+    def bare_key(self):
+        text, n = self.text, len(self.text)
+        i = self.pos
+        while i < n and text[i] not in ':,{}[]':
+            i += 1
+        if i >= n:
+            raise _Truncated()
+        key = text[self.pos:i].strip()
+        if not key:
+            raise _Malformed(f"clé attendue en position {self.pos}")
+        self.pos = i
+        return key
+
+    def literal(self):
+        text, n = self.text, len(self.text)
+        i = self.pos
+        while i < n and text[i] not in ',:}]\n':
+            i += 1
+        if i >= n:
+            raise _Truncated()
+        raw = text[self.pos:i].strip()
+        self.pos = i
+        if raw in _LITERALS:
+            return _LITERALS[raw]
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+
+    def resync(self, start):
+        """Après une entrée illisible : position juste après la virgule suivante de même niveau."""
+        text, n = self.text, len(self.text)
+        depth = 0
+        i = start
+        in_string = False
+        while i < n:
+            c = text[i]
+            if in_string:
+                if c == '\\':
+                    i += 1
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c in '{[':
+                depth += 1
+            elif c in '}]':
+                if depth == 0:
+                    self.pos = i
+                    return
+                depth -= 1
+            elif c == ',' and depth == 0:
+                self.pos = i + 1
+                return
+            i += 1
+        self.pos = n
+
+
+def _object_start(text):
+    """Position de l'accolade ouvrante de la réponse : après un éventuel bloc ```, sinon la première."""
+    fence = _FENCE_RE.search(text)
+    if fence is not None:
+        start = text.find('{', fence.end())
+        if start >= 0:
+            return start
+    return text.find('{')
+
+
+def decode_response(response, stats=None):
+    """
+    Objet JSON d'une réponse de l'IA, sous forme de dict ({} si aucun objet n'est trouvé).
+    Accepte un dict (rendu tel quel) ou le texte brut du modèle : bloc ```json, texte autour,
+    clés ou valeurs entre guillemets simples (les apostrophes des noms de fichiers, comme
+    « l'école.pdf », sont conservées), virgules en trop, réponse coupée en cours de route.
+    Toutes les entrées complètes de premier niveau sont récupérées ; une entrée illisible est
+    ignorée sans perdre les suivantes. `stats` (dict facultatif) reçoit 'mode' ('json',
+    'tolérant' ou 'vide'), 'truncated' et 'skipped' (entrées ignorées).
+    """
+    stats = stats if stats is not None else {}
+    stats.update(mode='vide', truncated=False, skipped=0)
+    if isinstance(response, dict):
+        stats['mode'] = 'json'
+        return response
+    if not isinstance(response, str):
+        return {}
+    start = _object_start(response)
+    if start < 0:
+        return {}
+    # Chemin rapide : JSON valide entre la première et la dernière accolade
+    end = response.rfind('}')
+    if end > start:
+        try:
+            result = json.loads(response[start:end + 1])
+        except ValueError:
+            result = None
+        if isinstance(result, dict):
+            stats['mode'] = 'json'
+            return result
+    stats['mode'] = 'tolérant'
+    reader = _Reader(response, start + 1)
+    result = {}
+    while True:
+        c = reader.skip()
+        if c is None:
+            stats['truncated'] = True
+            return result
+        if c == '}':
+            return result
+        if c == ',':
+            reader.pos += 1
+            continue
+        entry_start = reader.pos
+        try:
+            key, value = reader.entry()
+        except _Truncated:
+            stats['truncated'] = True
+            return result
+        except _Malformed:
+            stats['skipped'] += 1
+            reader.resync(entry_start)
+            continue
+        result[key] = value
+
+
+class EntryStream:
+    """
+    Analyseur incrémental d'une réponse JSON {clé: valeur, ...} reçue par morceaux (streaming) :
+    feed() rend chaque entrée de premier niveau dès qu'elle est complète, sans attendre la fin
+    de la réponse. Le texte qui précède la première accolade (bloc ```json, phrase
+    d'introduction) est ignoré, de même que tout ce qui suit l'accolade fermante.
+    Les chaînes suivent la règle de _Reader : guillemets simples ou doubles, fermées seulement
+    par un guillemet suivi d'un séparateur ; un guillemet en fin de morceau attend la suite.
+    """
+
+    def __init__(self):
+        self._text = ''
+        self._pos = 0
+        self._depth = 0
+        self._quote = None
+        self._escape = False
+        self._entry_start = None
+        self.done = False
+        self.entries = 0
+
+    def feed(self, chunk):
+        """Ajoute un morceau de texte ; retourne la liste des (clé, valeur) complétées."""
+        if self.done or not chunk:
+            return []
+        text = self._text + chunk
+        entries = []
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._depth == 0:
+                # Avant l'objet : seule l'accolade ouvrante compte
+                if c == '{':
+                    self._depth = 1
+            elif self._quote is not None:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == self._quote:
+                    j = i + 1
+                    while j < len(text) and text[j] in _WS:
+                        j += 1
+                    if j >= len(text):
+                        # Fin de la chaîne ou apostrophe (« l'école.pdf ») : décidé au morceau suivant
+                        break
+                    if text[j] in ':,}]':
+                        self._quote = None
+            elif c in '"\'':
+                self._quote = c
+                if self._depth == 1 and self._entry_start is None:
+                    self._entry_start = i
+            elif self._depth == 1 and self._entry_start is None and c not in _WS + ',}':
+                # Clé sans guillemets (1, id...) : l'entrée commence ici
+                self._entry_start = i
+                if c in '{[':
+                    self._depth += 1
+            elif c in '{[':
+                self._depth += 1
+            elif c in '}]':
+                if self._depth == 1:
+                    self._close_entry(text, i, entries)
+                    self.done = True
+                self._depth -= 1
+                if self._depth == 1:
+                    # Valeur objet ou liste refermée : l'entrée est complète sans attendre la virgule
+                    self._close_entry(text, i + 1, entries)
+            elif c == ',' and self._depth == 1:
+                self._close_entry(text, i, entries)
+            i += 1
+        # Ne garde que le texte de l'entrée en cours
+        keep = self._entry_start if self._entry_start is not None else i
+        self._text = text[keep:]
+        self._pos = i - keep
+        if self._entry_start is not None:
+            self._entry_start = 0
+        return entries
+
+    def _close_entry(self, text, end, entries):
+        start, self._entry_start = self._entry_start, None
+        if start is None:
+            return
+        segment = text[start:end].strip()
+        entry = decode_response('{' + segment + '}')
+        if not entry:
+            print(f"[DEBUG] Entrée illisible ignorée : {segment[:80]}")
+            return
+        for key, value in entry.items():
+            self.entries += 1
+            entries.append((key, value))
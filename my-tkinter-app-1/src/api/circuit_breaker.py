@@ -0,0 +1,126 @@
+import time
+import threading
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Fenêtre glissante (secondes) sur laquelle sont comptés les échecs et les appels lents
+WINDOW_SECONDS = 60
+# Ouverture : après FAILURE_THRESHOLD échecs consécutifs, ou si au moins ERROR_RATE des
+# appels de la fenêtre (MIN_CALLS au minimum) ont échoué ou dépassé SLOW_CALL_SECONDS
+FAILURE_THRESHOLD = 3
+ERROR_RATE = 0.5
+MIN_CALLS = 5
+SLOW_CALL_SECONDS = 20
+# Durée d'ouverture avant de laisser passer un appel de test (semi-ouvert)
+OPEN_SECONDS = 30
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un fournisseur, partagé entre threads. Fermé : tous les appels passent.
+    Ouvert (trop d'échecs ou d'appels lents récents) : les appels sont refusés pendant
+    `open_seconds`, le trafic part directement vers un autre fournisseur. Semi-ouvert :
+    un seul appel de test passe ; un succès referme le circuit, un échec le rouvre.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, error_rate=ERROR_RATE, min_calls=MIN_CALLS,
+                 window_seconds=WINDOW_SECONDS, slow_call_seconds=SLOW_CALL_SECONDS, open_seconds=OPEN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._consecutive = 0
+        self._calls = deque()  # (instant, échec ou appel lent)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def _update(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update(time.monotonic())
+            return self._state
+
+    def retry_after(self):
+        """Secondes avant le prochain appel de test (0 si le circuit n'est pas ouvert)."""
+        with self._lock:
+            now = time.monotonic()
+            self._update(now)
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (now - self._opened_at))
+
+    def allow(self):
+        """True si un appel peut partir ; en semi-ouvert, réserve l'unique appel de test."""
+        with self._lock:
+            self._update(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency=0.0):
+        with self._lock:
+            now = time.monotonic()
+            self._update(now)
+            slow = latency > self.slow_call_seconds
+            self._calls.append((now, slow))
+            self._consecutive = 0
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._calls.clear()
+            elif self._state == CLOSED and slow:
+                self._check(now)
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self._update(now)
+            self._calls.append((now, True))
+            self._consecutive += 1
+            if self._state == HALF_OPEN:
+                self._open(now)
+            elif self._state == CLOSED:
+                self._check(now)
+
+    def release(self):
+        """Rend l'appel de test réservé par allow() quand il n'a finalement pas été mené à terme."""
+        with self._lock:
+            self._probing = False
+
+    def _check(self, now):
+        bad = sum(1 for _, failed in self._calls if failed)
+        if self._consecutive >= self.failure_threshold or (
+                len(self._calls) >= self.min_calls and bad / len(self._calls) >= self.error_rate):
+            self._open(now)
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probing = False
+        self.opened += 1
+
+    def stats(self):
+        with self._lock:
+            self._update(time.monotonic())
+            bad = sum(1 for _, failed in self._calls if failed)
+            return {'state': self._state, 'calls': len(self._calls), 'errors': bad,
+                    'opened': self.opened, 'rejected': self.rejected}
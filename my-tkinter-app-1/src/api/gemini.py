@@ -1,80 +1,609 @@
 import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from api.response_cache import get_response_cache
+from api.circuit_breaker import CircuitBreaker
+from ai.response_decoder import EntryStream, decode_response
+
+GEMINI_MODEL = "gemini-default"  # Remplacer par le nom réel du modèle
+MISTRAL_MODEL = "mistral-tiny"
+GEMINI_URL = "https://ai.google.de/v1/chat/completions"  # Remplacer par l'URL réelle de l'API Gemini
+MISTRAL_URL = "https://api.mistral.ai/v1/chat/completions"
+
+# Connexions keep-alive gardées par fournisseur : une par requête simultanée (MAX_IN_FLIGHT) et de la marge
+POOL_SIZE = 8
+# Délais (secondes) : établissement de la connexion TCP/TLS, puis attente de la réponse
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+# Requête de couverture (hedging) : le second fournisseur est sollicité si le premier n'a pas
+# répondu après le 95e centile de ses latences récentes (HEDGE_DELAY tant qu'il y a trop peu de mesures)
+HEDGE_PERCENTILE = 0.95
+HEDGE_DELAY = 10.0
+MIN_LATENCY_SAMPLES = 10
+LATENCY_WINDOW = 200
+# Codes HTTP pour lesquels une nouvelle tentative a une chance d'aboutir (voir api/retry.py)
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """Échec d'un appel à un fournisseur : code HTTP (None si erreur réseau) et délai Retry-After éventuel."""
+
+    def __init__(self, provider, message, status=None, retry_after=None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def transient(self):
+        """Erreur passagère : réseau (status None), limitation (429) ou indisponibilité (5xx...)."""
+        return self.status is None or self.status in RETRYABLE_STATUS
+
+
+class ProviderCancelled(ProviderError):
+    """Appel abandonné parce qu'un autre fournisseur a répondu le premier."""
 
-def get_ai_response(prompt):
-    from dotenv import load_dotenv
-    load_dotenv()
-
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    GEMINI_URL = "https://ai.google.de/v1/chat/completions"  # Remplacer par l'URL réelle de l'API Gemini
-    headers = {
-        "Authorization": f"Bearer {GEMINI_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "gemini-default",  # Remplacer par le nom réel du modèle
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 512
-    }
-
-    print(f"[DEBUG] GEMINI_API_KEY: {GEMINI_API_KEY}")
-    print(f"[DEBUG] Envoi de la requête à GEMINI_URL: {GEMINI_URL}")
-    print("[DEBUG] Envoi de la requête à GEMINI_URL avec les données suivantes :", data)
-    print("[DEBUG] En-têtes de la requête Gemini :", headers)
-
-    print("[DEBUG] Appel à get_ai_response avec GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
-        print("[DEBUG] GEMINI_API_KEY est vide ou non défini")
 
+class CircuitOpenError(ProviderError):
+    """Tous les fournisseurs ont leur disjoncteur ouvert ; `retry_after` : délai avant le prochain test."""
+
+
+class LatencyStats:
+    """Latences (secondes) des `window` derniers appels réussis d'un fournisseur."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q):
+        """Centile `q` (0-1) des latences récentes, ou None sans mesure."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def _retry_after(value):
+    """Délai Retry-After en secondes (seule la forme numérique est reconnue), ou None."""
     try:
-        resp = requests.post(GEMINI_URL, headers=headers, json=data, timeout=30)
-        if resp.status_code == 200:
-            candidates = resp.json().get("candidates", [])
-            if candidates:
-                text = candidates[0]["content"]["parts"][0]["text"]
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _gemini_text(payload):
+    return payload["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def _mistral_text(payload):
+    return payload["choices"][0]["message"]["content"]
+
+
+def _mistral_delta(payload):
+    return payload["choices"][0]["delta"].get("content") or ""
+
+
+class Provider:
+    """
+    Configuration d'un fournisseur : URL, modèle, clé, lecture du texte de la réponse et,
+    en streaming, du morceau de texte porté par chaque évènement (par défaut comme la réponse).
+    """
+
+    def __init__(self, name, url, model, api_key, extract_text, extract_delta=None):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.extract_text = extract_text
+        self.extract_delta = extract_delta or extract_text
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+
+class _Relay:
+    """
+    Transmet à `on_text` le flux d'un seul fournisseur à la fois, le premier à répondre : avec
+    deux appels en parallèle, les morceaux ne se mélangent pas. Si ce fournisseur échoue ou
+    rend une réponse inutilisable, `on_restart` est appelé et le flux passe au suivant, rejoué
+    depuis son début.
+    """
+
+    def __init__(self, on_text, on_restart=None):
+        self.on_text = on_text
+        self.on_restart = on_restart
+        self._received = {}   # fournisseur -> morceaux reçus, dans l'ordre des premières réponses
+        self._dropped = set()
+        self._owner = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def forward(self, name):
+        """Rappel `on_text` à passer à l'appel du fournisseur `name`."""
+        if self.on_text is None:
+            return None
+
+        def forward(delta):
+            with self._lock:
+                if self._closed or name in self._dropped:
+                    return
+                self._received.setdefault(name, []).append(delta)
+                if self._owner is None:
+                    self._owner = name
+                if self._owner == name:
+                    self.on_text(delta)
+        return forward
+
+    def drop(self, name):
+        """Le fournisseur `name` ne sera pas retenu : s'il était relayé, le flux passe au suivant."""
+        with self._lock:
+            self._dropped.add(name)
+            self._received.pop(name, None)
+            if self._closed or self._owner != name:
+                return
+            self._owner = None
+            if self.on_restart is not None:
+                self.on_restart()
+            for other, chunks in self._received.items():
+                self._owner = other
+                for delta in chunks:
+                    self.on_text(delta)
+                break
+
+    def close(self):
+        """Réponse retenue : les morceaux encore en route (perdant pas encore annulé) sont ignorés."""
+        with self._lock:
+            self._closed = True
+
+
+class ProviderClient:
+    """
+    Client partagé des fournisseurs d'IA (Gemini, repli Mistral). La configuration (.env et
+    variables d'environnement) est lue une seule fois ; chaque fournisseur a sa session HTTP
+    avec un pool de connexions keep-alive (`pool_size`), si bien que les lots envoyés en
+    parallèle réutilisent les connexions TLS au lieu d'en ouvrir une par requête.
+    Utilisable depuis plusieurs threads : le pool urllib3 est protégé par un verrou et
+    les sessions ne portent aucun état propre à une requête.
+
+    Avec `hedge` (désactivé par défaut : chaque requête de couverture est facturée), le second
+    fournisseur est sollicité dès que le premier tarde au-delà de `hedge_after` secondes (par
+    défaut : le 95e centile de ses latences récentes) ; la première réponse JSON valide
+    l'emporte et l'autre appel est abandonné.
+
+    Chaque fournisseur a son disjoncteur (api/circuit_breaker.py) : tant qu'il est ouvert,
+    le fournisseur est sauté et le trafic part directement vers les autres.
+    """
+
+    def __init__(self, providers, pool_size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 hedge=False, hedge_after=None, breakers=None):
+        self.providers = list(providers)
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self._sessions = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self.requests = {p.name: 0 for p in self.providers}
+        self.failures = {p.name: 0 for p in self.providers}
+        self.wins = {p.name: 0 for p in self.providers}
+        self.hedged = {p.name: 0 for p in self.providers}
+        self.latency = {p.name: LatencyStats() for p in self.providers}
+        self.breakers = breakers or {p.name: CircuitBreaker() for p in self.providers}
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Client configuré depuis .env : clés, URL / modèles surchargeables (GEMINI_URL, MISTRAL_MODEL...),
+        AI_HEDGE=1 pour activer les requêtes de couverture, AI_HEDGE_AFTER pour un délai fixe (secondes).
+        """
+        load_dotenv()
+        providers = [
+            Provider("gemini", os.getenv("GEMINI_URL", GEMINI_URL), os.getenv("GEMINI_MODEL", GEMINI_MODEL),
+                     os.getenv("GEMINI_API_KEY"), _gemini_text),
+            Provider("mistral", os.getenv("MISTRAL_URL", MISTRAL_URL), os.getenv("MISTRAL_MODEL", MISTRAL_MODEL),
+                     os.getenv("MISTRAL_API_KEY"), _mistral_text, _mistral_delta),
+        ]
+        for p in providers:
+            if not p.api_key:
+                print(f"[DEBUG] Clé API {p.name} vide ou non définie")
+        kwargs.setdefault('hedge', os.getenv("AI_HEDGE", "0").lower() in ("1", "true", "oui"))
+        if os.getenv("AI_HEDGE_AFTER"):
+            kwargs.setdefault('hedge_after', float(os.getenv("AI_HEDGE_AFTER")))
+        return cls(providers, **kwargs)
+
+    def provider(self, name):
+        for p in self.providers:
+            if p.name == name:
+                return p
+        raise KeyError(name)
+
+    def session(self, name):
+        """Session keep-alive du fournisseur (créée au premier appel)."""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                # Pas de nouvelle tentative implicite : les échecs remontent à l'appelant
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(self.provider(name).headers)
+                self._sessions[name] = session
+            return session
+
+    def _call(self, name, prompt, max_tokens=512, cancel=None, on_text=None):
+        """
+        Texte de la réponse du fournisseur `name` ; lève ProviderError en cas d'échec.
+        Si l'évènement `cancel` est positionné pendant la lecture, la connexion est fermée
+        et ProviderCancelled est levée. Avec `on_text`, la réponse est demandée en streaming
+        (évènements SSE) et chaque morceau de texte est transmis à `on_text` dès sa réception.
+        """
+        provider = self.provider(name)
+        data = {
+            "model": provider.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens
+        }
+        if on_text is not None:
+            data["stream"] = True
+        start = time.monotonic()
+        try:
+            # Dans le try : l'appel de test réservé par le disjoncteur est rendu
+            if cancel is not None and cancel.is_set():
+                raise ProviderCancelled(name, "abandonné avant l'envoi")
+            with self._lock:
+                self.requests[name] += 1
+            try:
+                resp = self.session(name).post(provider.url, json=data, timeout=self.timeout, stream=True)
+            except requests.RequestException as e:
+                raise ProviderError(name, f"erreur réseau : {e}") from e
+            streamed = (on_text is not None and resp.status_code == 200
+                        and resp.headers.get("Content-Type", "").startswith("text/event-stream"))
+            try:
+                if streamed:
+                    text = self._read_events(provider, resp, cancel, on_text)
+                else:
+                    body = bytearray()
+                    for chunk in resp.iter_content(chunk_size=8192):
+                        if cancel is not None and cancel.is_set():
+                            raise ProviderCancelled(name, "une autre réponse est arrivée avant")
+                        body.extend(chunk)
+            except requests.RequestException as e:
+                # Connexion coupée en cours de lecture : erreur réseau passagère, quel que soit le statut reçu
+                raise ProviderError(name, f"erreur réseau : {e}") from e
+            finally:
+                resp.close()
+            if resp.status_code != 200:
+                text = bytes(body[:200]).decode('utf-8', 'replace')
+                raise ProviderError(name, f"HTTP {resp.status_code} - {text}", status=resp.status_code,
+                                    retry_after=_retry_after(resp.headers.get("Retry-After")))
+            if not streamed:
                 try:
-                    return json.loads(text)
-                except Exception as e:
-                    print(f"[DEBUG] Erreur de parsing JSON: {e}")
-                    return text
-        else:
-            print(f"[DEBUG] Erreur HTTP Gemini: {resp.status_code} - {resp.text}")
-    except Exception as e:
-        print(f"[DEBUG] Exception lors de la requête Gemini: {e}")
-
-    # --- Repli Mistral ---
-    MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-    MISTRAL_URL = "https://api.mistral.ai/v1/chat/completions"
-    mistral_headers = {
-        "Authorization": f"Bearer {MISTRAL_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    mistral_data = {
-        "model": "mistral-tiny",
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 512
-    }
-
-    print(f"[DEBUG] MISTRAL_API_KEY: {MISTRAL_API_KEY}")
-    print(f"[DEBUG] Envoi de la requête à MISTRAL_URL: {MISTRAL_URL}")
-    print("[DEBUG] Envoi de la requête à MISTRAL_URL avec les données suivantes :", mistral_data)
-    print("[DEBUG] En-têtes de la requête Mistral :", mistral_headers)
+                    text = provider.extract_text(json.loads(bytes(body)))
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    raise ProviderError(name, f"réponse inattendue : {e}", status=resp.status_code) from e
+                if on_text is not None:
+                    # Le fournisseur a ignoré la demande de streaming : tout arrive d'un bloc
+                    on_text(text)
+        except ProviderCancelled:
+            self.breakers[name].release()
+            raise
+        except ProviderError:
+            with self._lock:
+                self.failures[name] += 1
+            self.breakers[name].record_failure()
+            raise
+        elapsed = time.monotonic() - start
+        self.latency[name].record(elapsed)
+        self.breakers[name].record_success(elapsed)
+        return text
 
-    try:
-        resp = requests.post(MISTRAL_URL, headers=mistral_headers, json=mistral_data, timeout=30)
-        if resp.status_code == 200:
-            result = resp.json()
-            text = result["choices"][0]["message"]["content"]
+    def _read_events(self, provider, resp, cancel, on_text):
+        """Texte complet d'une réponse SSE ('data: {...}' jusqu'à 'data: [DONE]'), relayé au fil de l'eau."""
+        parts = []
+        finished = False
+        for line in resp.iter_lines(chunk_size=512):
+            if cancel is not None and cancel.is_set():
+                raise ProviderCancelled(provider.name, "une autre réponse est arrivée avant")
+            # La lecture continue jusqu'à la fin du flux pour rendre la connexion au pool
+            if finished or not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                finished = True
+                continue
             try:
-                return json.loads(text)
-            except Exception as e:
-                print(f"[DEBUG] Erreur de parsing JSON: {e}")
-                return text
-        else:
-            print(f"[DEBUG] Erreur HTTP Mistral: {resp.status_code} - {resp.text}")
-    except Exception as e:
-        print(f"[DEBUG] Exception lors de la requête Mistral: {e}")
-
-    return {}
+                delta = provider.extract_delta(json.loads(data))
+            except (ValueError, KeyError, IndexError, TypeError):
+                continue
+            if delta:
+                parts.append(delta)
+                on_text(delta)
+        return ''.join(parts)
+
+    def _attempt(self, name, prompt, max_tokens, cancel=None, on_text=None):
+        """
+        (fournisseur, réponse, valide) : valide si un objet JSON non vide a pu être lu dans la
+        réponse (ai/response_decoder.py : bloc ```json, guillemets simples, réponse tronquée...) ;
+        sinon texte brut.
+        """
+        text = self._call(name, prompt, max_tokens, cancel, on_text)
+        result = decode_response(text)
+        if result:
+            return name, result, True
+        print(f"[DEBUG] Aucun objet JSON dans la réponse de {name}")
+        return name, text, False
+
+    def hedge_delay(self, name):
+        """Délai avant de solliciter le fournisseur suivant quand `name` tarde à répondre."""
+        if self.hedge_after is not None:
+            return self.hedge_after
+        stats = self.latency[name]
+        if len(stats) < MIN_LATENCY_SAMPLES:
+            return HEDGE_DELAY
+        return stats.percentile(HEDGE_PERCENTILE)
+
+    def complete(self, prompt, max_tokens=512, on_text=None, on_restart=None):
+        """
+        (fournisseur, réponse) : dict JSON, ou texte brut si aucun fournisseur n'a rendu de JSON.
+        Les fournisseurs sont essayés dans l'ordre de `providers`, sauf ceux dont le disjoncteur
+        est ouvert ; avec `hedge`, le suivant est lancé en parallèle quand le précédent tarde.
+        Si tous échouent, lève l'erreur la plus favorable à une nouvelle tentative (voir _failure) ;
+        CircuitOpenError si aucun n'est disponible.
+        `on_text` : voir _call ; seul le flux d'un fournisseur à la fois est transmis (voir _Relay).
+        `on_restart` est appelé quand ce fournisseur est abandonné : le flux repart du début.
+        """
+        relay = _Relay(on_text, on_restart)
+        try:
+            if self.hedge and len(self.providers) > 1:
+                return self._complete_hedged(prompt, max_tokens, relay)
+            return self._complete_sequential(prompt, max_tokens, relay)
+        finally:
+            relay.close()
+
+    def _complete_sequential(self, prompt, max_tokens, relay):
+        errors = []
+        fallback = None
+        launched = False
+        for provider in self.providers:
+            if not self.breakers[provider.name].allow():
+                continue
+            launched = True
+            try:
+                result = self._attempt(provider.name, prompt, max_tokens, on_text=relay.forward(provider.name))
+            except ProviderError as e:
+                print(f"[DEBUG] {e}")
+                errors.append(e)
+                relay.drop(provider.name)
+                continue
+            if result[2]:
+                return self._won(result)
+            relay.drop(provider.name)
+            fallback = fallback or result
+        if not launched:
+            raise self._circuit_open()
+        if fallback is not None:
+            return self._won(fallback)
+        raise self._failure(errors)
+
+    def _complete_hedged(self, prompt, max_tokens, relay):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2 * self.pool_size, thread_name_prefix="ai-hedge")
+            executor = self._executor
+        cancel = threading.Event()
+        waiting = list(self.providers)
+        pending = set()
+        errors = []
+        fallback = None
+
+        def launch():
+            # Prochain fournisseur dont le disjoncteur laisse passer l'appel, ou None
+            while waiting:
+                provider = waiting.pop(0)
+                if self.breakers[provider.name].allow():
+                    pending.add(executor.submit(self._attempt, provider.name, prompt, max_tokens, cancel,
+                                                relay.forward(provider.name)))
+                    return provider.name
+            return None
+
+        current = launch()
+        if current is None:
+            raise self._circuit_open()
+        try:
+            while pending:
+                timeout = self.hedge_delay(current) if waiting else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # Le fournisseur en cours tarde : requête de couverture vers le suivant
+                    hedge = launch()
+                    if hedge is not None:
+                        with self._lock:
+                            self.hedged[current] += 1
+                        print(f"[DEBUG] {current} tarde (> {timeout:.1f}s), envoi en parallèle à {hedge}")
+                        current = hedge
+                    continue
+                for future in done:
+                    pending.discard(future)
+                    try:
+                        result = future.result()
+                    except ProviderError as e:
+                        print(f"[DEBUG] {e}")
+                        errors.append(e)
+                        relay.drop(e.provider)
+                        continue
+                    if result[2]:
+                        return self._won(result)
+                    relay.drop(result[0])
+                    fallback = fallback or result
+                if not pending and waiting:
+                    current = launch() or current
+        finally:
+            # Le perdant éventuel abandonne sa lecture et libère sa connexion
+            cancel.set()
+        if fallback is not None:
+            return self._won(fallback)
+        raise self._failure(errors)
+
+    @staticmethod
+    def _failure(errors):
+        """
+        Erreur à remonter quand tous les fournisseurs ont échoué : la plus favorable à une
+        nouvelle tentative (passagère, au plus long Retry-After), sinon la dernière. Ainsi un
+        429 de Gemini n'est pas masqué par un 401 de Mistral sans clé.
+        """
+        if not errors:
+            return ProviderError("aucun", "aucun fournisseur configuré")
+        transient = [e for e in errors if e.transient]
+        if not transient:
+            return errors[-1]
+        # À Retry-After égal, la dernière erreur l'emporte
+        return max(reversed(transient), key=lambda e: e.retry_after or 0.0)
+
+    def _circuit_open(self):
+        retry_after = min(b.retry_after() for b in self.breakers.values())
+        print(f"[DEBUG] Tous les disjoncteurs sont ouverts, prochain essai dans {retry_after:.0f}s")
+        return CircuitOpenError("aucun", "tous les fournisseurs sont indisponibles", retry_after=retry_after)
+
+    def _won(self, result):
+        with self._lock:
+            self.wins[result[0]] += 1
+        return result[0], result[1]
+
+    def metrics(self):
+        """
+        Par fournisseur : requêtes envoyées, échecs, réponses retenues (`wins`), requêtes de
+        couverture déclenchées par sa lenteur (`hedged`), latences p50 / p95, état du
+        disjoncteur (`circuit`), connexions
+        ouvertes et requêtes servies par le pool. Avec le keep-alive, `connections` reste
+        très inférieur à `requests`.
+        """
+        stats = {}
+        with self._lock:
+            sessions = dict(self._sessions)
+            for p in self.providers:
+                stats[p.name] = {'requests': self.requests[p.name], 'failures': self.failures[p.name],
+                                 'wins': self.wins[p.name], 'hedged': self.hedged[p.name],
+                                 'latency_p50': self.latency[p.name].percentile(0.5),
+                                 'latency_p95': self.latency[p.name].percentile(HEDGE_PERCENTILE),
+                                 'circuit': self.breakers[p.name].state,
+                                 'connections': 0, 'pooled_requests': 0}
+        for name, session in sessions.items():
+            pools = session.get_adapter(self.provider(name).url).poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    stats[name]['connections'] += pool.num_connections
+                    stats[name]['pooled_requests'] += pool.num_requests
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Client partagé par tous les appels à l'IA (configuré au premier usage)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ProviderClient.from_env()
+        return _client
+
+
+def reset_client():
+    """
+    Relit .env (les clés qu'il contient remplacent celles déjà chargées) et oublie le client
+    partagé : le prochain appel en construit un nouveau avec les clés à jour. À appeler après
+    l'enregistrement des paramètres. L'ancien client n'est pas fermé, pour ne pas couper les
+    requêtes en cours ; ses sessions sont libérées avec lui.
+    """
+    global _client
+    load_dotenv(override=True)
+    with _client_lock:
+        _client = None
+
+
+def get_ai_response(prompt, use_cache=True, max_tokens=512, on_entry=None):
+    """
+    Réponse de l'IA (Gemini, repli Mistral) : dict JSON, texte brut, ou {} en cas d'échec.
+    `max_tokens` borne la taille de la réponse ; l'appelant la dimensionne selon la réponse attendue.
+    Avec `use_cache`, un prompt déjà envoyé (à l'espacement près) est servi depuis le cache
+    disque (api/response_cache.py) sans appel réseau. Les erreurs passagères (429, 5xx,
+    réseau) sont relancées selon la politique commune (api/retry.py).
+    Avec `on_entry(clé, valeur)`, la réponse est reçue en streaming et chaque entrée de
+    l'objet JSON est transmise dès qu'elle est complète. Une clé est transmise de nouveau si
+    sa valeur change : flux d'un fournisseur abandonné en cours de route, puis valeurs de la
+    réponse retenue (envoyées à la fin, comme les entrées jamais transmises).
+    """
+    from api.retry import get_retry_policy
+
+    client = get_client()
+    sent = {}
+    emit_lock = threading.Lock()
+
+    def emit(entries):
+        for key, value in entries:
+            with emit_lock:
+                if key in sent and sent[key] == value:
+                    continue
+                sent[key] = value
+            on_entry(key, value)
+
+    def finish(result):
+        if on_entry is not None and isinstance(result, dict):
+            emit(result.items())
+        return result
+
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get_any([(p.name, p.model) for p in client.providers], prompt)
+        if cached is not None:
+            print(f"[DEBUG] Réponse {cached[0]} servie depuis le cache ({cache.hits} succès, {cache.misses} échecs)")
+            return finish(cached[1])
+
+    def attempt():
+        if on_entry is None:
+            return client.complete(prompt, max_tokens=max_tokens)
+        # Nouvel analyseur à chaque tentative, et à chaque changement de fournisseur relayé
+        stream = [EntryStream()]
+
+        def restart():
+            stream[0] = EntryStream()
+        return client.complete(prompt, max_tokens=max_tokens, on_text=lambda delta: emit(stream[0].feed(delta)),
+                               on_restart=restart)
+
+    try:
+        provider, result = get_retry_policy().call(attempt)
+    except ProviderError as e:
+        print(f"[ERREUR] Aucun fournisseur n'a répondu : {e}")
+        return {}
+    # Texte brut illisible : non mis en cache, pour qu'un prochain appel retente sa chance
+    if cache is not None and isinstance(result, dict) and result:
+        cache.put(provider, client.provider(provider).model, prompt, result)
+    return finish(result)
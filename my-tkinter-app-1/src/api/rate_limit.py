@@ -0,0 +1,39 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    Limiteur de débit à seau de jetons, partagé entre threads : au plus `requests_per_minute`
+    requêtes par minute en régime établi, avec des rafales limitées à `burst` requêtes
+    (par défaut : une seconde de débit, au moins 1). `requests_per_minute=None` : pas de limite.
+    """
+
+    def __init__(self, requests_per_minute=None, burst=None):
+        self.rate = requests_per_minute / 60.0 if requests_per_minute else None
+        self.capacity = max(1.0, burst if burst is not None else (self.rate or 1.0))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme ; retourne le temps d'attente."""
+        if self.rate is None:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.waited += waited
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_PATH = 'src/data/response_cache.db'
+CACHE_TTL = 30 * 24 * 3600          # secondes
+CACHE_MAX_BYTES = 50 * 1024 * 1024  # au-delà, les réponses les moins récemment lues sont évincées
+
+
+def normalize_prompt(prompt):
+    """Prompt sans différences d'espacement (espaces multiples, fins de ligne, indentation)."""
+    return ' '.join(prompt.split())
+
+
+def cache_key(provider, model, prompt):
+    digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+    return f"{provider}:{model}:{digest}"
+
+
+class ResponseCache:
+    """
+    Cache disque (SQLite) des réponses de l'IA, indexé par fournisseur, modèle et empreinte
+    du prompt normalisé. Les entrées expirent après `ttl` secondes ; au-delà de `max_bytes`,
+    les moins récemment utilisées sont évincées (LRU). Les compteurs `hits` / `misses`
+    portent sur la session en cours.
+    """
+
+    def __init__(self, db_path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, provider, model, prompt):
+        """Réponse en cache (dict), ou None si absente ou expirée."""
+        found = self.get_any([(provider, model)], prompt)
+        return found[1] if found else None
+
+    def get_any(self, candidates, prompt):
+        """
+        Première réponse en cache parmi `candidates` [(fournisseur, modèle), ...] pour `prompt` :
+        (fournisseur, réponse), ou None. Compte un seul succès / échec par appel.
+        """
+        now = time.time()
+        with self._lock:
+            for provider, model in candidates:
+                key = cache_key(provider, model, prompt)
+                row = self._conn.execute("SELECT response, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                if self.ttl is not None and now - row[2] > self.ttl:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._total -= row[1]
+                    continue
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return provider, json.loads(row[0])
+            self.misses += 1
+        return None
+
+    def put(self, provider, model, prompt, response):
+        """
+        Mémorise une réponse valide (dict JSON non vide) ; les réponses vides (échecs) et le
+        texte brut que le décodage n'a pas su lire ne sont pas mis en cache.
+        """
+        if not isinstance(response, dict) or not response:
+            return
+        key = cache_key(provider, model, prompt)
+        data = json.dumps(response, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now)
+            )
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        while self.max_bytes is not None and self._total > self.max_bytes:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                self._total = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total -= size
+                self.evictions += 1
+                if self._total <= self.max_bytes:
+                    break
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'bytes': self._total}
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Cache partagé par tous les appels à l'IA (ouvert au premier usage)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,143 @@
+import time
+import random
+import threading
+from collections import deque
+
+from api.gemini import ProviderError, ProviderCancelled
+# Tentatives par appel (la première comprise) et attente exponentielle : BASE_DELAY * 2^n, plafonnée
+MAX_ATTEMPTS = 4
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+# Au-delà de ce Retry-After (secondes), on abandonne plutôt que de bloquer le lot
+MAX_RETRY_AFTER = 60.0
+# Budget global : sur la fenêtre, au plus RETRY_RATIO nouvelles tentatives par appel (MIN_RETRIES au moins)
+RETRY_RATIO = 0.2
+MIN_RETRIES = 10
+BUDGET_WINDOW = 60.0
+
+
+class InvalidResponse(Exception):
+    """Réponse reçue mais inexploitable (JSON illisible) : une nouvelle tentative peut aboutir."""
+
+
+class RetryBudget:
+    """
+    Budget de nouvelles tentatives partagé par tous les appels à l'IA : sur les `window`
+    dernières secondes, au plus max(`min_retries`, `ratio` × appels) nouvelles tentatives.
+    Quand un fournisseur est saturé, les tentatives cessent au lieu d'aggraver la limitation.
+    """
+
+    def __init__(self, ratio=RETRY_RATIO, min_retries=MIN_RETRIES, window=BUDGET_WINDOW):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._calls = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+        self.refused = 0
+
+    def _trim(self, now):
+        for events in (self._calls, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_retry(self):
+        """Réserve une nouvelle tentative ; False si le budget est épuisé."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self._retries) >= max(self.min_retries, self.ratio * len(self._calls)):
+                self.refused += 1
+                return False
+            self._retries.append(now)
+            return True
+
+
+class RetryPolicy:
+    """
+    Politique commune de nouvelles tentatives des appels à l'IA : attente exponentielle avec
+    gigue (« full jitter »), respect de Retry-After, distinction entre erreurs passagères
+    (réseau, 429, 5xx, réponse illisible) et définitives (clé refusée, requête invalide),
+    et budget global (RetryBudget).
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 max_retry_after=MAX_RETRY_AFTER, budget=None, sleep=time.sleep):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.fatal = 0
+
+    def is_retryable(self, error):
+        if isinstance(error, InvalidResponse):
+            return True
+        if isinstance(error, ProviderCancelled) or not isinstance(error, ProviderError):
+            return False
+        if error.retry_after is not None and error.retry_after > self.max_retry_after:
+            return False
+        # status None : erreur réseau ou disjoncteurs ouverts
+        return error.transient
+
+    def delay(self, attempt, error=None):
+        """Attente avant la tentative `attempt` + 1 : gigue sur [0, base × 2^attempt], au moins Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def call(self, fn, *args, **kwargs):
+        """Appelle `fn` et la relance selon la politique ; lève la dernière erreur sinon."""
+        self.budget.record_call()
+        return self._run(self.is_retryable, fn, args, kwargs)
+
+    def call_until_valid(self, fn, *args, **kwargs):
+        """
+        Comme call, mais seule InvalidResponse est relancée : pour une couche au-dessus de
+        get_ai_response, qui relance déjà les erreurs réseau et compte l'appel dans le budget.
+        Chaque nouvelle tentative reste prélevée sur le budget commun.
+        """
+        return self._run(lambda e: isinstance(e, InvalidResponse), fn, args, kwargs)
+
+    def _run(self, retryable, fn, args, kwargs):
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                if not retryable(e):
+                    with self._lock:
+                        self.fatal += 1
+                    raise
+                if attempt >= self.max_attempts or not self.budget.try_retry():
+                    raise
+                delay = self.delay(attempt - 1, e)
+                with self._lock:
+                    self.retries += 1
+                print(f"[DEBUG] {e} : nouvelle tentative {attempt + 1}/{self.max_attempts} dans {delay:.1f}s")
+                self.sleep(delay)
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy():
+    """Politique (et budget) partagée par tous les appels à l'IA."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = RetryPolicy()
+        return _policy
@@ -19,6 +19,9 @@ from chat_panel import ChatPanel
 install_script = os.path.join(os.path.dirname(__file__), '..', 'install', 'install_dependencies.py')
 subprocess.check_call([sys.executable, install_script])
 
+# Durée maximum du scan au démarrage (secondes), modifiable via 'scan_budget' dans settings.json
+DEFAULT_SCAN_SECONDS = 20
+
 def get_system_font():
     """Get appropriate font family for the current system."""
     system = platform.system()
@@ -73,7 +76,11 @@ class FileOrganizerApp:
             Banner(self.master, links_photos).show()
             self.master.update()  # Force immediate UI update
 
-        from organizer.file_organizer import get_all_files
+        from organizer.multi_scan import iter_files_multi
+        from organizer.scan_budget import ScanBudget
+        # Budget commun à tous les dossiers : l'interface est utilisable en un temps prévisible,
+        # le reste des arbres est repris au démarrage suivant
+        scan_budget = ScanBudget.from_settings(self.settings, max_seconds=DEFAULT_SCAN_SECONDS)
         self.last_files = []
         scan_folders = self.settings.get('scan_folders', [])
         print(f"[DEBUG] Scan folders: {scan_folders}")
@@ -84,18 +91,36 @@ class FileOrganizerApp:
         else:
             print("[ERROR] ChatPanel does not have a progress bar.")
 
-        for i, folder in enumerate(scan_folders):
-            try:
-                print(f"[DEBUG] Scanning folder: {folder}")
-                files = get_all_files(folder)
-                print(f"[DEBUG] Found {len(files)} files in {folder}")
-                self.last_files.extend(files)
-            except Exception as e:
-                print(f"[ERROR] Failed to scan folder {folder}: {e}")
-            finally:
-                if hasattr(self.chat_panel, 'progress'):
-                    self.chat_panel.set_progress(i + 1)
-                self.master.update_idletasks()
+        done_folders = []
+
+        def on_folder_done(folder, scan_stats):
+            done_folders.append(folder)
+            print(f"[DEBUG] Scan stats for {folder}: {scan_stats}")
+            if scan_stats.get("pending_dirs"):
+                print(f"[DEBUG] Scan budget reached, {scan_stats['pending_dirs']} folder(s) left for next startup")
+            if hasattr(self.chat_panel, 'progress'):
+                self.chat_panel.set_progress(len(done_folders))
+            self.master.update_idletasks()
+
+        # Un parcours par disque en parallèle (SSD, disque USB, NAS...), fusionnés en un seul flux ;
+        # consommation incrémentale : l'interface reste réactive pendant le parcours
+        try:
+            files = iter_files_multi(scan_folders,
+                                     ignore_patterns=self.settings.get('ignore_patterns'),
+                                     budget=scan_budget,
+                                     concurrency=self.settings.get('device_concurrency'),
+                                     extraction=self.settings.get('extraction'),
+                                     on_root_done=on_folder_done)
+            for f in files:
+                self.last_files.append(f)
+                if len(self.last_files) % 200 == 0:
+                    self.master.update_idletasks()
+        except Exception as e:
+            print(f"[ERROR] Failed to scan folders {scan_folders}: {e}")
+        finally:
+            if hasattr(self.chat_panel, 'progress'):
+                self.chat_panel.set_progress(len(scan_folders))
+            self.master.update_idletasks()
 
         print(f"[DEBUG] Total files scanned: {len(self.last_files)}")
         if self.last_files and isinstance(self.last_files[0], dict):
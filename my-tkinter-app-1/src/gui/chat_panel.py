@@ -31,8 +31,10 @@ class ChatPanel:
 
     def modify_organization(self, user_text, last_regrouped, update_callback=None):
         import threading
-        import json
         from api.gemini import get_ai_response
+        from api.retry import get_retry_policy, InvalidResponse
+        from ai.response_decoder import decode_response
+        from ai.prompt_builder import build_modification_prompt, decode_ids
         def worker():
             self.add_message("\nAssistant : Modification en cours...\n", tag="system")
             self.set_tag("system", foreground="#87CEEB", font=(get_system_font(), 10, "italic"))
@@ -53,24 +55,38 @@ class ChatPanel:
                             if theme not in regrouped_batch:
                                 regrouped_batch[theme] = {}
                             regrouped_batch[theme][sous_theme] = files_in_batch
-                prompt = self.build_modification_prompt(user_text, regrouped_batch)
+                prompt, ids = build_modification_prompt(user_text, regrouped_batch)
                 print(f"[DEBUG] Prompt batch {idx+1} :\n", prompt)
-                suggestions = None
-                for attempt in range(5):
+                attempts = []
+
+                def render(key, value):
+                    # Entrées reçues en streaming : identifiant court -> nom du fichier
+                    for name, suggestion in decode_ids({key: value}, ids).items():
+                        self.render_entry(name, suggestion)
+
+                def ask():
+                    attempts.append(prompt)
+                    attempt = len(attempts)
                     print("[DEBUG] Appel à modify_organization avec le batch")
-                    response = get_ai_response(prompt)
-                    print(f"[DEBUG] Réponse brute IA batch {idx+1} tentative {attempt+1} :\n", response)
-                    try:
-                        if isinstance(response, str):
-                            suggestions = json.loads(response.replace("'", '"'))
-                        else:
-                            suggestions = response
-                        print(f"[DEBUG] Réponse IA parsée batch {idx+1} tentative {attempt+1} :\n", suggestions)
-                        break
-                    except Exception as e:
-                        print(f"[DEBUG] Erreur parsing JSON IA batch {idx+1} tentative {attempt+1} :", e)
-                        suggestions = None
-                if suggestions is None:
+                    # Après une réponse illisible, la suivante ne doit pas être servie par le cache
+                    response = get_ai_response(prompt, use_cache=attempt == 1, on_entry=render)
+                    print(f"[DEBUG] Réponse brute IA batch {idx+1} tentative {attempt} :\n", response)
+                    if not response:
+                        # Fournisseurs indisponibles : get_ai_response a déjà fait ses tentatives
+                        return None
+                    suggestions = decode_ids(decode_response(response), ids)
+                    if not suggestions:
+                        print(f"[DEBUG] Aucun JSON exploitable dans la réponse IA batch {idx+1} tentative {attempt}")
+                        raise InvalidResponse(f"réponse illisible pour le batch {idx+1}")
+                    print(f"[DEBUG] Réponse IA parsée batch {idx+1} tentative {attempt} :\n", suggestions)
+                    return suggestions
+                # Réponses illisibles relancées avec attente et budget communs (api/retry.py) ;
+                # les erreurs réseau sont déjà relancées dans get_ai_response
+                try:
+                    suggestions = get_retry_policy().call_until_valid(ask)
+                except InvalidResponse:
+                    suggestions = None
+                if not suggestions:
                     failed_batches.append(batch)
                     continue
                 all_suggestions.update(suggestions)
@@ -78,7 +94,7 @@ class ChatPanel:
                 from tkinter import messagebox
                 failed_files = [f for batch in failed_batches for f in batch]
                 msg = (
-                    "Attention : certains lots n'ont pas pu être traités après 5 tentatives.\n"
+                    "Attention : certains lots n'ont pas pu être traités malgré plusieurs tentatives.\n"
                     "Les fichiers suivants n'ont pas été réorganisés :\n\n"
                     + "\n".join(failed_files)
                 )
@@ -147,6 +163,13 @@ class ChatPanel:
         except Exception as e:
             print(f"[DEBUG] Erreur add_message: {e}")
 
+    def render_entry(self, file_name, suggestion):
+        """Affiche un classement reçu en streaming, avant l'organisation complète."""
+        theme = suggestion.get('theme', '') if isinstance(suggestion, dict) else suggestion
+        sous_theme = suggestion.get('sous_theme', '') if isinstance(suggestion, dict) else ''
+        label = f"{theme} / {sous_theme}" if sous_theme else f"{theme}"
+        self.add_message(f"  • {file_name} → {label}\n", tag="file")
+
     def set_tag(self, tag, **kwargs):
         self.chat_text.tag_config(tag, **kwargs)
 
@@ -166,10 +189,9 @@ class ChatPanel:
                 self.add_message("\nAssistant : Organisation initiale en cours...\n", tag="system")
                 self.set_tag("system", foreground="#FFD700", font=(get_system_font(), 10, "italic"))
                 self.set_progress(10)
-                gemini = GeminiValidator(debug=True)
-                batch_size = 5
                 existing_themes = set()
                 existing_subthemes = set()
+                settings = {}
                 try:
                     with open('settings.json', 'r', encoding='utf-8') as f:
                         settings = json.load(f)
@@ -181,6 +203,9 @@ class ChatPanel:
                                 existing_subthemes.add(sous_theme)
                 except Exception:
                     pass
+                # Lots remplis selon le budget de tokens et envoyés en parallèle : section 'ai' de settings.json
+                # Les fichiers évidents sont classés localement d'après l'organisation déjà acceptée
+                gemini = GeminiValidator.from_settings(settings, debug=True, files=files)
                 # DEBUG: Affiche le nombre de fichiers transmis
                 self.add_message(f"[DEBUG] Nombre de fichiers transmis à l'IA : {len(files)}\n", tag="system")
                 if files and isinstance(files[0], dict):
@@ -192,13 +217,23 @@ class ChatPanel:
                 def progress_callback(p):
                     # Appel thread-safe
                     self.set_progress(p)
+                # Un seul exemplaire par groupe de doublons est envoyé à l'IA
+                from organizer.duplicates import find_duplicates, expand_duplicates
+                representatives, duplicate_groups = find_duplicates(files)
+                if duplicate_groups:
+                    n_dup = len(files) - len(representatives)
+                    self.add_message(f"[DEBUG] {n_dup} doublon(s) détecté(s), classés comme leur original\n", tag="system")
+                # Les classements s'affichent au fil des réponses, avant le regroupement final
+                self.add_message("\nClassements reçus :\n", tag="system")
+                self.set_tag("file", foreground="#e0e0e0", font=(get_monospace_font(), 10))
                 suggestions = gemini.suggest_schema(
-                    files,
-                    batch_size=batch_size,
+                    representatives,
                     existing_themes=existing_themes,
                     existing_subthemes=existing_subthemes,
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    on_entry=self.render_entry
                 )
+                expand_duplicates(suggestions, duplicate_groups)
                 # On refait le prompt pour affichage dans le chat (optionnel)
                 # Si tu veux absolument capturer le prompt, il faut le retourner explicitement par suggest_schema
                 prompt_debug = "[Prompt non capturé, voir console pour debug]"
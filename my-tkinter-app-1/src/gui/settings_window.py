@@ -183,6 +183,9 @@ class SettingsWindow:
         with open('.env', 'w') as env_file:
             env_file.write(f"GEMINI_API_KEY={self.settings['GEMINI_API_KEY']}\n")
             env_file.write(f"MISTRAL_API_KEY={self.settings['MISTRAL_API_KEY']}\n")
+        # Le client d'IA partagé lit ses clés une seule fois : il est reconstruit avec les nouvelles
+        from api.gemini import reset_client
+        reset_client()
 
         self.save_callback(self.settings)
         self.settings_window.destroy()
@@ -0,0 +1,154 @@
+import os
+import shutil
+import hashlib
+
+PARTIAL_SIZE = 64 * 1024
+DUPLICATES_DIR = 'Doublons'
+
+
+def _hash_file(path, partial):
+    """Empreinte blake2b : début + fin du fichier si `partial`, sinon contenu complet."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if partial:
+            h.update(f.read(PARTIAL_SIZE))
+            size = os.fstat(f.fileno()).st_size
+            if size > 2 * PARTIAL_SIZE:
+                f.seek(-PARTIAL_SIZE, os.SEEK_END)
+            h.update(f.read(PARTIAL_SIZE))
+        else:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    return h.digest()
+
+
+class DuplicateFilter:
+    """
+    Détection des doublons au fil du scan, par étapes de coût croissant :
+    1. regroupement par taille (aucune lecture) ;
+    2. empreinte partielle (début + fin) seulement quand deux fichiers ont la même taille ;
+    3. empreinte complète seulement si les empreintes partielles coïncident et que le
+       fichier dépasse ce qu'elles couvrent.
+    `filter(files)` ne rend que les représentants ; les doublons sont rangés dans `groups`
+    ({chemin du représentant: {'representative': f, 'duplicates': [f, ...]}}).
+    Les fichiers vides sont ignorés.
+    """
+
+    def __init__(self):
+        self.groups = {}
+        self._first_by_size = {}   # taille -> premier fichier vu, pas encore haché
+        self._by_partial = {}      # (taille, empreinte partielle) -> [représentants]
+        self._full = {}            # chemin -> empreinte complète
+        self.hashed_partial = 0
+        self.hashed_full = 0
+
+    def _partial_key(self, f):
+        self.hashed_partial += 1
+        return (f['size'], _hash_file(f['path'], partial=True))
+
+    def _full_hash(self, f):
+        if f['path'] not in self._full:
+            self.hashed_full += 1
+            self._full[f['path']] = _hash_file(f['path'], partial=False)
+        return self._full[f['path']]
+
+    def find_representative(self, f):
+        """Représentant dont `f` est un doublon, ou None (f devient alors lui-même représentant)."""
+        size = f.get('size', 0)
+        if not size:
+            return None
+        if size not in self._first_by_size:
+            # Seul fichier de cette taille pour l'instant : aucune lecture
+            self._first_by_size[size] = f
+            return None
+        first = self._first_by_size[size]
+        if first is not None:
+            # Deuxième fichier de cette taille : on hache enfin le premier
+            try:
+                first_key = self._partial_key(first)
+            except OSError:
+                # Premier fichier illisible : `f` le remplace, sans lecture
+                self._first_by_size[size] = f
+                return None
+            self._by_partial.setdefault(first_key, []).append(first)
+            self._first_by_size[size] = None
+        try:
+            key = self._partial_key(f)
+            candidates = self._by_partial.setdefault(key, [])
+            for candidate in candidates:
+                # L'empreinte partielle couvre tout le fichier s'il est petit
+                if size <= 2 * PARTIAL_SIZE or self._full_hash(candidate) == self._full_hash(f):
+                    return candidate
+            candidates.append(f)
+        except OSError:
+            pass
+        return None
+
+    def filter(self, files):
+        for f in files:
+            representative = self.find_representative(f)
+            if representative is None:
+                yield f
+                continue
+            group = self.groups.setdefault(representative['path'], {'representative': representative, 'duplicates': []})
+            group['duplicates'].append(f)
+
+
+def find_duplicates(files):
+    """Retourne (représentants, groupes de doublons) pour une liste de fichiers scannés."""
+    dup_filter = DuplicateFilter()
+    representatives = list(dup_filter.filter(files))
+    return representatives, dup_filter.groups
+
+
+def expand_duplicates(suggestions, groups):
+    """Propage la suggestion (thème / sous-thème) de chaque représentant à ses doublons."""
+    for group in groups.values():
+        suggestion = suggestions.get(group['representative']['name'])
+        if suggestion is None:
+            continue
+        for dup in group['duplicates']:
+            suggestions.setdefault(dup['name'], suggestion)
+    return suggestions
+
+
+def report_duplicates(groups):
+    """Résumé lisible des doublons et de l'espace récupérable."""
+    if not groups:
+        return "Aucun doublon détecté."
+    lines = []
+    wasted = 0
+    for group in groups.values():
+        rep = group['representative']
+        lines.append(f"{rep['path']}")
+        for dup in group['duplicates']:
+            lines.append(f"  = {dup['path']}")
+            wasted += dup.get('size', 0)
+    count = sum(len(g['duplicates']) for g in groups.values())
+    lines.append(f"{count} doublon(s) dans {len(groups)} groupe(s), {wasted / 1e6:.1f} Mo récupérables.")
+    return '\n'.join(lines)
+
+
+def move_duplicates(groups):
+    """
+    Déduplication optionnelle : déplace les doublons dans un dossier 'Doublons' à côté de
+    leur représentant (rien n'est supprimé). Retourne les chemins déplacés.
+    """
+    moved = []
+    for group in groups.values():
+        dest_dir = os.path.join(os.path.dirname(group['representative']['path']), DUPLICATES_DIR)
+        for dup in group['duplicates']:
+            src = dup['path']
+            if not os.path.exists(src):
+                continue
+            os.makedirs(dest_dir, exist_ok=True)
+            dest = os.path.join(dest_dir, os.path.basename(src))
+            if os.path.exists(dest):
+                print(f"Doublon non déplacé, {dest} existe déjà")
+                continue
+            try:
+                shutil.move(src, dest)
+                moved.append(src)
+            except Exception as e:
+                print(f"Erreur lors du déplacement du doublon {src} : {e}")
+    return moved
@@ -0,0 +1,185 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+try:
+    import docx
+except ImportError:
+    docx = None
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+S_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def docx_excerpt(filepath, max_chars=300):
+    """
+    Extrait les `max_chars` premiers caractères d'un .docx sans charger tout le document :
+    word/document.xml est lu en flux (iterparse) et la lecture s'arrête dès que le budget
+    est atteint. python-docx n'est utilisé qu'en repli, pour les fichiers mal formés.
+    """
+    try:
+        return _docx_stream_excerpt(filepath, max_chars)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        if not docx:
+            return ''
+        doc = docx.Document(filepath)
+        text = '\n'.join([p.text for p in doc.paragraphs])
+        return text[:max_chars]
+
+
+def _docx_stream_excerpt(filepath, max_chars):
+    paragraphs = []
+    current = []
+    length = 0  # caractères déjà collectés, séparateurs de paragraphes compris
+    with zipfile.ZipFile(filepath) as zf, zf.open('word/document.xml') as xml_file:
+        for event, elem in ET.iterparse(xml_file, events=('end',)):
+            tag = elem.tag
+            if tag == W_NS + 't':
+                if elem.text:
+                    current.append(elem.text)
+                    length += len(elem.text)
+            elif tag == W_NS + 'tab':
+                current.append('\t')
+                length += 1
+            elif tag in (W_NS + 'br', W_NS + 'cr'):
+                current.append('\n')
+                length += 1
+            elif tag == W_NS + 'p':
+                paragraphs.append(''.join(current))
+                current = []
+                length += 1
+                # Libère le sous-arbre du paragraphe déjà traité
+                elem.clear()
+            if length >= max_chars:
+                break
+    if current:
+        paragraphs.append(''.join(current))
+    return '\n'.join(paragraphs)[:max_chars]
+
+
+def xlsx_excerpt(filepath, max_chars=300):
+    """
+    Extrait les `max_chars` premiers caractères de la feuille active d'un classeur :
+    les cellules sont lues en flux depuis le XML de la feuille avec un compteur de
+    caractères courant, et la lecture s'arrête dès que le budget est atteint (le coût ne
+    dépend donc pas de la taille du classeur). openpyxl n'est utilisé qu'en repli et le
+    classeur est toujours refermé.
+    Format identique à l'historique : cellules d'une ligne jointes par ' | ', lignes par ' '.
+    """
+    try:
+        return _xlsx_stream_excerpt(filepath, max_chars)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        if not openpyxl:
+            return ''
+        return _xlsx_openpyxl_excerpt(filepath, max_chars)
+
+
+def _xlsx_openpyxl_excerpt(filepath, max_chars):
+    wb = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        ws = wb.active
+        content = []
+        length = 0
+        for row in ws.iter_rows(values_only=True):
+            row_text = ' | '.join([str(cell) for cell in row if cell is not None])
+            length += len(row_text) + (1 if content else 0)
+            content.append(row_text)
+            if length > max_chars:
+                break
+        return ' '.join(content)[:max_chars]
+    finally:
+        wb.close()
+
+
+def _active_sheet_path(zf):
+    """Chemin dans l'archive de la feuille active (xl/workbook.xml + ses relations)."""
+    try:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        view = workbook.find(f'{S_NS}bookViews/{S_NS}workbookView')
+        active = int(view.get('activeTab', 0)) if view is not None else 0
+        sheets = workbook.findall(f'{S_NS}sheets/{S_NS}sheet')
+        rel_id = sheets[min(active, len(sheets) - 1)].get(f'{R_NS}id')
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        for rel in rels.iter(f'{REL_NS}Relationship'):
+            if rel.get('Id') == rel_id:
+                target = rel.get('Target')
+                return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    except (KeyError, IndexError, ValueError, ET.ParseError):
+        pass
+    return 'xl/worksheets/sheet1.xml'
+
+
+def _xlsx_stream_excerpt(filepath, max_chars):
+    rows = []          # lignes : listes de valeurs (str) ou d'index de chaînes partagées (int)
+    row = []
+    known_chars = 0    # borne basse de la longueur du texte déjà collecté
+    with zipfile.ZipFile(filepath) as zf:
+        with zf.open(_active_sheet_path(zf)) as sheet:
+            for event, elem in ET.iterparse(sheet, events=('end',)):
+                tag = elem.tag
+                if tag == S_NS + 'c':
+                    value = _cell_value(elem)
+                    elem.clear()
+                    if value is not None:
+                        # Une chaîne partagée compte pour au moins un caractère, plus le séparateur
+                        known_chars += (1 if isinstance(value, int) else len(value)) + (3 if row else 0)
+                        row.append(value)
+                        if known_chars > max_chars:
+                            break
+                elif tag == S_NS + 'row':
+                    known_chars += 1 if rows else 0
+                    rows.append(row)
+                    row = []
+                    elem.clear()
+                    if known_chars > max_chars:
+                        break
+        if row:
+            rows.append(row)
+        shared = _shared_strings(zf, {v for r in rows for v in r if isinstance(v, int)})
+    text = ' '.join(' | '.join(shared.get(v, '') if isinstance(v, int) else v for v in r) for r in rows)
+    return text[:max_chars]
+
+
+def _cell_value(cell):
+    """Valeur texte d'une cellule <c>, index (int) pour une chaîne partagée, None si vide."""
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(S_NS + 't'))
+    v = cell.find(S_NS + 'v')
+    if v is None or v.text is None:
+        return None
+    if cell_type == 's':
+        return int(v.text)
+    if cell_type == 'b':
+        return 'True' if v.text == '1' else 'False'
+    return v.text
+
+
+def _shared_strings(zf, needed):
+    """Lit xl/sharedStrings.xml en flux jusqu'au plus grand index nécessaire seulement."""
+    if not needed:
+        return {}
+    last = max(needed)
+    strings = {}
+    index = 0
+    try:
+        with zf.open('xl/sharedStrings.xml') as sst:
+            for event, elem in ET.iterparse(sst, events=('end',)):
+                if elem.tag != S_NS + 'si':
+                    continue
+                if index in needed:
+                    # Texte simple (<t>) ou riche (<r><t>), sans les annotations phonétiques (<rPh>)
+                    parts = elem.findall(S_NS + 't') or elem.findall(f'{S_NS}r/{S_NS}t')
+                    strings[index] = ''.join(t.text or '' for t in parts)
+                elem.clear()
+                if index >= last:
+                    break
+                index += 1
+    except KeyError:
+        pass
+    return strings
@@ -0,0 +1,88 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class ExtractionPool:
+    """
+    Pool d'extraction des extraits de fichiers (threads ou processus).
+    - mode : 'thread' (défaut) ou 'process' (utile pour python-docx / openpyxl, liés au CPU)
+    - workers : nombre de workers (défaut : nombre de cœurs)
+    - timeout : délai maximum par fichier en secondes ; au-delà, l'extrait est vide
+    Les résultats sont toujours rendus dans l'ordre des entrées.
+    """
+
+    def __init__(self, workers=None, mode='thread', timeout=10.0):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Mode d'extraction inconnu : {mode}")
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.mode = mode
+        self.timeout = timeout
+        self.timeouts = 0
+        self.errors = 0
+        self._executor = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Construit un pool à partir de la section 'extraction' des paramètres."""
+        conf = (settings or {}).get('extraction', {})
+        return cls(
+            workers=conf.get('workers'),
+            mode=conf.get('mode', 'thread'),
+            timeout=conf.get('timeout', 10.0)
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='extract')
+        return self._executor
+
+    def submit(self, func, item):
+        return self._get_executor().submit(func, item)
+
+    def result(self, future, default='', timeout=None):
+        """
+        Attend le résultat d'une tâche au plus `timeout` secondes (par défaut celui du pool,
+        sans jamais le dépasser) ; `default` en cas d'échec ou de dépassement.
+        """
+        if timeout is None or (self.timeout is not None and timeout > self.timeout):
+            timeout = self.timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self.timeouts += 1
+        except Exception:
+            self.errors += 1
+        return default
+
+    def imap(self, func, items, default=''):
+        """
+        Applique `func` à chaque élément de `items` et rend les résultats dans l'ordre.
+        Le nombre de tâches en vol est borné pour garder une mémoire constante.
+        """
+        window = self.workers * 2
+        pending = deque()
+        for item in items:
+            pending.append(self.submit(func, item))
+            if len(pending) >= window:
+                yield self.result(pending.popleft(), default)
+        while pending:
+            yield self.result(pending.popleft(), default)
+
+    def map(self, func, items, default=''):
+        return list(self.imap(func, items, default))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,121 @@
+import os
+
+from organizer.excerpt_readers import docx_excerpt, xlsx_excerpt
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+# PIL n'ouvre les photos HEIC (iPhone) qu'avec le greffon pillow-heif
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_EXTS = ('.heic', '.heif')
+except ImportError:
+    HEIF_EXTS = ()
+
+# Registre des extracteurs : extension -> Extractor
+EXTRACTORS = {}
+
+
+class Extractor:
+    """
+    Extracteur d'extrait pour un ou plusieurs formats.
+    - func(filepath, max_chars, max_bytes) -> str : stratégie « en-tête seulement »
+    - max_bytes : budget d'octets ; l'extracteur ne lit pas au-delà (ou ignore les fichiers plus gros
+      quand le format ne se lit pas partiellement)
+    - timeout : temps maximum accordé par fichier dans le pool d'extraction (secondes)
+    """
+
+    def __init__(self, name, exts, func, max_bytes, timeout):
+        self.name = name
+        self.exts = exts
+        self.func = func
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+    def __call__(self, filepath, max_chars=300):
+        return self.func(filepath, max_chars, self.max_bytes)
+
+
+def register_extractor(*exts, max_bytes=64 * 1024, timeout=5.0):
+    """Décorateur : enregistre `func` comme extracteur pour les extensions `exts` ('.pdf', ...)."""
+    def decorator(func):
+        extractor = Extractor(func.__name__, exts, func, max_bytes, timeout)
+        for ext in exts:
+            EXTRACTORS[ext.lower()] = extractor
+        return func
+    return decorator
+
+
+def get_extractor(filepath):
+    """Extracteur enregistré pour l'extension de `filepath`, ou None."""
+    return EXTRACTORS.get(os.path.splitext(filepath)[1].lower())
+
+
+def extract_excerpt(filepath, max_chars=300):
+    """Extrait textuel de `filepath` via le registre ; chaîne vide si format inconnu ou illisible."""
+    extractor = get_extractor(filepath)
+    if extractor is None:
+        return ''
+    try:
+        return extractor(filepath, max_chars) or ''
+    except Exception:
+        return ''
+
+
+@register_extractor('.txt', '.csv', '.md', max_bytes=16 * 1024, timeout=2.0)
+def text_excerpt(filepath, max_chars, max_bytes):
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read(min(max_chars, max_bytes))
+
+
+@register_extractor('.docx', max_bytes=None, timeout=10.0)
+def docx_extractor(filepath, max_chars, max_bytes):
+    return docx_excerpt(filepath, max_chars)
+
+
+@register_extractor('.xlsx', '.xls', max_bytes=None, timeout=10.0)
+def xlsx_extractor(filepath, max_chars, max_bytes):
+    return xlsx_excerpt(filepath, max_chars)
+
+
+@register_extractor('.pdf', max_bytes=50 * 1024 * 1024, timeout=10.0)
+def pdf_excerpt(filepath, max_chars, max_bytes):
+    """Texte de la première page uniquement ; les PDF au-delà du budget ne sont pas ouverts."""
+    if PdfReader is None or os.path.getsize(filepath) > max_bytes:
+        return ''
+    reader = PdfReader(filepath)
+    if not reader.pages:
+        return ''
+    text = reader.pages[0].extract_text() or ''
+    return ' '.join(text.split())[:max_chars]
+
+
+EXIF_MAKE = 0x010F
+EXIF_MODEL = 0x0110
+EXIF_DATETIME = 0x0132
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+
+
+@register_extractor('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.webp', *HEIF_EXTS, max_bytes=None, timeout=3.0)
+def image_excerpt(filepath, max_chars, max_bytes):
+    """Date de prise de vue, appareil et dimensions lus dans l'en-tête (Image.open est paresseux)."""
+    if Image is None:
+        return ''
+    with Image.open(filepath) as img:
+        parts = []
+        exif = img.getexif()
+        date = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+        if date:
+            parts.append(f"Date : {date}")
+        camera = ' '.join(str(exif.get(tag, '')).strip() for tag in (EXIF_MAKE, EXIF_MODEL)).strip()
+        if camera:
+            parts.append(f"Appareil : {camera}")
+        parts.append(f"{img.width}x{img.height}")
+    return ' | '.join(parts)[:max_chars]
@@ -4,12 +4,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 def move_files(regrouped, all_files):
     """
     Déplace les fichiers selon la structure {theme: {sous_theme: [files]}}.
-    all_files : liste de dicts avec 'name' et 'path'.
+    all_files : liste de dicts avec 'name' et 'path', ou directement un mapping nom -> chemin.
     """
     import shutil
     import os
     # Création d'un mapping nom -> chemin
-    file_map = {f['name']: f['path'] for f in all_files}
+    if isinstance(all_files, dict):
+        file_map = all_files
+    else:
+        file_map = {f['name']: f['path'] for f in all_files}
     for theme, sous_dict in regrouped.items():
         for sous_theme, files_list in sous_dict.items():
             for file_name in files_list:
@@ -29,113 +32,309 @@ def move_files(regrouped, all_files):
 
 import os
 import json
+import stat
+import heapq
+import itertools
+from collections import deque
+from itertools import islice
 from ai.gemini_validator import GeminiValidator
-from datetime import datetime
-
-try:
-    import docx
-except ImportError:
-    docx = None
-try:
-    import openpyxl
-except ImportError:
-    openpyxl = None
+from organizer.scan_index import ScanIndex, INDEX_PATH, excerpt_loader
+from organizer.file_record import FileRecord
+from organizer.extract_pool import ExtractionPool
+from organizer.extractors import extract_excerpt, get_extractor
+from organizer.duplicates import DuplicateFilter, expand_duplicates, report_duplicates, move_duplicates
+from organizer.watcher import FolderWatcher
+from organizer.ignore_rules import IgnoreRules, IGNORE_FILENAME
 
 SCHEMA_PATH = 'src/data/schema.json'
 
 def extract_text_excerpt(filepath, max_chars=300):
-    ext = os.path.splitext(filepath)[1].lower()
-    try:
-        if ext in ['.txt', '.csv']:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read(max_chars)
-        elif ext == '.json':
-            import json
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                try:
-                    data = json.load(f)
-                    text = json.dumps(data, ensure_ascii=False)
-                    return text[:max_chars]
-                except Exception:
-                    f.seek(0)
-                    return f.read(max_chars)
-        elif ext == '.docx' and docx:
-            doc = docx.Document(filepath)
-            text = '\n'.join([p.text for p in doc.paragraphs])
-            return text[:max_chars]
-        elif ext in ['.xlsx', '.xls'] and openpyxl:
-            wb = openpyxl.load_workbook(filepath, read_only=True)
-            ws = wb.active
-            content = []
-            for row in ws.iter_rows(values_only=True):
-                content.append(' | '.join([str(cell) for cell in row if cell is not None]))
-                if len(' '.join(content)) > max_chars:
-                    break
-            return ' '.join(content)[:max_chars]
-    except Exception:
-        return ''
-    return ''
-
-def get_all_files(directory):
-    files = []
-    for root, dirs, filenames in os.walk(directory):
-        # Exclure les dossiers .git
-        dirs[:] = [d for d in dirs if d != '.git']
-        excluded_exts = ['.lnk', '.exe', '.py', '.cpp', '.json']
-        for file in filenames:
-            ext = os.path.splitext(file)[1].lower()
-            if ext in excluded_exts:
+    """Extrait textuel d'un fichier selon le registre des extracteurs (organizer/extractors.py)."""
+    return extract_excerpt(filepath, max_chars)
+
+# Dossiers de premier niveau visités en priorité (fichiers récents, souvent à ranger)
+PRIORITY_DIRS = ('Downloads', 'Téléchargements', 'Desktop', 'Bureau')
+
+
+def _resume_chain(ignore, directory, path):
+    """
+    Chaîne de règles applicable à `path`, dossier laissé en attente par un scan précédent,
+    et sa profondeur ; None s'il n'existe plus ou est désormais ignoré.
+    """
+    root = os.path.join(directory, '')
+    if not path.startswith(root) or not os.path.isdir(path):
+        return None
+    chain = ignore.root_chain
+    current = directory
+    parts = path[len(root):].split(os.sep)
+    for part in parts:
+        chain = ignore.chain_for(current, chain, os.path.isfile(os.path.join(current, IGNORE_FILENAME)))
+        current = os.path.join(current, part)
+        if ignore.is_ignored(current, True, chain):
+            return None
+    return chain, len(parts)
+
+
+def walk_files(directory, ignore=None, stats=None, budget=None, resume=(), unreached=None):
+    """
+    Parcours basé sur os.scandir, par ordre de priorité : dossiers les moins profonds
+    d'abord (Téléchargements / Bureau en tête au premier niveau), puis les plus récemment
+    modifiés ; dans un dossier, les fichiers les plus récents d'abord.
+    Rend des couples (DirEntry, stat) : le type vient de la lecture du dossier et le stat
+    est celui mis en cache par DirEntry, sans appel supplémentaire à os.stat / getctime.
+    Seuls les fichiers ordinaires sont rendus : les liens symboliques ne sont pas suivis.
+    Les dossiers ignorés (`ignore`, IgnoreRules) ne sont jamais ouverts ; les compteurs
+    'pruned_dirs' et 'ignored_files' sont reportés dans `stats`.
+    `budget` (ScanBudget) borne le nombre de fichiers, la profondeur et la durée : les
+    dossiers non atteints sont ajoutés à `unreached` (liste) pour un passage ultérieur, et
+    les dossiers de `resume` (en attente d'un scan précédent) sont visités en premier.
+    """
+    if ignore is None:
+        ignore = IgnoreRules(directory)
+    if stats is None:
+        stats = {}
+    if unreached is None:
+        unreached = []
+    for key in ('pruned_dirs', 'ignored_files', 'depth_skipped'):
+        stats.setdefault(key, 0)
+    # Tas de (rang, priorité de nom, -mtime, n° d'ordre, chemin, profondeur, chaîne de règles)
+    heap = [(0, 0, 0, 0, directory, 0, ignore.root_chain)]
+    order = itertools.count(1)
+    for path in resume:
+        resumed = _resume_chain(ignore, directory, path)
+        if resumed is not None:
+            heap.append((-1, 0, 0, next(order), path, resumed[1], resumed[0]))
+    heapq.heapify(heap)
+    visited = set()
+    exhausted = False
+    while heap and not exhausted:
+        item = heapq.heappop(heap)
+        current, depth, parent_chain = item[4:]
+        if current in visited:
+            continue
+        if budget is not None and budget.exhausted():
+            heapq.heappush(heap, item)
+            break
+        visited.add(current)
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        chain = ignore.chain_for(current, parent_chain, any(e.name == IGNORE_FILENAME for e in entries))
+        files = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if ignore.is_ignored(entry.path, True, chain):
+                        stats['pruned_dirs'] += 1
+                    elif budget is not None and not budget.allows_depth(depth + 1):
+                        stats['depth_skipped'] += 1
+                    else:
+                        boost = 0 if depth == 0 and entry.name in PRIORITY_DIRS else 1
+                        mtime = entry.stat(follow_symlinks=False).st_mtime
+                        heapq.heappush(heap, (depth + 1, boost, -mtime, next(order), entry.path, depth + 1, chain))
+                    continue
+                if entry.name == IGNORE_FILENAME or ignore.is_ignored(entry.path, False, chain):
+                    stats['ignored_files'] += 1
+                    continue
+                # Liens symboliques (vers un dossier ou un fichier), sockets, FIFO : non suivis
+                st = entry.stat(follow_symlinks=False)
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                files.append((entry, st))
+            except OSError:
                 continue
-            path = os.path.join(root, file)
-            if ext in ['.txt', '.csv', '.docx', '.xlsx', '.xls']:
-                excerpt = extract_text_excerpt(path)
+        files.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        for entry, st in files:
+            if budget is not None and not budget.consume():
+                # Dossier entamé : il sera repris en entier (les fichiers déjà vus sont dans l'index)
+                unreached.append(current)
+                exhausted = True
+                break
+            yield entry, st
+    unreached.extend(item[4] for item in heap if item[4] not in visited)
+
+
+def iter_files(directory, index_path=INDEX_PATH, stats=None, pool=None, ignore_patterns=None, budget=None):
+    """
+    Générateur : rend les fichiers de `directory` au fur et à mesure du parcours,
+    sous forme de FileRecord compacts (accès f['name'], f['path'], f['size'], f['mtime'],
+    f['ctime'], f['excerpt']).
+    Les horodatages restent des floats bruts ; ils ne sont formatés (file_date) qu'à la
+    construction des prompts.
+    Les fichiers inchangés depuis le dernier scan (taille, mtime, inode) sont lus depuis
+    l'index persistant ; seuls les fichiers nouveaux ou modifiés sont ré-extraits, en
+    parallèle via `pool` (ExtractionPool), dans l'ordre du parcours.
+    Les règles d'ignorance (défaut + `ignore_patterns` + fichiers .organizerignore) élaguent
+    les sous-arbres entiers pendant le parcours.
+    `budget` (ScanBudget, éventuellement partagé entre plusieurs dossiers) borne le scan ;
+    les dossiers non atteints sont mémorisés dans l'index et visités en premier au scan
+    suivant ('pending_dirs' dans `stats`).
+    `index_path=None` désactive l'index. `stats` (dict) reçoit les compteurs du scan.
+    La mémoire reste bornée : seuls quelques enregistrements sont en attente d'extraction.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('files', 'index_hits', 'extracted', 'purged', 'timeouts', 'pending_dirs'):
+        stats.setdefault(key, 0)
+    if budget is not None:
+        budget.start()
+    own_pool = pool is None
+    if own_pool:
+        pool = ExtractionPool()
+    index = ScanIndex(index_path) if index_path else None
+    scan_id = index.new_scan_id() if index else 0
+    # Les extraits des fichiers inchangés restent dans l'index et sont relus à la demande
+    loader = excerpt_loader(index_path) if index else None
+    # File d'attente ordonnée : (record, future d'extraction ou None, mtime_ns, inode, timeout)
+    pending = deque()
+    max_futures = pool.workers * 4
+    max_pending = max_futures * 64
+    in_flight = 0
+    resume = index.pending(directory) if index else []
+    unreached = []
+
+    def finish(item):
+        record, future, mtime_ns, inode, timeout = item
+        if future is not None:
+            timeouts_before = pool.timeouts
+            excerpt = pool.result(future, default=None, timeout=timeout)
+            stats['timeouts'] += pool.timeouts - timeouts_before
+            if excerpt is None:
+                # Délai dépassé ou échec : rien dans l'index, le fichier sera ré-extrait au prochain scan
+                record['excerpt'] = ''
+                return record
+            record['excerpt'] = excerpt
+            stats['extracted'] += 1
+            if index:
+                index.store(record['path'], record['size'], mtime_ns, inode, record['ctime'], excerpt, scan_id)
+        return record
+
+    try:
+        walker = walk_files(directory, IgnoreRules(directory, ignore_patterns), stats,
+                            budget=budget, resume=resume, unreached=unreached)
+        for entry, st in walker:
+            file = entry.name
+            path = entry.path
+            # Sous Windows, le stat mis en cache par DirEntry ne contient pas l'inode
+            inode = st.st_ino or entry.inode()
+            cached = index.lookup(path, st.st_size, st.st_mtime_ns, inode, with_excerpt=False) if index else None
+            future = None
+            timeout = None
+            if cached is not None:
+                record = FileRecord(os.path.dirname(path), file, st.st_size, st.st_mtime, cached[0], loader=loader)
+                index.touch(path, scan_id)
+                stats['index_hits'] += 1
             else:
-                excerpt = ''
-            try:
-                ctime = os.path.getctime(path)
-                date_str = datetime.fromtimestamp(ctime).strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                date_str = ''
-            files.append({
-                'name': file,
-                'path': path,
-                'date': date_str,
-                'excerpt': excerpt
-            })
-    return files
+                record = FileRecord(os.path.dirname(path), file, st.st_size, st.st_mtime, st.st_ctime, excerpt='')
+                extractor = get_extractor(path)
+                if extractor is not None:
+                    future = pool.submit(extract_excerpt, path)
+                    timeout = extractor.timeout
+                    in_flight += 1
+                elif index:
+                    index.store(path, st.st_size, st.st_mtime_ns, inode, st.st_ctime, '', scan_id)
+            pending.append((record, future, st.st_mtime_ns, inode, timeout))
+            stats['files'] += 1
+            if index:
+                index.commit_if_due()
+
+            # Rend tout ce qui est prêt en tête de file ; bloque si trop de travail est en attente
+            while pending and (pending[0][1] is None or pending[0][1].done()
+                               or in_flight >= max_futures or len(pending) >= max_pending):
+                item = pending.popleft()
+                if item[1] is not None:
+                    in_flight -= 1
+                yield finish(item)
+        while pending:
+            yield finish(pending.popleft())
+
+        unreached = list(dict.fromkeys(unreached))
+        stats['pending_dirs'] = len(unreached)
+        if index:
+            index.save_pending(directory, unreached)
+            # Purge seulement après un parcours complet : le reste de l'arbre n'a pas été vu
+            if not unreached and not stats['depth_skipped'] and os.path.isdir(directory):
+                stats['purged'] += index.purge_missing(directory, scan_id)
+    finally:
+        if index:
+            index.close()
+        if own_pool:
+            pool.shutdown()
+
+
+def iter_file_batches(directory, n, **kwargs):
+    """Générateur : rend les fichiers de `directory` par lots de `n` dès qu'ils sont découverts."""
+    files = iter_files(directory, **kwargs)
+    while True:
+        batch = list(islice(files, n))
+        if not batch:
+            return
+        yield batch
+
+
+def get_all_files(directory, index_path=INDEX_PATH, stats=None, pool=None, ignore_patterns=None, budget=None):
+    """Liste complète des fichiers de `directory` (voir iter_files)."""
+    return list(iter_files(directory, index_path=index_path, stats=stats, pool=pool,
+                           ignore_patterns=ignore_patterns, budget=budget))
 
 
 
 def get_default_user_dirs():
-    """Retourne les chemins Documents, Téléchargements et Bureau de l'utilisateur Windows."""
+    """
+    Retourne les chemins Téléchargements, Bureau et Documents de l'utilisateur Windows,
+    dans cet ordre : avec un budget de scan, les dossiers les plus susceptibles d'être à
+    ranger passent en premier.
+    """
     from pathlib import Path
     import os
     home = Path.home()
     docs = os.path.join(home, 'Documents')
     downloads = os.path.join(home, 'Downloads')
     desktop = os.path.join(home, 'Desktop')
-    return [d for d in [docs, downloads, desktop] if os.path.isdir(d)]
+    return [d for d in [downloads, desktop, docs] if os.path.isdir(d)]
 
-def organize_files(directory=None):
+def organize_files(directory=None, dedupe=False, budget=None):
+    """
+    Scanne, classe et déplace les fichiers. Seul un représentant par groupe de doublons
+    est envoyé à l'IA ; son thème est propagé aux copies. Avec `dedupe=True`, les copies
+    sont en plus mises de côté dans un dossier 'Doublons'.
+    `budget` (ScanBudget) borne le scan ; le reste sera traité lors d'un prochain appel.
+    """
     dirs_to_scan = [directory] if directory else get_default_user_dirs()
-    all_files = []
-    for d in dirs_to_scan:
-        all_files.extend(get_all_files(d))
+    # Seul le mapping nom -> chemin est conservé : les fichiers sont consommés au fil du scan
+    file_map = {}
+    duplicates = DuplicateFilter()
+
+    def scanned_files():
+        for d in dirs_to_scan:
+            for f in iter_files(d, budget=budget):
+                file_map[f['name']] = f['path']
+                yield f
 
     # Charger ou générer le schéma d'organisation par sujets
     if not os.path.exists(SCHEMA_PATH):
         gemini = GeminiValidator()
-        organization_schema = gemini.suggest_schema(all_files)
+        organization_schema = gemini.suggest_schema(duplicates.filter(scanned_files()))
         with open(SCHEMA_PATH, 'w', encoding='utf-8') as schema_file:
             json.dump(organization_schema, schema_file, indent=2, ensure_ascii=False)
     else:
         with open(SCHEMA_PATH, 'r', encoding='utf-8') as schema_file:
             organization_schema = json.load(schema_file)
+        for _ in duplicates.filter(scanned_files()):
+            pass
+
+    print(report_duplicates(duplicates.groups))
+    expand_duplicates(organization_schema, duplicates.groups)
+    if dedupe:
+        for path in move_duplicates(duplicates.groups):
+            if file_map.get(os.path.basename(path)) == path:
+                del file_map[os.path.basename(path)]
 
     print("Test de move_files avec l'organisation détectée...")
     regrouped = {}
-    for file in all_files:
-        filename = file['name']
+    for filename in file_map:
         subject = organization_schema.get(filename)
         if subject and isinstance(subject, dict):
             theme = subject.get('theme', 'Divers')
@@ -146,11 +345,42 @@ def organize_files(directory=None):
                 regrouped[theme][sous_theme] = []
             regrouped[theme][sous_theme].append(filename)
     print("Organisation regroupée :", json.dumps(regrouped, indent=2, ensure_ascii=False))
-    move_files(regrouped, all_files)
+    move_files(regrouped, file_map)
     print("Déplacement terminé.")
 
 
+def watch_files(directories=None, debounce=5.0, on_suggestions=None, ignore_patterns=None):
+    """
+    Mode surveillance continue : seuls les fichiers qui arrivent dans `directories` sont
+    classés, par lots regroupés sur une fenêtre de `debounce` secondes.
+    `on_suggestions(suggestions, records)` reçoit le résultat de chaque lot.
+    Retourne le FolderWatcher démarré (à arrêter avec .stop()).
+    """
+    dirs_to_watch = directories or get_default_user_dirs()
+    gemini = GeminiValidator()
+
+    def on_batch(records):
+        print(f"[DEBUG] {len(records)} nouveau(x) fichier(s) détecté(s), envoi à l'IA")
+        suggestions = gemini.suggest_schema(records)
+        if on_suggestions:
+            on_suggestions(suggestions, records)
+        else:
+            print("Suggestions :", json.dumps(suggestions, indent=2, ensure_ascii=False))
+
+    return FolderWatcher(dirs_to_watch, on_batch, debounce=debounce, ignore_patterns=ignore_patterns).start()
+
+
 def main():
+    if '--watch' in sys.argv:
+        import time
+        watcher = watch_files()
+        print("Surveillance en cours (Ctrl+C pour arrêter)...")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            watcher.stop()
+        return
     organize_files()
 
 if __name__ == "__main__":
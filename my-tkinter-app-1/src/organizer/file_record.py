@@ -0,0 +1,101 @@
+import os
+import sys
+from datetime import datetime
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(timestamp):
+    """Formate un horodatage brut (float) ; chaîne vide si absent ou invalide."""
+    if timestamp is None:
+        return ''
+    try:
+        return datetime.fromtimestamp(timestamp).strftime(DATE_FORMAT)
+    except (OverflowError, OSError, ValueError):
+        return ''
+
+
+def file_date(file_info):
+    """Date de création lisible d'un fichier scanné, calculée seulement à la construction des prompts."""
+    if 'date' in file_info:
+        return file_info['date']
+    return format_timestamp(file_info.get('ctime'))
+
+
+class FileRecord:
+    """
+    Enregistrement compact d'un fichier scanné (__slots__, sans dict par instance).
+    - le dossier est une chaîne internée partagée par tous les fichiers du même dossier ;
+      le chemin complet n'est reconstruit qu'à la demande ;
+    - l'extrait peut rester dans l'index de scan et n'être relu qu'au premier accès
+      (`loader`, voir scan_index.ExcerptLoader).
+    Reste compatible avec l'accès par clés des anciens dicts : f['name'], f['path'],
+    f['size'], f['mtime'], f['ctime'], f['excerpt'], f['date'], f.get(...).
+    """
+
+    __slots__ = ('dir', 'name', 'size', 'mtime', 'ctime', '_excerpt', '_loader')
+
+    KEYS = ('name', 'path', 'size', 'mtime', 'ctime', 'excerpt')
+
+    def __init__(self, directory, name, size=0, mtime=None, ctime=None, excerpt=None, loader=None):
+        self.dir = sys.intern(directory)
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.ctime = ctime
+        self._excerpt = excerpt
+        self._loader = loader
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        directory, name = os.path.split(path)
+        return cls(directory, name, **kwargs)
+
+    @property
+    def path(self):
+        return os.path.join(self.dir, self.name)
+
+    @property
+    def excerpt(self):
+        if self._excerpt is not None:
+            return self._excerpt
+        if self._loader is not None:
+            return self._loader.excerpt(self.path)
+        return ''
+
+    @excerpt.setter
+    def excerpt(self, value):
+        self._excerpt = value
+        self._loader = None
+
+    @property
+    def date(self):
+        return format_timestamp(self.ctime)
+
+    def __getitem__(self, key):
+        if key in self.KEYS or key == 'date':
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.KEYS or key == 'path':
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in self.KEYS}
+
+    def __repr__(self):
+        return f"FileRecord({self.path!r}, size={self.size})"
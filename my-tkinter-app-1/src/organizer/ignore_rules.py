@@ -0,0 +1,161 @@
+import os
+import re
+
+IGNORE_FILENAME = '.organizerignore'
+
+# Règles par défaut : dossiers lourds qui n'ont rien à classer et extensions historiquement exclues
+DEFAULT_IGNORE_PATTERNS = [
+    '.git/',
+    '.svn/',
+    '.hg/',
+    'node_modules/',
+    '.venv/',
+    'venv/',
+    '__pycache__/',
+    '.cache/',
+    '.tox/',
+    '**/Arduino/libraries/',
+    '*.lnk',
+    '*.exe',
+    '*.py',
+    '*.cpp',
+    '*.json',
+]
+
+
+def _glob_to_regex(glob):
+    """Traduit un motif de type gitignore (sans '!' ni '/' final) en expression régulière."""
+    i, n = 0, len(glob)
+    out = []
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if glob.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = glob.find(']', i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreMatcher:
+    """
+    Ensemble de motifs gitignore compilé une seule fois en deux expressions régulières
+    (dossiers / fichiers). Les règles sont essayées de la dernière à la première dans une
+    unique alternance : la première qui correspond décide, comme « la dernière règle gagne »
+    de gitignore, et un motif '!...' ré-inclut le chemin.
+    """
+
+    def __init__(self, patterns):
+        dir_rules = []
+        file_rules = []
+        for number, raw in enumerate(patterns):
+            line = raw.rstrip('\n').rstrip('\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip() if not line.endswith('\\ ') else line
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.strip('/') if dir_only else line
+            anchored = '/' in line.lstrip('/') or line.startswith('/')
+            regex = _glob_to_regex(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            group = f"{'n' if negate else 'i'}{number}"
+            rule = f"(?P<{group}>{regex})"
+            dir_rules.append(rule)
+            if not dir_only:
+                file_rules.append(rule)
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        self._dir_re = re.compile('|'.join(reversed(dir_rules)), flags) if dir_rules else None
+        self._file_re = re.compile('|'.join(reversed(file_rules)), flags) if file_rules else None
+
+    def match(self, rel_path, is_dir):
+        """True : ignoré ; False : ré-inclus par un '!' ; None : aucune règle ne s'applique."""
+        regex = self._dir_re if is_dir else self._file_re
+        if regex is None:
+            return None
+        m = regex.fullmatch(rel_path)
+        if m is None:
+            return None
+        return m.lastgroup[0] == 'i'
+
+
+class IgnoreRules:
+    """
+    Règles d'ignorance d'un parcours : motifs globaux (défaut + paramètres) ancrés à la
+    racine scannée, puis fichiers .organizerignore rencontrés en chemin, chacun ancré à son
+    dossier. Le fichier le plus profond l'emporte, comme pour .gitignore.
+    """
+
+    def __init__(self, root, patterns=None, use_defaults=True):
+        self.root = root
+        base = list(DEFAULT_IGNORE_PATTERNS) if use_defaults else []
+        # Chaîne de (préfixe du dossier de base, matcher), de la racine vers la profondeur
+        self.root_chain = ((os.path.join(root, ''), IgnoreMatcher(base + list(patterns or []))),)
+
+    @classmethod
+    def from_settings(cls, root, settings):
+        return cls(root, (settings or {}).get('ignore_patterns', []))
+
+    def chain_for(self, directory, parent_chain, has_ignore_file):
+        """Chaîne de matchers applicable aux entrées de `directory` (ajoute son .organizerignore)."""
+        if not has_ignore_file:
+            return parent_chain
+        try:
+            with open(os.path.join(directory, IGNORE_FILENAME), 'r', encoding='utf-8', errors='ignore') as f:
+                matcher = IgnoreMatcher(f.readlines())
+        except OSError:
+            return parent_chain
+        return parent_chain + ((os.path.join(directory, ''), matcher),)
+
+    def is_ignored(self, path, is_dir, chain=None):
+        for prefix, matcher in reversed(chain or self.root_chain):
+            if not path.startswith(prefix):
+                continue
+            rel = path[len(prefix):]
+            if os.sep != '/':
+                rel = rel.replace(os.sep, '/')
+            decision = matcher.match(rel, is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def is_path_ignored(self, path, is_dir=False):
+        """Comme is_ignored, en vérifiant aussi chaque dossier parent jusqu'à la racine (mode surveillance)."""
+        prefix = self.root_chain[0][0]
+        if not path.startswith(prefix):
+            return False
+        parts = path[len(prefix):].split(os.sep)
+        current = prefix.rstrip(os.sep) or prefix
+        for part in parts[:-1]:
+            current = os.path.join(current, part)
+            if self.is_ignored(current, True):
+                return True
+        return self.is_ignored(path, is_dir)
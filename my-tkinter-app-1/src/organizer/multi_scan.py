@@ -0,0 +1,132 @@
+import os
+import sys
+import queue
+import threading
+
+from organizer.scan_index import INDEX_PATH
+from organizer.extract_pool import ExtractionPool
+from organizer.watcher import filesystem_type, NETWORK_FS_TYPES
+
+# Nombre de lectures simultanées par type de disque : les montages réseau masquent leur
+# latence avec davantage de requêtes en vol, un disque à plateaux ne supporte pas les accès
+# concurrents (déplacements de la tête)
+DEVICE_CONCURRENCY = {'network': 8, 'ssd': 4, 'rotational': 1}
+
+
+def _is_rotational(dev):
+    """Disque à plateaux d'après /sys/dev/block (Linux) ; False si inconnu."""
+    if not sys.platform.startswith('linux'):
+        return False
+    base = f'/sys/dev/block/{os.major(dev)}:{os.minor(dev)}'
+    # Pour une partition, la file d'attente est celle du disque parent
+    for path in (os.path.join(base, 'queue', 'rotational'), os.path.join(base, '..', 'queue', 'rotational')):
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return False
+
+
+def device_kind(path, dev=None):
+    """'network', 'rotational' ou 'ssd' (défaut) pour le disque contenant `path`."""
+    if filesystem_type(path) in NETWORK_FS_TYPES:
+        return 'network'
+    if dev is None:
+        dev = os.stat(path).st_dev
+    return 'rotational' if _is_rotational(dev) else 'ssd'
+
+
+def group_by_device(roots):
+    """{st_dev: [dossiers]} dans l'ordre d'origine ; les dossiers inaccessibles sont ignorés."""
+    groups = {}
+    for root in roots:
+        try:
+            dev = os.stat(root).st_dev
+        except OSError:
+            print(f"[ERREUR] Dossier inaccessible : {root}")
+            continue
+        groups.setdefault(dev, []).append(root)
+    return groups
+
+
+def iter_files_multi(roots, index_path=INDEX_PATH, stats=None, ignore_patterns=None, budget=None,
+                     concurrency=None, extraction=None, on_root_done=None):
+    """
+    Générateur : parcourt plusieurs dossiers racines, un parcours par disque (st_dev) en
+    parallèle, et fusionne les fichiers trouvés en un seul flux de FileRecord.
+    Les dossiers d'un même disque sont parcourus l'un après l'autre ; chaque disque a son
+    propre pool d'extraction dont la taille dépend de son type (`concurrency`, voir
+    DEVICE_CONCURRENCY). `extraction` : section 'extraction' des paramètres (mode, timeout).
+    `stats` reçoit un dict de compteurs par dossier ; `on_root_done(root, stats)` est
+    appelé dans le thread du consommateur quand un dossier est terminé.
+    """
+    from organizer.file_organizer import iter_files
+
+    if stats is None:
+        stats = {}
+    levels = dict(DEVICE_CONCURRENCY)
+    levels.update(concurrency or {})
+    extraction = extraction or {}
+    groups = group_by_device(roots)
+    # File bornée : les parcours attendent si le consommateur (interface) prend du retard
+    results = queue.Queue(maxsize=1024)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def walk_device(dev, device_roots):
+        kind = device_kind(device_roots[0], dev)
+        pool = ExtractionPool(
+            workers=levels.get(kind, 1),
+            mode=extraction.get('mode', 'thread'),
+            timeout=extraction.get('timeout', 10.0)
+        )
+        print(f"[DEBUG] Parcours du disque {dev} ({kind}, {pool.workers} lecture(s) simultanée(s)) : {device_roots}")
+        try:
+            for root in device_roots:
+                root_stats = stats.setdefault(root, {'device': kind})
+                files = iter_files(root, index_path=index_path, stats=root_stats, pool=pool,
+                                   ignore_patterns=ignore_patterns, budget=budget)
+                try:
+                    for record in files:
+                        if not put(('file', record)):
+                            return
+                except Exception as e:
+                    print(f"[ERREUR] Échec du scan de {root} : {e}")
+                finally:
+                    files.close()
+                if not put(('done', root)):
+                    return
+        finally:
+            pool.shutdown()
+            put(('end', dev))
+
+    threads = [
+        threading.Thread(target=walk_device, args=(dev, device_roots), name=f'scan-{dev}', daemon=True)
+        for dev, device_roots in groups.items()
+    ]
+    for thread in threads:
+        thread.start()
+    running = len(threads)
+    try:
+        while running:
+            kind, value = results.get()
+            if kind == 'file':
+                yield value
+            elif kind == 'done':
+                if on_root_done is not None:
+                    on_root_done(value, stats.get(value, {}))
+            else:
+                running -= 1
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
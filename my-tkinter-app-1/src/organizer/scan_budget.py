@@ -0,0 +1,52 @@
+import time
+import threading
+
+
+class ScanBudget:
+    """
+    Budget d'un scan : nombre maximum de fichiers, profondeur maximum et durée maximum
+    (secondes, à partir de start()). Un même budget peut être partagé entre plusieurs
+    dossiers racines, y compris parcourus en parallèle : les fichiers et le temps sont
+    alors comptés globalement.
+    Ce qui n'a pas pu être atteint est reporté à un prochain passage incrémental.
+    """
+
+    def __init__(self, max_files=None, max_depth=None, max_seconds=None):
+        self.max_files = max_files
+        self.max_depth = max_depth
+        self.max_seconds = max_seconds
+        self.files = 0
+        self._deadline = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, **defaults):
+        """Construit un budget à partir de la section 'scan_budget' des paramètres."""
+        conf = dict(defaults)
+        conf.update((settings or {}).get('scan_budget', {}))
+        return cls(
+            max_files=conf.get('max_files'),
+            max_depth=conf.get('max_depth'),
+            max_seconds=conf.get('max_seconds')
+        )
+
+    def start(self):
+        if self._deadline is None and self.max_seconds is not None:
+            self._deadline = time.monotonic() + self.max_seconds
+        return self
+
+    def allows_depth(self, depth):
+        return self.max_depth is None or depth <= self.max_depth
+
+    def consume(self):
+        """Compte un fichier ; False si le budget est épuisé (le fichier ne doit pas être rendu)."""
+        with self._lock:
+            if self.exhausted():
+                return False
+            self.files += 1
+            return True
+
+    def exhausted(self):
+        if self.max_files is not None and self.files >= self.max_files:
+            return True
+        return self._deadline is not None and time.monotonic() >= self._deadline
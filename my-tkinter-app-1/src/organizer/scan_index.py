@@ -0,0 +1,203 @@
+import os
+import time
+import sqlite3
+import threading
+
+INDEX_PATH = 'src/data/scan_index.db'
+
+
+class ScanIndex:
+    """
+    Index persistant (SQLite) des fichiers déjà scannés.
+    Chaque entrée est identifiée par son chemin et validée par (taille, mtime, inode) :
+    si l'un des trois change, le fichier est considéré comme modifié et doit être ré-extrait.
+    Les écritures sont mises en attente en mémoire et appliquées d'un bloc par commit() :
+    aucune transaction d'écriture ne reste ouverte pendant le parcours d'un dossier, si bien
+    que plusieurs scans parallèles (un par disque) ne se bloquent pas mutuellement.
+    Les lectures (lookup) ne voient que les écritures validées.
+    """
+
+    # Au-delà de ce nombre d'écritures en attente, commit_if_due valide sans attendre
+    MAX_BUFFERED = 5000
+
+    def __init__(self, db_path=INDEX_PATH):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Plusieurs scans (un par disque) peuvent écrire en même temps : attente du verrou
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+        self._last_commit = time.monotonic()
+        self._writes = []  # (requête, paramètres) en attente de commit(), dans l'ordre
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " ctime REAL,"
+            " excerpt TEXT,"
+            " scan_id INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending_dirs ("
+            " root TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " PRIMARY KEY (root, path))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS scans (id INTEGER PRIMARY KEY, started REAL)")
+        self._conn.commit()
+
+    def lookup(self, path, size, mtime_ns, inode, with_excerpt=True):
+        """
+        Retourne (ctime, excerpt) si le fichier est inchangé depuis le dernier scan, sinon None.
+        Avec `with_excerpt=False`, l'extrait n'est pas lu (None) : voir ExcerptLoader.
+        """
+        columns = "ctime, excerpt" if with_excerpt else "ctime, NULL"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM files WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                (path, size, mtime_ns, inode)
+            ).fetchone()
+        return row
+
+    def _write(self, *statements):
+        with self._lock:
+            self._writes.extend(statements)
+
+    def store(self, path, size, mtime_ns, inode, ctime, excerpt, scan_id=0):
+        self._write((
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, ctime, excerpt, scan_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, inode, ctime, excerpt, scan_id)
+        ))
+
+    def touch(self, path, scan_id):
+        """Marque une entrée inchangée comme vue lors du scan courant."""
+        self._write(("UPDATE files SET scan_id = ? WHERE path = ?", (scan_id, path)))
+
+    def remove(self, path):
+        """Supprime un fichier de l'index, ou tout un dossier (chemin et descendants)."""
+        prefix = os.path.join(path, '')
+        self._write((
+            "DELETE FROM files WHERE path = ? OR substr(path, 1, ?) = ?",
+            (path, len(prefix), prefix)
+        ))
+
+    def rename(self, old_path, new_path):
+        """Répercute un déplacement (fichier ou dossier) sans ré-extraction."""
+        old_prefix = os.path.join(old_path, '')
+        new_prefix = os.path.join(new_path, '')
+        self._write(
+            ("DELETE FROM files WHERE path = ?", (new_path,)),
+            ("UPDATE files SET path = ? WHERE path = ?", (new_path, old_path)),
+            ("UPDATE OR REPLACE files SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+             (new_prefix, len(old_prefix) + 1, len(old_prefix), old_prefix))
+        )
+
+    def new_scan_id(self):
+        """Numéro de scan unique, y compris entre scans parallèles sur le même index."""
+        with self._lock:
+            self._flush()
+            # BEGIN IMMEDIATE : le verrou d'écriture est pris avant la lecture du maximum
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT MAX(COALESCE((SELECT MAX(id) FROM scans), 0),"
+                    " COALESCE((SELECT MAX(scan_id) FROM files), 0)) + 1"
+                ).fetchone()
+                self._conn.execute("INSERT INTO scans (id, started) VALUES (?, ?)", (row[0], time.time()))
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+        return row[0]
+
+    def purge_missing(self, directory, scan_id):
+        """Supprime les entrées situées sous `directory` qui n'ont pas été vues lors du scan `scan_id`."""
+        prefix = os.path.join(directory, '')
+        with self._lock:
+            self._flush()
+            cur = self._conn.execute(
+                "DELETE FROM files WHERE scan_id != ? AND substr(path, 1, ?) = ?",
+                (scan_id, len(prefix), prefix)
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def save_pending(self, root, paths):
+        """Mémorise les dossiers de `root` qu'un scan à budget limité n'a pas pu visiter."""
+        self._write(
+            ("DELETE FROM pending_dirs WHERE root = ?", (root,)),
+            *(("INSERT OR IGNORE INTO pending_dirs (root, path) VALUES (?, ?)", (root, p)) for p in paths)
+        )
+
+    def pending(self, root):
+        """Dossiers laissés en attente par le dernier scan de `root`, à visiter en priorité."""
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute("SELECT path FROM pending_dirs WHERE root = ?", (root,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _flush(self):
+        """Applique les écritures en attente dans une transaction courte (verrou self._lock tenu)."""
+        writes, self._writes = self._writes, []
+        if writes:
+            try:
+                for sql, params in writes:
+                    self._conn.execute(sql, params)
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+        self._last_commit = time.monotonic()
+
+    def commit(self):
+        with self._lock:
+            self._flush()
+
+    def commit_if_due(self, interval=1.0):
+        """Valide les écritures en attente si la validation précédente date de plus de `interval` secondes."""
+        if time.monotonic() - self._last_commit >= interval or len(self._writes) >= self.MAX_BUFFERED:
+            self.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush()
+            finally:
+                self._conn.close()
+
+
+class ExcerptLoader:
+    """
+    Lecture paresseuse des extraits depuis l'index : les enregistrements de fichiers ne
+    gardent pas leur extrait en mémoire et le relisent ici au besoin. La connexion SQLite
+    est dédiée et ouverte au premier accès.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def excerpt(self, path):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            row = self._conn.execute("SELECT excerpt FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row and row[0] is not None else ''
+
+
+_loaders = {}
+_loaders_lock = threading.Lock()
+
+
+def excerpt_loader(db_path=INDEX_PATH):
+    """ExcerptLoader partagé pour un fichier d'index donné."""
+    key = os.path.abspath(db_path)
+    with _loaders_lock:
+        if key not in _loaders:
+            _loaders[key] = ExcerptLoader(db_path)
+        return _loaders[key]
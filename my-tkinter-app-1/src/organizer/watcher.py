@@ -0,0 +1,378 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+from organizer.scan_index import ScanIndex, INDEX_PATH
+from organizer.extractors import extract_excerpt
+from organizer.file_record import FileRecord
+from organizer.ignore_rules import IgnoreRules
+
+# Constantes inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+# Systèmes de fichiers sur lesquels inotify ne voit pas les modifications distantes
+NETWORK_FS_TYPES = {'fuse.sshfs', 'sshfs', 'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.rclone', '9p'}
+
+
+def filesystem_type(path):
+    """Type du système de fichiers contenant `path` d'après /proc/mounts (Linux), sinon ''."""
+    path = os.path.realpath(path)
+    best, fstype = '', ''
+    try:
+        with open('/proc/mounts', 'r', encoding='utf-8') as mounts:
+            for line in mounts:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point = parts[1].replace('\\040', ' ')
+                if (path == mount_point or path.startswith(os.path.join(mount_point, ''))) and len(mount_point) > len(best):
+                    best, fstype = mount_point, parts[2]
+    except OSError:
+        pass
+    return fstype
+
+
+def needs_polling(path):
+    return not sys.platform.startswith('linux') or filesystem_type(path) in NETWORK_FS_TYPES
+
+
+class InotifySource:
+    """
+    Surveillance récursive d'un dossier par inotify (ctypes, sans dépendance externe).
+    Les dossiers ignorés (`ignore`, IgnoreRules) ne reçoivent pas de surveillance.
+    """
+
+    def __init__(self, root, ignore=None):
+        self.root = root
+        self.ignore = ignore if ignore is not None else IgnoreRules(root)
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 a échoué")
+        self.watches = {}  # wd -> dossier
+        self._new_files = set()  # fichiers créés dont l'écriture n'est pas encore terminée
+        self.add_tree(root, report=False)
+
+    def add_tree(self, directory, report=True):
+        """
+        Ajoute une surveillance sur `directory` et tous ses sous-dossiers. Avec `report`,
+        rend les fichiers déjà présents (créés avant que la surveillance soit posée).
+        """
+        found = []
+        if directory != self.root and self.ignore.is_path_ignored(directory, True):
+            return found
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            wd = self._add_watch(self.fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "Limite fs.inotify.max_user_watches atteinte")
+                continue
+            self.watches[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.ignore.is_path_ignored(entry.path, True):
+                                stack.append(entry.path)
+                        elif report:
+                            found.append(entry.path)
+            except OSError:
+                continue
+        return found
+
+    def read_events(self, timeout):
+        """Rend une liste de (type, chemin, ancien_chemin) : 'created', 'modified', 'deleted', 'moved'."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        moved_from = {}  # cookie -> ancien chemin
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append(('overflow', self.root, None))
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            path = os.path.join(directory, name) if name else directory
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = path
+                events.append(('deleted', path, None))
+            elif mask & IN_MOVED_TO:
+                old_path = moved_from.pop(cookie, None)
+                if old_path is not None:
+                    # Déplacement interne : on remplace le 'deleted' provisoire
+                    events.remove(('deleted', old_path, None))
+                    events.append(('moved', path, old_path))
+                    if is_dir:
+                        self._rewatch(old_path, path)
+                elif is_dir:
+                    events.extend(('created', p, None) for p in self.add_tree(path))
+                else:
+                    events.append(('created', path, None))
+            elif mask & IN_CREATE:
+                if is_dir:
+                    # Les fichiers créés avant la pose de la surveillance sont rattrapés
+                    events.extend(('created', p, None) for p in self.add_tree(path))
+                else:
+                    self._new_files.add(path)
+            elif mask & IN_CLOSE_WRITE and not is_dir:
+                # Nouveau fichier une fois son écriture terminée, sinon simple modification
+                if path in self._new_files:
+                    self._new_files.discard(path)
+                    events.append(('created', path, None))
+                else:
+                    events.append(('modified', path, None))
+            elif mask & IN_DELETE:
+                events.append(('deleted', path, None))
+        return events
+
+    def _rewatch(self, old_path, new_path):
+        old_prefix = os.path.join(old_path, '')
+        for wd, directory in list(self.watches.items()):
+            if directory == old_path:
+                self.watches[wd] = new_path
+            elif directory.startswith(old_prefix):
+                self.watches[wd] = os.path.join(new_path, directory[len(old_prefix):])
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """
+    Repli par scrutation périodique (montages sshfs/NFS/SMB, systèmes non Linux) :
+    compare deux instantanés {chemin: (taille, mtime_ns, inode)} ; un inode qui change
+    de chemin est un déplacement. Les chemins ignorés (`ignore`, IgnoreRules) sont
+    absents des instantanés et les dossiers ignorés ne sont pas parcourus.
+    """
+
+    def __init__(self, root, interval=30.0, ignore=None):
+        self.root = root
+        self.interval = interval
+        self.ignore = ignore if ignore is not None else IgnoreRules(root)
+        self.snapshot = self._snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _snapshot(self):
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.ignore.is_path_ignored(entry.path, True):
+                                stack.append(entry.path)
+                            continue
+                        if self.ignore.is_path_ignored(entry.path):
+                            continue
+                        st = entry.stat()
+                        snapshot[entry.path] = (st.st_size, st.st_mtime_ns, st.st_ino or entry.inode())
+            except OSError:
+                continue
+        return snapshot
+
+    def read_events(self, timeout):
+        wait = self._next_poll - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            return []
+        self._next_poll = time.monotonic() + self.interval
+        current = self._snapshot()
+        previous = self.snapshot
+        self.snapshot = current
+        removed = {sig[2]: path for path, sig in previous.items() if path not in current}
+        events = []
+        for path, sig in current.items():
+            old = previous.get(path)
+            if old == sig:
+                continue
+            if old is not None:
+                events.append(('modified', path, None))
+            elif sig[2] and sig[2] in removed:
+                events.append(('moved', path, removed.pop(sig[2])))
+            else:
+                events.append(('created', path, None))
+        events.extend(('deleted', path, None) for path in removed.values())
+        return events
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Mode surveillance : répercute créations, modifications, déplacements et suppressions
+    dans l'index de scan, et transmet les seuls fichiers nouveaux à `on_batch(records)` par lots, après
+    `debounce` secondes sans nouvel événement (ou dès `max_batch` fichiers).
+    inotify est utilisé sous Linux, la scrutation périodique sur les montages réseau.
+    Les règles d'ignorance (défaut + `ignore_patterns`) écartent les dossiers surveillés et
+    les fichiers signalés ; `file_filter(path)` permet d'en écarter d'autres.
+    """
+
+    def __init__(self, folders, on_batch, index_path=INDEX_PATH, debounce=5.0, max_batch=50,
+                 poll_interval=30.0, file_filter=None, ignore_patterns=None):
+        self.folders = folders
+        self.on_batch = on_batch
+        self.index_path = index_path
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self.file_filter = file_filter
+        self.rules = [IgnoreRules(folder, ignore_patterns) for folder in folders]
+        self.stats = {'created': 0, 'moved': 0, 'deleted': 0, 'batches': 0}
+        self._pending = {}  # chemin -> None, ordonné par arrivée
+        self._last_event = 0.0
+        self._dirty = False
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.index = None
+
+    def _make_source(self, folder, rules):
+        if not needs_polling(folder):
+            try:
+                return InotifySource(folder, ignore=rules)
+            except OSError as e:
+                print(f"[DEBUG] inotify indisponible pour {folder} ({e}), repli sur la scrutation")
+        return PollingSource(folder, interval=self.poll_interval, ignore=rules)
+
+    def accepts(self, path):
+        if any(rules.is_path_ignored(path) for rules in self.rules):
+            return False
+        return self.file_filter is None or self.file_filter(path)
+
+    def start(self):
+        self.index = ScanIndex(self.index_path) if self.index_path else None
+        for folder, rules in zip(self.folders, self.rules):
+            source = self._make_source(folder, rules)
+            thread = threading.Thread(target=self._run_source, args=(source,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        flusher = threading.Thread(target=self._run_flusher, daemon=True)
+        flusher.start()
+        self._threads.append(flusher)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._flush()
+        if self.index:
+            self.index.close()
+
+    def _run_source(self, source):
+        try:
+            while not self._stop.is_set():
+                for kind, path, old_path in source.read_events(timeout=0.5):
+                    self.handle_event(kind, path, old_path)
+        finally:
+            source.close()
+
+    def _run_flusher(self):
+        while not self._stop.wait(0.2):
+            with self._lock:
+                ready = self._pending and (
+                    len(self._pending) >= self.max_batch
+                    or time.monotonic() - self._last_event >= self.debounce
+                )
+            if ready:
+                self._flush()
+            elif self._dirty and self.index:
+                self._dirty = False
+                self.index.commit()
+
+    def handle_event(self, kind, path, old_path=None):
+        with self._lock:
+            self._last_event = time.monotonic()
+            if kind == 'created':
+                if os.path.isfile(path) and self.accepts(path):
+                    self._pending[path] = None
+                    self.stats['created'] += 1
+            elif kind == 'modified':
+                # Déjà classé : on invalide seulement l'extrait en cache
+                if path not in self._pending and self.index:
+                    self.index.remove(path)
+                    self._dirty = True
+            elif kind == 'deleted':
+                self._pending.pop(path, None)
+                if self.index:
+                    self.index.remove(path)
+                    self._dirty = True
+                self.stats['deleted'] += 1
+            elif kind == 'moved':
+                if old_path in self._pending:
+                    # Fichier pas encore classé : il reste à classer sous son nouveau nom
+                    del self._pending[old_path]
+                    self._pending[path] = None
+                elif self.index:
+                    self.index.rename(old_path, path)
+                    self._dirty = True
+                self.stats['moved'] += 1
+            elif kind == 'overflow':
+                print("[DEBUG] File d'événements inotify saturée : relancer un scan complet")
+
+    def _flush(self):
+        with self._lock:
+            paths = list(self._pending)
+            self._pending.clear()
+        if not paths:
+            return
+        records = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            excerpt = extract_excerpt(path)
+            if self.index:
+                self.index.store(path, st.st_size, st.st_mtime_ns, st.st_ino, st.st_ctime, excerpt)
+            records.append(FileRecord.from_path(path, size=st.st_size, mtime=st.st_mtime,
+                                                ctime=st.st_ctime, excerpt=excerpt))
+        if self.index:
+            self.index.commit()
+        for i in range(0, len(records), self.max_batch):
+            self.stats['batches'] += 1
+            try:
+                self.on_batch(records[i:i + self.max_batch])
+            except Exception as e:
+                print(f"[ERREUR] Échec du traitement d'un lot surveillé : {e}")
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import re
+import time
+import types
+import random
+import threading
+import unittest
+from unittest import mock
+from ai.gemini_validator import GeminiValidator
+from api.rate_limit import RateLimiter
+
+def make_files(n):
+    # Un fichier sur trois porte le même nom : avec des lots de 3, chaque lot complet en contient un
+    return [{'name': 'commun.txt' if i % 3 == 2 else f'f{i}.txt', 'path': f'/tmp/{i}/f{i}.txt', 'ctime': 0.0, 'excerpt': ''}
+            for i in range(n)]
+
+class FakeProvider:
+    """Fournisseur simulé : latence aléatoire, mesure du nombre d'appels simultanés."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def get_ai_response(self, prompt, max_tokens=512):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(random.uniform(0.001, 0.02))
+        with self.lock:
+            self.active -= 1
+        lines = re.findall(r"^(\d+)\|[^|]*\|([^|]*)\|", prompt, re.MULTILINE)
+        first = int(re.search(r"\d+", lines[0][1]).group(0))
+        return {file_id: [f'Lot{first // 3 + 1}', ''] for file_id, _ in lines}
+
+class TestBatchDispatch(unittest.TestCase):
+    def run_schema(self, files, **kwargs):
+        provider = FakeProvider()
+        module = types.ModuleType('api.gemini')
+        module.get_ai_response = provider.get_ai_response
+        progress = []
+        with mock.patch.dict(sys.modules, {'api.gemini': module}):
+            validator = GeminiValidator(max_in_flight=4, requests_per_minute=None, classification_cache=False)
+            result = validator.suggest_schema(files, batch_size=3, existing_themes=set(),
+                                              existing_subthemes=set(), progress_callback=progress.append, **kwargs)
+        return result, provider, progress
+
+    def test_results_merged_in_batch_order(self):
+        result, provider, progress = self.run_schema(make_files(40))
+        self.assertEqual(len(result), 28)
+        self.assertEqual(result['f0.txt'], {'theme': 'Lot1', 'sous_theme': ''})
+        self.assertEqual(result['f39.txt']['theme'], 'Lot14')
+        # Le nom présent dans tous les lots garde la valeur du dernier, quel que soit l'ordre d'arrivée
+        self.assertEqual(result['commun.txt']['theme'], 'Lot13')
+        self.assertLessEqual(provider.max_active, 4)
+        self.assertGreater(provider.max_active, 1)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 80)
+
+    def test_generator_input(self):
+        result, _, progress = self.run_schema(iter(make_files(10)))
+        self.assertEqual(len(result), 8)
+        self.assertEqual(len(progress), 5)
+        self.assertEqual(progress[-1], 80)
+
+    def test_entries_streamed_by_name(self):
+        def get_ai_response(prompt, max_tokens=512, on_entry=None):
+            lines = re.findall(r"^(\d+)\|[^|]*\|([^|]*)\|", prompt, re.MULTILINE)
+            response = {file_id: ['Theme', 'Sous'] for file_id, _ in lines}
+            for key, value in response.items():
+                on_entry(key, value)
+            return response
+        module = types.ModuleType('api.gemini')
+        module.get_ai_response = get_ai_response
+        entries = []
+        with mock.patch.dict(sys.modules, {'api.gemini': module}):
+            validator = GeminiValidator(requests_per_minute=None, classification_cache=False)
+            result = validator.suggest_schema(make_files(6), batch_size=3, existing_themes=set(), existing_subthemes=set(),
+                                              on_entry=lambda name, suggestion: entries.append(name))
+        self.assertEqual(sorted(entries), sorted(['f0.txt', 'f1.txt', 'commun.txt', 'f3.txt', 'f4.txt', 'commun.txt']))
+        self.assertEqual(result['f4.txt'], {'theme': 'Theme', 'sous_theme': 'Sous'})
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(requests_per_minute=600, burst=1)
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        # 10 requêtes par seconde : la première passe immédiatement, les suivantes toutes les 0,1 s
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+        self.assertEqual(RateLimiter(None).acquire(), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
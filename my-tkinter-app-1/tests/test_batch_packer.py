@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import unittest
+from ai.batch_packer import BatchPacker, estimate_tokens, OUTPUT_SAFETY
+
+def render(f):
+    return f"Nom : {f['name']} | Chemin : {f['path']} | Extrait : {f['excerpt']}\n"
+
+def make_files(n, excerpt=''):
+    return [{'name': f'fichier_{i}.pdf', 'path': f'/home/user/Documents/fichier_{i}.pdf', 'excerpt': excerpt}
+            for i in range(n)]
+
+class TestBatchPacker(unittest.TestCase):
+    def test_batches_respect_input_budget(self):
+        packer = BatchPacker(render, input_budget=500, output_budget=100000)
+        files = make_files(100, excerpt='x' * 50)
+        batches = list(packer.batches(files, overhead=100))
+        self.assertEqual(sum(len(b) for b in batches), 100)
+        self.assertGreater(len(batches), 1)
+        for batch in batches:
+            self.assertLessEqual(100 + sum(packer.input_tokens(f) for f in batch), 500)
+        # Les lots sont remplis : ajouter le premier fichier du lot suivant dépasserait le budget
+        first, second = batches[0], batches[1]
+        self.assertGreater(100 + sum(packer.input_tokens(f) for f in first + second[:1]), 500)
+
+    def test_output_budget_limits_batch_and_sets_max_tokens(self):
+        packer = BatchPacker(render, input_budget=100000, output_budget=400)
+        batches = list(packer.batches(make_files(50)))
+        self.assertGreater(len(batches), 1)
+        for batch in batches:
+            self.assertLessEqual(packer.max_tokens(batch), 400)
+            expected = sum(packer.output_tokens(f) for f in batch)
+            self.assertGreaterEqual(packer.max_tokens(batch), int(expected * OUTPUT_SAFETY))
+
+    def test_small_batch_gets_small_max_tokens(self):
+        packer = BatchPacker(render, output_budget=2048)
+        self.assertLess(packer.max_tokens(make_files(1)), 200)
+
+    def test_max_files_and_oversized_file(self):
+        packer = BatchPacker(render, input_budget=50, max_files=3)
+        files = make_files(2) + [{'name': 'gros.txt', 'path': '/g', 'excerpt': 'y' * 1000}] + make_files(7)
+        sizes = [len(b) for b in packer.batches(iter(files))]
+        self.assertEqual(sum(sizes), 10)
+        self.assertTrue(all(size <= 3 for size in sizes))
+
+    def test_overhead_callable_evaluated_per_batch(self):
+        calls = []
+        packer = BatchPacker(render, input_budget=200)
+
+        def overhead():
+            calls.append(1)
+            return 50
+        batches = list(packer.batches(make_files(30), overhead))
+        self.assertEqual(len(calls), len(batches))
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertEqual(estimate_tokens('abcdefg'), 2)
+
+if __name__ == '__main__':
+    unittest.main()
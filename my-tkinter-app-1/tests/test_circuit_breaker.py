@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import unittest
+from unittest import mock
+from api import circuit_breaker
+from api.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(circuit_breaker.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_opens_after_consecutive_failures_then_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=3, open_seconds=30)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.retry_after(), 30)
+
+        self.now += 30
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # un seul appel de test
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        self.now += 30
+        self.assertTrue(breaker.allow())
+        breaker.record_success(0.5)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()['opened'], 2)
+
+    def test_error_rate_and_slow_calls_over_window(self):
+        breaker = CircuitBreaker(failure_threshold=10, error_rate=0.5, min_calls=4, slow_call_seconds=5, window_seconds=60)
+        breaker.record_success(0.2)
+        breaker.record_failure()
+        breaker.record_success(0.3)
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_success(8.0)  # lent : compte comme un échec
+        self.assertEqual(breaker.state, OPEN)
+
+        # Les appels sortis de la fenêtre ne comptent plus
+        breaker = CircuitBreaker(failure_threshold=10, error_rate=0.5, min_calls=4, window_seconds=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.now += 61
+        for _ in range(3):
+            breaker.record_success(0.1)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_release_returns_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=10)
+        breaker.record_failure()
+        self.now += 10
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertTrue(breaker.allow())
+
+if __name__ == '__main__':
+    unittest.main()
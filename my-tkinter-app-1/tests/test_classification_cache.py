@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import re
+import types
+import tempfile
+import unittest
+from unittest import mock
+from ai.gemini_validator import GeminiValidator
+from ai.classification_cache import ClassificationCache, file_fingerprint
+
+def make_file(i, excerpt=''):
+    return {'name': f'f{i}.txt', 'path': f'/tmp/f{i}.txt', 'size': 10 + i, 'mtime': 1000.0 + i,
+            'ctime': 0.0, 'excerpt': excerpt}
+
+class TestClassificationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ClassificationCache(os.path.join(self.tmp.name, 'data', 'classes.db'))
+        self.prompts = []
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def get_ai_response(self, prompt, max_tokens=512):
+        self.prompts.append(prompt)
+        return {file_id: ['Cours', 'Maths'] for file_id in re.findall(r"^(\d+)\|", prompt, re.MULTILINE)}
+
+    def suggest(self, files):
+        module = types.ModuleType('api.gemini')
+        module.get_ai_response = self.get_ai_response
+        with mock.patch.dict(sys.modules, {'api.gemini': module}):
+            validator = GeminiValidator(requests_per_minute=None, classification_cache=self.cache)
+            return validator.suggest_schema(files, batch_size=5, existing_themes=set(), existing_subthemes=set())
+
+    def test_fingerprint_changes_with_content(self):
+        self.assertEqual(file_fingerprint(make_file(1)), file_fingerprint(dict(make_file(1), path='/ailleurs/f1.txt')))
+        self.assertNotEqual(file_fingerprint(make_file(1)), file_fingerprint(make_file(1, excerpt='modifié')))
+        self.assertNotEqual(file_fingerprint(make_file(1)), file_fingerprint(dict(make_file(1), mtime=5.0)))
+
+    def test_rerun_only_sends_new_files(self):
+        files = [make_file(i) for i in range(20)]
+        first = self.suggest(files)
+        self.assertEqual(len(self.prompts), 4)
+        self.prompts.clear()
+        self.assertEqual(self.suggest(files), first)
+        self.assertEqual(self.prompts, [])
+        # Un fichier ajouté et un fichier modifié : un seul lot, avec ces deux fichiers
+        files = files + [make_file(20)]
+        files[3] = make_file(3, excerpt='nouveau contenu')
+        result = self.suggest(files)
+        self.assertEqual(len(self.prompts), 1)
+        self.assertEqual(sorted(re.findall(r"^\d+\|[^|]*\|([^|]*)\|", self.prompts[0], re.MULTILINE)), ['f20.txt', 'f3.txt'])
+        self.assertEqual(len(result), 21)
+        # Les thèmes déjà connus sont proposés à l'IA
+        self.assertIn('Cours', self.prompts[0])
+
+    def test_suggestions_without_theme_not_cached(self):
+        self.cache.store(make_file(1), {'theme': '', 'sous_theme': ''})
+        self.cache.store(make_file(2), 'Divers')
+        self.assertIsNone(self.cache.lookup(make_file(1)))
+        self.assertIsNone(self.cache.lookup(make_file(2)))
+
+if __name__ == '__main__':
+    unittest.main()
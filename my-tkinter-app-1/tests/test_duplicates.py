@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import tempfile
+import unittest
+from organizer.duplicates import find_duplicates, expand_duplicates, PARTIAL_SIZE
+
+class TestDuplicates(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return {'name': name, 'path': path, 'size': len(content)}
+
+    def test_groups_identical_files(self):
+        files = [
+            self.make('facture.pdf', b'%PDF facture'),
+            self.make('facture (1).pdf', b'%PDF facture'),
+            self.make('autre.pdf', b'%PDF autre!!'),
+            self.make('vide.txt', b''),
+            self.make('vide (1).txt', b''),
+        ]
+        representatives, groups = find_duplicates(files)
+        self.assertEqual([f['name'] for f in representatives], ['facture.pdf', 'autre.pdf', 'vide.txt', 'vide (1).txt'])
+        self.assertEqual([d['name'] for d in groups[files[0]['path']]['duplicates']], ['facture (1).pdf'])
+
+    def test_large_files_differing_in_the_middle(self):
+        big = b'a' * (3 * PARTIAL_SIZE)
+        other = big[:PARTIAL_SIZE + 10] + b'b' + big[PARTIAL_SIZE + 11:]
+        files = [self.make('setup.exe', big), self.make('setup (1).exe', big), self.make('setup_v2.exe', other)]
+        representatives, groups = find_duplicates(files)
+        self.assertEqual([f['name'] for f in representatives], ['setup.exe', 'setup_v2.exe'])
+        self.assertEqual(len(groups[files[0]['path']]['duplicates']), 1)
+
+    def test_unreadable_first_file_is_replaced(self):
+        # Supprimé entre le scan et le hachage : la lecture lève OSError
+        gone = self.make('disparu.pdf', b'%PDF facture')
+        os.remove(gone['path'])
+        files = [gone, self.make('facture.pdf', b'%PDF facture'), self.make('facture (1).pdf', b'%PDF facture')]
+        representatives, groups = find_duplicates(files)
+        self.assertEqual([f['name'] for f in representatives], ['disparu.pdf', 'facture.pdf'])
+        self.assertEqual([d['name'] for d in groups[files[1]['path']]['duplicates']], ['facture (1).pdf'])
+
+    def test_theme_propagated_to_duplicates(self):
+        files = [self.make('a.txt', b'x'), self.make('a (1).txt', b'x')]
+        _, groups = find_duplicates(files)
+        suggestions = expand_duplicates({'a.txt': {'theme': 'Notes', 'sous_theme': ''}}, groups)
+        self.assertEqual(suggestions['a (1).txt'], {'theme': 'Notes', 'sous_theme': ''})
+
+if __name__ == '__main__':
+    unittest.main()
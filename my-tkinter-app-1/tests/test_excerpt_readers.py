@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import tempfile
+import zipfile
+import unittest
+from organizer.excerpt_readers import docx_excerpt, xlsx_excerpt
+from organizer.extractors import EXTRACTORS, HEIF_EXTS, register_extractor, extract_excerpt
+from organizer.ignore_rules import IgnoreRules
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+S = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+
+def write_docx(path, body):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('word/document.xml', f'<w:document {W}><w:body>{body}</w:body></w:document>')
+
+def write_xlsx(path, rows, shared=()):
+    sheet = ''.join(f'<row r="{i + 1}">{cells}</row>' for i, cells in enumerate(rows))
+    sst = ''.join(f'<si><t>{text}</t></si>' for text in shared)
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('xl/worksheets/sheet1.xml', f'<worksheet {S}><sheetData>{sheet}</sheetData></worksheet>')
+        zf.writestr('xl/sharedStrings.xml', f'<sst {S}>{sst}</sst>')
+
+class TestDocxExcerpt(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'doc.docx')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_paragraphs_joined_like_python_docx(self):
+        write_docx(self.path, '<w:p><w:r><w:t>Facture</w:t></w:r><w:r><w:t xml:space="preserve"> EDF</w:t></w:r></w:p>'
+                              '<w:p/><w:p><w:r><w:t>Janvier</w:t></w:r></w:p>')
+        self.assertEqual(docx_excerpt(self.path), 'Facture EDF\n\nJanvier')
+
+    def test_stops_at_budget(self):
+        write_docx(self.path, '<w:p><w:r><w:t>abcdefghij</w:t></w:r></w:p>' * 10000)
+        self.assertEqual(docx_excerpt(self.path, max_chars=25), 'abcdefghij\nabcdefghij\nabc')
+
+class TestXlsxExcerpt(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'classeur.xlsx')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cell_types_and_separators(self):
+        write_xlsx(self.path, [
+            '<c t="s"><v>0</v></c><c><v>12.5</v></c><c/><c t="b"><v>1</v></c>',
+            '<c t="inlineStr"><is><t>Total</t></is></c><c t="s"><v>1</v></c>',
+        ], shared=['Client', 'EDF'])
+        self.assertEqual(xlsx_excerpt(self.path), 'Client | 12.5 | True Total | EDF')
+
+    def test_huge_export_stops_at_budget(self):
+        write_xlsx(self.path, ['<c t="s"><v>0</v></c><c><v>42</v></c>'] * 50000, shared=['ligne'])
+        text = xlsx_excerpt(self.path, max_chars=30)
+        self.assertEqual(text, 'ligne | 42 ligne | 42 ligne | ')
+
+class TestExtractorRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        EXTRACTORS.pop('.abc', None)
+
+    def test_registered_format_is_used(self):
+        @register_extractor('.ABC', max_bytes=4, timeout=1.0)
+        def abc_excerpt(filepath, max_chars, max_bytes):
+            with open(filepath) as f:
+                return f.read(max_bytes)
+        path = os.path.join(self.tmp.name, 'fichier.abc')
+        with open(path, 'w') as f:
+            f.write('entête puis contenu')
+        self.assertEqual(extract_excerpt(path), 'entê')
+        self.assertEqual(EXTRACTORS['.abc'].timeout, 1.0)
+
+    def test_text_respects_byte_budget_and_unknown_is_empty(self):
+        path = os.path.join(self.tmp.name, 'notes.txt')
+        with open(path, 'w') as f:
+            f.write('x' * 100000)
+        self.assertEqual(len(extract_excerpt(path, max_chars=300)), 300)
+        self.assertEqual(extract_excerpt(os.path.join(self.tmp.name, 'inconnu.zzz')), '')
+
+    def test_registered_formats_are_reachable(self):
+        # Un extracteur pour une extension ignorée par défaut ne serait jamais appelé
+        rules = IgnoreRules(self.tmp.name)
+        for ext in EXTRACTORS:
+            self.assertFalse(rules.is_ignored(os.path.join(self.tmp.name, 'f' + ext), False), ext)
+        # HEIC seulement si PIL sait l'ouvrir (greffon pillow-heif)
+        self.assertEqual('.heic' in EXTRACTORS, '.heic' in HEIF_EXTS)
+
+if __name__ == '__main__':
+    unittest.main()
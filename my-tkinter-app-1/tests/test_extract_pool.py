@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import time
+import random
+import unittest
+from organizer.extract_pool import ExtractionPool
+
+def slow_upper(text):
+    time.sleep(random.random() / 100)
+    return text.upper()
+
+def hang_on_b(text):
+    if text == 'b':
+        time.sleep(1)
+    return text
+
+class TestExtractionPool(unittest.TestCase):
+    def test_results_keep_input_order(self):
+        items = [f"fichier{i}" for i in range(50)]
+        with ExtractionPool(workers=8) as pool:
+            self.assertEqual(pool.map(slow_upper, items), [i.upper() for i in items])
+
+    def test_timeout_returns_default(self):
+        with ExtractionPool(workers=2, timeout=0.1) as pool:
+            self.assertEqual(pool.map(hang_on_b, ['a', 'b', 'c']), ['a', '', 'c'])
+            self.assertEqual(pool.timeouts, 1)
+
+    def test_from_settings(self):
+        pool = ExtractionPool.from_settings({'extraction': {'workers': 3, 'mode': 'process', 'timeout': 2}})
+        self.assertEqual((pool.workers, pool.mode, pool.timeout), (3, 'process', 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import time
+import tempfile
+import unittest
+from organizer.extract_pool import ExtractionPool
+from organizer.extractors import EXTRACTORS, register_extractor
+from organizer.file_organizer import walk_files, iter_files, iter_file_batches, get_all_files
+from organizer.scan_budget import ScanBudget
+from organizer.scan_index import ScanIndex
+
+def write(path, text='contenu', mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+class TestWalkFiles(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "liens symboliques indisponibles")
+    def test_symlinks_are_not_followed(self):
+        write(os.path.join(self.root, 'facture.pdf'))
+        write(os.path.join(self.root, 'ailleurs', 'secret.txt'))
+        try:
+            os.symlink(os.path.join(self.root, 'ailleurs'), os.path.join(self.root, 'lien_dossier'))
+            os.symlink(os.path.join(self.root, 'facture.pdf'), os.path.join(self.root, 'lien_fichier.pdf'))
+        except OSError:
+            self.skipTest("création de liens symboliques refusée")
+        paths = sorted(os.path.relpath(entry.path, self.root) for entry, _ in walk_files(self.root))
+        self.assertEqual(paths, ['ailleurs/secret.txt'.replace('/', os.sep), 'facture.pdf'])
+
+class TestIterFiles(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, 'racine')
+        self.index_path = os.path.join(self._tmp.name, 'index.db')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def scan(self, **kwargs):
+        stats = {}
+        files = get_all_files(self.root, index_path=self.index_path, stats=stats, **kwargs)
+        return {f['name']: f['excerpt'] for f in files}, stats
+
+    def test_unchanged_files_come_from_the_index(self):
+        write(os.path.join(self.root, 'notes.txt'), 'liste de courses')
+        write(os.path.join(self.root, 'cours', 'histoire.md'), 'la révolution')
+        first, stats = self.scan()
+        self.assertEqual((stats['files'], stats['extracted'], stats['index_hits']), (2, 2, 0))
+        second, stats = self.scan()
+        self.assertEqual((stats['files'], stats['extracted'], stats['index_hits']), (2, 0, 2))
+        self.assertEqual(second, first)
+        self.assertEqual(second['notes.txt'], 'liste de courses')
+
+    def test_modified_file_is_extracted_again(self):
+        path = os.path.join(self.root, 'notes.txt')
+        write(path, 'ancienne version', mtime=1_600_000_000)
+        write(os.path.join(self.root, 'autre.txt'), 'inchangé')
+        self.scan()
+        write(path, 'nouvelle version', mtime=1_700_000_000)
+        files, stats = self.scan()
+        self.assertEqual((stats['extracted'], stats['index_hits']), (1, 1))
+        self.assertEqual(files['notes.txt'], 'nouvelle version')
+
+    def test_timed_out_extraction_is_not_cached(self):
+        delay = [1.0]
+
+        @register_extractor('.lent', timeout=0.1)
+        def slow_excerpt(filepath, max_chars, max_bytes):
+            time.sleep(delay[0])
+            return 'extrait complet'
+        self.addCleanup(EXTRACTORS.pop, '.lent', None)
+        write(os.path.join(self.root, 'partage.lent'))
+        with ExtractionPool(workers=1) as pool:
+            files, stats = self.scan(pool=pool)
+        self.assertEqual((files['partage.lent'], stats['timeouts'], stats['extracted']), ('', 1, 0))
+        # Lecture de nouveau rapide : le fichier est extrait au lieu d'être lu dans l'index
+        delay[0] = 0
+        files, stats = self.scan()
+        self.assertEqual((files['partage.lent'], stats['index_hits'], stats['extracted']), ('extrait complet', 0, 1))
+
+    def test_streaming_order_and_batches(self):
+        write(os.path.join(self.root, 'ancien.txt'), mtime=1_600_000_000)
+        write(os.path.join(self.root, 'recent.txt'), mtime=1_700_000_000)
+        write(os.path.join(self.root, 'Documents', 'doc.txt'))
+        write(os.path.join(self.root, 'Downloads', 'telechargement.txt'))
+        # Documents est plus récent, mais Téléchargements reste prioritaire au premier niveau
+        os.utime(os.path.join(self.root, 'Downloads'), (1_600_000_000, 1_600_000_000))
+        os.utime(os.path.join(self.root, 'Documents'), (1_700_000_000, 1_700_000_000))
+        names = [f['name'] for f in iter_files(self.root, index_path=None)]
+        self.assertEqual(names, ['recent.txt', 'ancien.txt', 'telechargement.txt', 'doc.txt'])
+        batches = [[f['name'] for f in batch] for batch in iter_file_batches(self.root, 3, index_path=None)]
+        self.assertEqual(batches, [names[:3], names[3:]])
+
+    def test_ignored_subtrees_are_pruned(self):
+        write(os.path.join(self.root, 'facture.pdf'))
+        write(os.path.join(self.root, 'projet', 'node_modules', 'lib', 'index.js'))
+        write(os.path.join(self.root, 'projet', 'journal.log'))
+        write(os.path.join(self.root, 'projet', 'brouillons', 'a.txt'))
+        write(os.path.join(self.root, 'projet', '.organizerignore'), 'brouillons/\n')
+        files, stats = self.scan(ignore_patterns=['*.log'])
+        self.assertEqual(sorted(files), ['facture.pdf'])
+        # node_modules (défaut) et brouillons (.organizerignore) ; journal.log et .organizerignore
+        self.assertEqual((stats['pruned_dirs'], stats['ignored_files']), (2, 2))
+
+    def test_budget_stops_and_resumes_without_purge(self):
+        for folder in ('a', 'b', 'c'):
+            write(os.path.join(self.root, folder, folder + '.txt'))
+        # Entrée d'un fichier disparu : ne doit être purgée qu'après un parcours complet
+        gone = os.path.join(self.root, 'c', 'supprime.txt')
+        index = ScanIndex(self.index_path)
+        index.store(gone, 1, 1, 1, 0.0, '', scan_id=1)
+        index.close()
+
+        files, stats = self.scan(budget=ScanBudget(max_files=1))
+        self.assertEqual(len(files), 1)
+        self.assertEqual((stats['pending_dirs'], stats['purged']), (2, 0))
+        index = ScanIndex(self.index_path)
+        self.assertEqual(len(index.pending(self.root)), 2)
+        self.assertIsNotNone(index.lookup(gone, 1, 1, 1))
+        index.close()
+
+        # Les dossiers en attente passent en premier au scan suivant
+        resumed, stats = self.scan(budget=ScanBudget(max_files=1))
+        self.assertNotEqual(list(resumed), list(files))
+        self.assertEqual(stats['purged'], 0)
+
+        files, stats = self.scan()
+        self.assertEqual(sorted(files), ['a.txt', 'b.txt', 'c.txt'])
+        self.assertEqual((stats['index_hits'], stats['pending_dirs'], stats['purged']), (2, 0, 1))
+        index = ScanIndex(self.index_path)
+        self.assertEqual(index.pending(self.root), [])
+        self.assertIsNone(index.lookup(gone, 1, 1, 1))
+        index.close()
+
+if __name__ == '__main__':
+    unittest.main()
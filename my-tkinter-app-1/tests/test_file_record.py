@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import gc
+import tracemalloc
+import unittest
+from organizer.file_record import FileRecord, file_date
+
+N_FILES = 20000
+# Budget mémoire par fichier scanné (enregistrement + nom), extrait laissé dans l'index
+PER_FILE_BUDGET = 256
+
+class StubLoader:
+    def excerpt(self, path):
+        return f"extrait de {os.path.basename(path)}"
+
+def build_records(loader):
+    root = os.path.join(os.sep, 'home', 'utilisateur', 'Documents')
+    return [
+        FileRecord(os.path.join(root, f"dossier_{i % 100}"), f"fichier_{i:06d}.pdf",
+                   size=i, mtime=1700000000.0 + i, ctime=1700000000.0 + i, loader=loader)
+        for i in range(N_FILES)
+    ]
+
+def build_dicts():
+    root = os.path.join(os.sep, 'home', 'utilisateur', 'Documents')
+    return [
+        {'name': f"fichier_{i:06d}.pdf", 'path': os.path.join(root, f"dossier_{i % 100}", f"fichier_{i:06d}.pdf"),
+         'size': i, 'mtime': 1700000000.0 + i, 'ctime': 1700000000.0 + i, 'excerpt': ''}
+        for i in range(N_FILES)
+    ]
+
+def measure(factory):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        data = factory()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(data), data
+
+class TestFileRecord(unittest.TestCase):
+    def test_memory_budget_per_file(self):
+        loader = StubLoader()
+        per_record, _ = measure(lambda: build_records(loader))
+        per_dict, _ = measure(build_dicts)
+        self.assertLess(per_record, PER_FILE_BUDGET)
+        self.assertLess(per_record, per_dict / 2)
+
+    def test_dict_compatible_access(self):
+        record = FileRecord.from_path(os.path.join('dossier', 'facture.pdf'), size=10, ctime=0.0, excerpt='EDF')
+        self.assertEqual(record['path'], os.path.join('dossier', 'facture.pdf'))
+        self.assertEqual(record['name'], 'facture.pdf')
+        self.assertEqual(record.get('excerpt'), 'EDF')
+        self.assertIsNone(record.get('inconnu'))
+        self.assertEqual(file_date(record), record['date'])
+        record['excerpt'] = 'autre'
+        self.assertEqual(record['excerpt'], 'autre')
+        with self.assertRaises(KeyError):
+            record['path'] = 'ailleurs'
+
+    def test_directory_is_shared_and_excerpt_lazy(self):
+        loader = StubLoader()
+        a = FileRecord(os.path.join('racine', 'dossier'), 'a.txt', loader=loader)
+        b = FileRecord(os.path.join('racine', 'dossier'), 'b.txt', loader=loader)
+        self.assertIs(a.dir, b.dir)
+        self.assertEqual(a['excerpt'], 'extrait de a.txt')
+
+if __name__ == '__main__':
+    unittest.main()
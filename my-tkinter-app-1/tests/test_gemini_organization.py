@@ -13,8 +13,8 @@ class TestGeminiOrganization(unittest.TestCase):
         dirs = get_default_user_dirs()
         files = []
         for d in dirs:
-            files.extend(get_all_files(d))
-        gemini = GeminiValidator(debug=True)
+            files.extend(get_all_files(d, index_path=None))
+        gemini = GeminiValidator(debug=True, classification_cache=False)
         batch_size = 5
         suggestions = gemini.suggest_schema(files, batch_size=batch_size)
         # Écrit la suggestion dans un fichier txt dans le dossier test
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import unittest
+from organizer.ignore_rules import IgnoreMatcher, IgnoreRules
+
+class TestIgnoreMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = IgnoreMatcher(['# commentaire', '*.log', '!keep.log', 'build/', '/racine.txt', 'docs/**/*.tmp'])
+
+    def test_basename_patterns_match_at_any_depth(self):
+        self.assertTrue(self.matcher.match('a.log', False))
+        self.assertTrue(self.matcher.match('x/y/a.log', False))
+
+    def test_last_rule_wins_with_negation(self):
+        self.assertFalse(self.matcher.match('x/keep.log', False))
+
+    def test_directory_only_and_anchored_patterns(self):
+        self.assertTrue(self.matcher.match('src/build', True))
+        self.assertIsNone(self.matcher.match('src/build', False))
+        self.assertTrue(self.matcher.match('racine.txt', False))
+        self.assertIsNone(self.matcher.match('sous/racine.txt', False))
+        self.assertTrue(self.matcher.match('docs/a/b/c.tmp', False))
+        self.assertTrue(self.matcher.match('docs/c.tmp', False))
+
+class TestIgnoreRules(unittest.TestCase):
+    def test_defaults_prune_heavy_directories(self):
+        root = os.path.join(os.sep, 'home', 'u', 'Documents')
+        rules = IgnoreRules(root, ['Privé/'])
+        self.assertTrue(rules.is_ignored(os.path.join(root, 'Arduino', 'libraries'), True))
+        self.assertTrue(rules.is_ignored(os.path.join(root, 'projet', 'node_modules'), True))
+        self.assertTrue(rules.is_ignored(os.path.join(root, 'Privé'), True))
+        self.assertTrue(rules.is_ignored(os.path.join(root, 'setup.exe'), False))
+        self.assertFalse(rules.is_ignored(os.path.join(root, 'facture.pdf'), False))
+
+    def test_nested_ignore_file_overrides_parent(self):
+        root = os.path.join(os.sep, 'partage')
+        rules = IgnoreRules(root, ['*.csv'])
+        chain = rules.root_chain + ((os.path.join(root, 'compta', ''), IgnoreMatcher(['!*.csv'])),)
+        self.assertFalse(rules.is_ignored(os.path.join(root, 'compta', 'export.csv'), False, chain))
+        self.assertTrue(rules.is_ignored(os.path.join(root, 'autre', 'export.csv'), False, chain))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from organizer import multi_scan
+from organizer.multi_scan import group_by_device, device_kind, iter_files_multi
+from organizer.scan_index import ScanIndex
+
+class TestMultiScan(unittest.TestCase):
+    def test_group_by_device_keeps_order_and_skips_missing(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            groups = group_by_device([a, os.path.join(a, 'absent'), b])
+            self.assertEqual(sum(groups.values(), []), [a, b])
+            self.assertIn(os.stat(a).st_dev, groups)
+
+    def test_device_kind(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.object(multi_scan, 'filesystem_type', return_value='fuse.sshfs'):
+                self.assertEqual(device_kind(tmp), 'network')
+            with mock.patch.object(multi_scan, 'filesystem_type', return_value='ext4'), \
+                    mock.patch.object(multi_scan, '_is_rotational', return_value=True):
+                self.assertEqual(device_kind(tmp), 'rotational')
+            with mock.patch.object(multi_scan, 'filesystem_type', return_value='ext4'), \
+                    mock.patch.object(multi_scan, '_is_rotational', return_value=False):
+                self.assertEqual(device_kind(tmp), 'ssd')
+
+class TestIterFilesMulti(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.roots = [os.path.join(self.tmp.name, name) for name in ('disque_a', 'disque_b')]
+        self.index_path = os.path.join(self.tmp.name, 'index.db')
+        # Un disque simulé par dossier : les deux parcours écrivent en parallèle dans le même index
+        patches = [mock.patch.object(multi_scan, 'group_by_device', lambda roots: {i: [r] for i, r in enumerate(roots)}),
+                   mock.patch.object(multi_scan, 'device_kind', return_value='ssd')]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def populate(self, counts):
+        for root, count in zip(self.roots, counts):
+            os.makedirs(os.path.join(root, 'sous'))
+            for i in range(count):
+                with open(os.path.join(root, 'sous' if i % 2 else '', f'f{i}.txt'), 'w') as f:
+                    f.write(f'{root} {i}')
+
+    def test_merged_stream_and_root_callbacks(self):
+        self.populate([30, 20])
+        done = []
+        stats = {}
+        paths = [f['path'] for f in iter_files_multi(self.roots, index_path=self.index_path, stats=stats,
+                                                     on_root_done=lambda root, s: done.append((root, s['files'])))]
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertEqual([sum(p.startswith(r) for p in paths) for r in self.roots], [30, 20])
+        self.assertEqual(sorted(done), [(self.roots[0], 30), (self.roots[1], 20)])
+        self.assertEqual(stats[self.roots[1]]['device'], 'ssd')
+        # Deuxième passage : tout vient de l'index, chaque scan a reçu son propre numéro
+        list(iter_files_multi(self.roots, index_path=self.index_path, stats=stats))
+        self.assertEqual([stats[r]['index_hits'] for r in self.roots], [30, 20])
+        index = ScanIndex(self.index_path)
+        ids = [row[0] for row in index._conn.execute("SELECT id FROM scans")]
+        index.close()
+        self.assertEqual(sorted(ids), [1, 2, 3, 4])
+
+    def test_early_close_stops_walkers(self):
+        # Plus de fichiers que la file de fusion n'en contient : les parcours sont bloqués sur put()
+        self.populate([1500, 1500])
+        files = iter_files_multi(self.roots, index_path=self.index_path)
+        self.assertEqual(len([next(files) for _ in range(5)]), 5)
+        start = time.monotonic()
+        files.close()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('scan-')])
+
+if __name__ == '__main__':
+    unittest.main()
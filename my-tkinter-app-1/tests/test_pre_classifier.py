@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import re
+import types
+import unittest
+from unittest import mock
+from ai import pre_classifier
+from ai.gemini_validator import GeminiValidator
+from ai.pre_classifier import PreClassifier
+
+ORGANIZATION = {
+    'Factures': {'EDF': [f'edf_facture_2023_{m:02d}.pdf' for m in range(1, 13)],
+                 'Orange': [f'orange_mobile_{m:02d}_2023.pdf' for m in range(1, 13)]},
+    'Cours': {'Maths': [f'cours_maths_chapitre_{i}.docx' for i in range(1, 9)]},
+    'Électronique': {'': ['blink.ino']},
+}
+
+def make_file(name, path=None):
+    return {'name': name, 'path': path or f'/home/user/Documents/{name}', 'excerpt': ''}
+
+class TestPreClassifierRules(unittest.TestCase):
+    def test_rules(self):
+        classifier = PreClassifier()
+        self.assertEqual(classifier.rule(make_file('capteur.ino'))['theme'], 'Arduino')
+        self.assertEqual(classifier.rule(make_file('vlc-3.0.20-win64.msi', 'C:\\Users\\sacha\\Downloads\\vlc-3.0.20-win64.msi')),
+                         {'theme': 'Logiciels', 'sous_theme': 'Installateurs'})
+        self.assertEqual(classifier.rule(make_file('facture_2024_03.pdf'))['theme'], 'Factures')
+        self.assertIsNone(classifier.rule(make_file('notes.txt')))
+
+    def test_rule_theme_uses_user_spelling(self):
+        classifier = PreClassifier.from_organization({'factures': {'': ['a.pdf']}})
+        self.assertEqual(classifier.rule(make_file('facture-avril.pdf'))['theme'], 'factures')
+
+@unittest.skipIf(pre_classifier.np is None, "NumPy non installé")
+class TestPreClassifierNeighbours(unittest.TestCase):
+    def setUp(self):
+        self.classifier = PreClassifier.from_organization(ORGANIZATION)
+
+    def test_similar_names_classified_locally(self):
+        (edf, conf_edf, src_edf), (maths, _, src_maths) = self.classifier.predict([
+            make_file('edf_facture_2024_03.pdf'), make_file('cours_maths_chapitre_12.docx')])
+        self.assertEqual(edf, {'theme': 'Factures', 'sous_theme': 'EDF'})
+        self.assertEqual(src_edf, 'knn')
+        self.assertGreaterEqual(conf_edf, 0.8)
+        self.assertEqual((maths['theme'], src_maths), ('Cours', 'knn'))
+
+    def test_learned_theme_wins_over_rule(self):
+        suggestion, _, source = self.classifier.predict([make_file('blink.ino')])[0]
+        self.assertEqual((suggestion['theme'], source), ('Électronique', 'knn'))
+
+    def test_filter_sends_only_uncertain_files(self):
+        files = [make_file('orange_mobile_03_2024.pdf'), make_file('lettre_motivation.odt'),
+                 make_file('setup.msi', '/home/user/Downloads/setup.msi')]
+        classified = {}
+        sent = list(self.classifier.filter(iter(files), classified))
+        self.assertEqual([f['name'] for f in sent], ['lettre_motivation.odt'])
+        self.assertEqual(classified['orange_mobile_03_2024.pdf']['sous_theme'], 'Orange')
+        self.assertEqual(classified['setup.msi']['theme'], 'Logiciels')
+        self.assertEqual((self.classifier.local, self.classifier.sent), (2, 1))
+
+    def test_suggest_schema_sends_only_uncertain_files(self):
+        prompts = []
+
+        def get_ai_response(prompt, max_tokens=512):
+            prompts.append(prompt)
+            return {file_id: ['Courrier', ''] for file_id in re.findall(r"^(\d+)\|", prompt, re.MULTILINE)}
+        module = types.ModuleType('api.gemini')
+        module.get_ai_response = get_ai_response
+        files = [make_file('edf_facture_2024_05.pdf'), make_file('lettre.odt'), make_file('capteur.ino')]
+        with mock.patch.dict(sys.modules, {'api.gemini': module}):
+            validator = GeminiValidator(requests_per_minute=None, classification_cache=False,
+                                        pre_classifier=self.classifier)
+            result = validator.suggest_schema(files, existing_themes=set(), existing_subthemes=set())
+        self.assertEqual(len(prompts), 1)
+        self.assertIn('|lettre.odt|', prompts[0])
+        self.assertNotIn('edf_facture', prompts[0])
+        self.assertEqual(result['lettre.odt']['theme'], 'Courrier')
+        self.assertEqual(result['edf_facture_2024_05.pdf']['sous_theme'], 'EDF')
+        self.assertEqual(result['capteur.ino']['theme'], 'Arduino')
+        # Les thèmes connus localement sont proposés à l'IA
+        self.assertIn('Factures', prompts[0])
+
+    def test_untrained(self):
+        classifier = PreClassifier.from_organization({})
+        self.assertEqual(classifier.predict([make_file('notes.txt')]), [(None, 0.0, None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import unittest
+from ai.prompt_builder import build_prompt, build_modification_prompt, decode_ids, directory_table, trim_excerpt, split_path
+
+LIB = 'C:\\Users\\sacha\\Documents\\Arduino\\libraries\\SparkFun_ADXL345_Arduino_Library'
+
+def make_file(path, excerpt=''):
+    return {'name': split_path(path)[1], 'path': path, 'date': '2025-01-11 10:58:20', 'excerpt': excerpt}
+
+class TestPromptBuilder(unittest.TestCase):
+    def test_directory_table_factors_common_root(self):
+        root, ids, lines = directory_table([LIB, LIB + '\\src', LIB, 'C:\\Users\\sacha\\Documents'])
+        self.assertEqual(root, 'C:\\Users\\sacha\\Documents')
+        self.assertEqual(lines, ['D1=Arduino\\libraries\\SparkFun_ADXL345_Arduino_Library',
+                                 'D2=Arduino\\libraries\\SparkFun_ADXL345_Arduino_Library\\src'])
+        self.assertEqual(ids['C:\\Users\\sacha\\Documents'], '')
+        root, _, lines = directory_table(['/home/a/x', '/home/a/y'])
+        self.assertEqual((root, lines), ('/home/a', ['D1=x', 'D2=y']))
+
+    def test_prompt_uses_short_ids_and_no_full_paths(self):
+        batch = [make_file(LIB + '\\README.md'), make_file(LIB + '\\src\\SparkFun_ADXL345.h'),
+                 make_file('C:\\Users\\sacha\\Documents\\facture.pdf', 'Facture EDF janvier')]
+        prompt, ids = build_prompt(batch, {'Factures'}, {'EDF'})
+        self.assertEqual(ids, {'1': 'README.md', '2': 'SparkFun_ADXL345.h', '3': 'facture.pdf'})
+        self.assertEqual(prompt.count('SparkFun_ADXL345_Arduino_Library'), 2)
+        self.assertIn('1|D1|README.md|2025-01-11|', prompt)
+        self.assertIn('3||facture.pdf|2025-01-11|Facture EDF janvier', prompt)
+        self.assertIn('Thèmes existants : Factures', prompt)
+
+    def test_trim_excerpt_keeps_informative_words(self):
+        text = ('#######################################\n# Syntax Coloring Map For ADXL345\n'
+                '#######################################\n# Library (KEYWORD1)\n# Library the the')
+        self.assertEqual(trim_excerpt(text), 'Syntax Coloring Map ADXL345 Library KEYWORD1')
+        self.assertLessEqual(len(trim_excerpt('mot ' * 100 + ' '.join(f'w{i}' for i in range(100)))), 60)
+        self.assertEqual(trim_excerpt(None), '')
+
+    def test_decode_ids(self):
+        ids = {'1': 'a.pdf', '2': 'b.docx', '3': 'c.txt'}
+        decoded = decode_ids({'1': ['Factures', 'EDF'], 2: {'theme': 'Cours', 'sous_theme': ''},
+                              'c.txt': 'Divers', '9': ['Inventé', ''], '3 ': ['', '']}, ids)
+        self.assertEqual(decoded, {
+            'a.pdf': {'theme': 'Factures', 'sous_theme': 'EDF'},
+            'b.docx': {'theme': 'Cours', 'sous_theme': ''},
+            'c.txt': {'theme': 'Divers', 'sous_theme': ''},
+        })
+        self.assertEqual(decode_ids('pas du json', ids), {})
+
+    def test_modification_prompt(self):
+        prompt, ids = build_modification_prompt('Regroupe les factures', {
+            'Factures': {'EDF': ['a.pdf'], '': ['b.pdf']},
+            'Cours': {None: ['c.txt']},
+        })
+        self.assertEqual(ids, {'1': 'a.pdf', '2': 'b.pdf', '3': 'c.txt'})
+        self.assertIn('Demande : Regroupe les factures', prompt)
+        self.assertIn('1|Factures|EDF|a.pdf\n2|Factures||b.pdf\n3|Cours||c.txt\n', prompt)
+        self.assertEqual(decode_ids({'3': ['Factures', '']}, ids), {'c.txt': {'theme': 'Factures', 'sous_theme': ''}})
+
+if __name__ == '__main__':
+    unittest.main()
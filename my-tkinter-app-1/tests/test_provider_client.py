@@ -0,0 +1,272 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from api.circuit_breaker import CircuitBreaker, OPEN
+from api.retry import RetryPolicy
+from api import gemini
+from api.gemini import (Provider, ProviderClient, ProviderError, ProviderCancelled, CircuitOpenError, LatencyStats,
+                        _gemini_text, _mistral_text, _mistral_delta, get_ai_response, get_client, reset_client)
+
+class FakeProviders(BaseHTTPRequestHandler):
+    """
+    Fournisseurs simulés : /gemini et /mistral répondent selon `server.statuses`, après `server.delays`.
+    Une requête en streaming reçoit `server.stream_text` (ou `server.stream_texts[chemin]`) en évènements
+    SSE, un morceau toutes les 50 ms.
+    Pour les chemins de `server.cut`, la connexion est fermée au milieu du corps de la réponse.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.seen.append((self.path, self.headers.get('Authorization'), body['max_tokens']))
+        time.sleep(self.server.delays.get(self.path, 0))
+        status = self.server.statuses.get(self.path, 200)
+        if status == 200 and body.get('stream'):
+            return self.stream()
+        text = '{"a.pdf": ["Factures", ""]}'
+        if status != 200:
+            payload = b'indisponible'
+        elif self.path == '/gemini':
+            payload = json.dumps({'candidates': [{'content': {'parts': [{'text': text}]}}]}).encode()
+        else:
+            payload = json.dumps({'choices': [{'message': {'content': text}}]}).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '3')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.path in self.server.cut:
+            self.wfile.write(payload[:len(payload) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+    def stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        events = []
+        for piece in self.server.stream_texts.get(self.path, self.server.stream_text):
+            if self.path == '/gemini':
+                chunk = {'candidates': [{'content': {'parts': [{'text': piece}]}}]}
+            else:
+                chunk = {'choices': [{'delta': {'content': piece}}]}
+            events.append(f"data: {json.dumps(chunk)}\n\n")
+        events.append("data: [DONE]\n\n")
+        if self.path in self.server.cut:
+            events = events[:len(events) // 2]
+            self.close_connection = True
+        for event in events:
+            data = event.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+            time.sleep(0.05)
+        if not self.close_connection:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+class TestProviderClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeProviders)
+        self.server.seen = []
+        self.server.statuses = {}
+        self.server.delays = {}
+        self.server.cut = set()
+        self.server.stream_texts = {}
+        self.server.stream_text = ['```json\n{"1": ["Fac', 'tures", ""], "2": ', '["Photos", ""]', '}\n```']
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = ProviderClient([
+            Provider('gemini', base + '/gemini', 'g', 'cle-g', _gemini_text),
+            Provider('mistral', base + '/mistral', 'm', 'cle-m', _mistral_text, _mistral_delta),
+        ], pool_size=4)
+        self.base = base
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.client.complete('p', max_tokens=64), ('gemini', {'a.pdf': ['Factures', '']}))
+        metrics = self.client.metrics()['gemini']
+        self.assertEqual((metrics['requests'], metrics['pooled_requests'], metrics['connections']), (5, 5, 1))
+        self.assertEqual(self.server.seen[0], ('/gemini', 'Bearer cle-g', 64))
+
+    def test_concurrent_calls_bounded_by_pool(self):
+        # Sans couverture : l'attente d'une connexion du pool dépasserait le p95 local
+        self.client.hedge = False
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: self.client.complete('p'), range(20)))
+        self.assertTrue(all(provider == 'gemini' for provider, _ in results))
+        metrics = self.client.metrics()['gemini']
+        self.assertEqual(metrics['requests'], 20)
+        self.assertLessEqual(metrics['connections'], 4)
+
+    def test_fallback_and_provider_error(self):
+        self.server.statuses = {'/gemini': 429}
+        self.assertEqual(self.client.complete('p')[0], 'mistral')
+        with self.assertRaises(ProviderError) as raised:
+            self.client._call('gemini', 'p')
+        self.assertEqual((raised.exception.status, raised.exception.retry_after), (429, 3.0))
+        self.assertEqual(self.client.metrics()['gemini']['failures'], 2)
+
+        self.server.statuses = {'/gemini': 500, '/mistral': 503}
+        with self.assertRaises(ProviderError) as raised:
+            self.client.complete('p')
+        self.assertEqual((raised.exception.provider, raised.exception.status), ('mistral', 503))
+
+    def test_hedge_when_primary_is_slow(self):
+        self.client.hedge = True
+        self.client.hedge_after = 0.05
+        self.server.delays = {'/gemini': 0.6}
+        start = time.monotonic()
+        self.assertEqual(self.client.complete('p')[0], 'mistral')
+        self.assertLess(time.monotonic() - start, 0.5)
+        metrics = self.client.metrics()
+        self.assertEqual((metrics['gemini']['hedged'], metrics['mistral']['wins'], metrics['gemini']['wins']), (1, 1, 0))
+        self.assertIsNotNone(metrics['mistral']['latency_p95'])
+
+        # Premier fournisseur rapide : pas de requête de couverture
+        self.server.delays = {}
+        self.client.hedge_after = 1.0
+        self.assertEqual(self.client.complete('p')[0], 'gemini')
+        self.assertEqual(sum(1 for path, _, _ in self.server.seen if path == '/mistral'), 1)
+
+    def test_text_response_loses_to_json(self):
+        self.client.providers[0] = Provider('gemini', self.base + '/gemini', 'g', 'cle-g', lambda payload: 'pas du JSON')
+        self.assertEqual(self.client.complete('p'), ('mistral', {'a.pdf': ['Factures', '']}))
+        self.server.statuses = {'/mistral': 500}
+        self.assertEqual(self.client.complete('p'), ('gemini', 'pas du JSON'))
+
+    def test_hedge_delay_follows_p95(self):
+        self.assertEqual(self.client.hedge_delay('gemini'), 10.0)
+        for ms in range(1, 101):
+            self.client.latency['gemini'].record(ms / 1000)
+        self.assertAlmostEqual(self.client.hedge_delay('gemini'), 0.096)
+        self.assertIsNone(LatencyStats().percentile(0.95))
+
+    def test_open_circuit_skips_provider(self):
+        self.client.breakers = {'gemini': CircuitBreaker(failure_threshold=2, open_seconds=60),
+                                'mistral': CircuitBreaker(failure_threshold=2, open_seconds=60)}
+        self.server.statuses = {'/gemini': 401}
+        for _ in range(4):
+            self.assertEqual(self.client.complete('p')[0], 'mistral')
+        self.assertEqual(sum(1 for path, _, _ in self.server.seen if path == '/gemini'), 2)
+        self.assertEqual(self.client.metrics()['gemini']['circuit'], OPEN)
+
+        self.server.statuses = {'/gemini': 401, '/mistral': 500}
+        for _ in range(2):
+            with self.assertRaises(ProviderError):
+                self.client.complete('p')
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.client.complete('p')
+        self.assertGreater(raised.exception.retry_after, 50)
+
+    def test_connection_dropped_mid_body_is_transient(self):
+        self.client.hedge = False
+        self.server.cut = {'/gemini'}
+        with self.assertRaises(ProviderError) as raised:
+            self.client._call('gemini', 'p')
+        self.assertIsNone(raised.exception.status)
+        self.assertTrue(RetryPolicy().is_retryable(raised.exception))
+        self.assertEqual(self.client.complete('p')[0], 'mistral')
+
+    def test_cancel_before_send_releases_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0)
+        self.client.breakers = {'gemini': breaker}
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(ProviderCancelled):
+            self.client._call('gemini', 'p', cancel=cancel)
+        self.assertEqual(self.server.seen, [])
+        # L'appel de test n'a pas eu lieu : il est de nouveau disponible
+        self.assertTrue(breaker.allow())
+
+    def test_streamed_response(self):
+        self.client.hedge = False
+        for statuses, winner in (({}, 'gemini'), ({'/gemini': 500}, 'mistral')):
+            self.server.statuses = statuses
+            received = []
+            start = time.monotonic()
+            provider, result = self.client.complete('p', on_text=lambda delta: received.append((time.monotonic() - start, delta)))
+            self.assertEqual(provider, winner)
+            self.assertEqual(''.join(delta for _, delta in received), ''.join(self.server.stream_text))
+            # Le premier morceau arrive avant la fin du flux
+            self.assertLess(received[0][0], received[-1][0] - 0.1)
+        # Connexion rendue au pool après la fin du flux
+        self.client.complete('p', on_text=lambda delta: None)
+        self.assertEqual(self.client.metrics()['mistral']['connections'], 1)
+
+    def test_get_ai_response_emits_entries(self):
+        with mock.patch.object(gemini, '_client', self.client):
+            entries = []
+            start = time.monotonic()
+            result = get_ai_response('p', use_cache=False, on_entry=lambda k, v: entries.append((time.monotonic() - start, k, v)))
+            self.assertEqual([(k, v) for _, k, v in entries], [('1', ['Factures', '']), ('2', ['Photos', ''])])
+            self.assertLess(entries[0][0], 0.15)
+            self.assertEqual(result, {'1': ['Factures', ''], '2': ['Photos', '']})
+
+    def test_abandoned_stream_is_corrected(self):
+        # Gemini transmet une entrée puis coupe : Mistral reprend et sa valeur remplace la première
+        self.client.hedge = False
+        self.server.cut = {'/gemini'}
+        self.server.stream_texts = {'/gemini': ['{"1": ["Brouillon", ""], ', '"2": ["Pho', 'tos", ""]}']}
+        with mock.patch.object(gemini, '_client', self.client):
+            entries = []
+            result = get_ai_response('p', use_cache=False, on_entry=lambda k, v: entries.append((k, v)))
+        self.assertEqual(entries, [('1', ['Brouillon', '']), ('1', ['Factures', '']), ('2', ['Photos', ''])])
+        self.assertEqual(result, {'1': ['Factures', ''], '2': ['Photos', '']})
+
+    def test_relay_replays_next_stream(self):
+        received = []
+        relay = gemini._Relay(received.append, on_restart=lambda: received.append('|'))
+        first, second = relay.forward('gemini'), relay.forward('mistral')
+        first('{"1": ')
+        second('{"1": ["A"')
+        second(', ""]')
+        self.assertEqual(received, ['{"1": '])
+        # Le fournisseur relayé échoue : le flux du suivant est rejoué depuis le début
+        relay.drop('gemini')
+        first('["X", ""]}')
+        second('}')
+        relay.close()
+        second(' ')
+        self.assertEqual(received, ['{"1": ', '|', '{"1": ["A"', ', ""]', '}'])
+
+class TestSharedClient(unittest.TestCase):
+    def test_hedging_is_opt_in(self):
+        with mock.patch.object(gemini, 'load_dotenv'):
+            with mock.patch.dict(os.environ, {}, clear=True):
+                self.assertFalse(ProviderClient.from_env().hedge)
+            with mock.patch.dict(os.environ, {'AI_HEDGE': '1'}):
+                self.assertTrue(ProviderClient.from_env().hedge)
+
+    def test_reset_client_picks_up_new_keys(self):
+        with mock.patch.object(gemini, '_client', None), mock.patch.object(gemini, 'load_dotenv'), \
+                mock.patch.dict(os.environ, {'GEMINI_API_KEY': 'ancienne'}):
+            client = get_client()
+            self.assertIs(get_client(), client)
+            self.assertEqual(client.provider('gemini').headers['Authorization'], 'Bearer ancienne')
+            # Clé saisie dans les paramètres et écrite dans .env
+            os.environ['GEMINI_API_KEY'] = 'nouvelle'
+            reset_client()
+            self.assertIsNot(get_client(), client)
+            self.assertEqual(get_client().provider('gemini').headers['Authorization'], 'Bearer nouvelle')
+
+if __name__ == '__main__':
+    unittest.main()
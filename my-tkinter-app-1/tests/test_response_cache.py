@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import tempfile
+import unittest
+from unittest import mock
+from api import response_cache
+from api.response_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'data', 'cache.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_after_put_with_normalized_prompt(self):
+        cache = ResponseCache(self.db_path)
+        self.assertIsNone(cache.get('gemini', 'm', 'Classe  ces fichiers\n'))
+        cache.put('gemini', 'm', 'Classe  ces fichiers\n', {'a.pdf': {'theme': 'Factures'}})
+        self.assertEqual(cache.get('gemini', 'm', 'Classe ces fichiers'), {'a.pdf': {'theme': 'Factures'}})
+        self.assertIsNone(cache.get('gemini', 'autre-modele', 'Classe ces fichiers'))
+        self.assertIsNone(cache.get('mistral', 'm', 'Classe ces fichiers'))
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        cache.close()
+
+    def test_persisted_and_failures_not_cached(self):
+        cache = ResponseCache(self.db_path)
+        cache.put('gemini', 'm', 'p', {'a.pdf': ['Factures', '']})
+        cache.put('gemini', 'm', 'texte', 'réponse texte illisible')
+        cache.put('gemini', 'm', 'vide', {})
+        cache.close()
+        cache = ResponseCache(self.db_path)
+        self.assertEqual(cache.get('gemini', 'm', 'p'), {'a.pdf': ['Factures', '']})
+        self.assertIsNone(cache.get('gemini', 'm', 'texte'))
+        self.assertIsNone(cache.get('gemini', 'm', 'vide'))
+        self.assertEqual(cache.get_any([('gemini', 'x'), ('gemini', 'm')], 'p'), ('gemini', {'a.pdf': ['Factures', '']}))
+        cache.close()
+
+    def test_ttl(self):
+        cache = ResponseCache(self.db_path, ttl=60)
+        with mock.patch.object(response_cache.time, 'time', return_value=1000.0):
+            cache.put('gemini', 'm', 'p', {'a.pdf': 'r'})
+        with mock.patch.object(response_cache.time, 'time', return_value=1050.0):
+            self.assertEqual(cache.get('gemini', 'm', 'p'), {'a.pdf': 'r'})
+        with mock.patch.object(response_cache.time, 'time', return_value=1061.0):
+            self.assertIsNone(cache.get('gemini', 'm', 'p'))
+        self.assertEqual(cache.stats()['bytes'], 0)
+        cache.close()
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.db_path, ttl=None, max_bytes=350)
+        for i in range(3):
+            with mock.patch.object(response_cache.time, 'time', return_value=1000.0 + i):
+                cache.put('gemini', 'm', f'p{i}', {'a': 'x' * 100})
+        # p0 est relu : p1 devient le moins récemment utilisé
+        with mock.patch.object(response_cache.time, 'time', return_value=1010.0):
+            self.assertIsNotNone(cache.get('gemini', 'm', 'p0'))
+        with mock.patch.object(response_cache.time, 'time', return_value=1011.0):
+            cache.put('gemini', 'm', 'p3', {'a': 'x' * 100})
+        self.assertIsNone(cache.get('gemini', 'm', 'p1'))
+        for prompt in ('p0', 'p2', 'p3'):
+            self.assertIsNotNone(cache.get('gemini', 'm', prompt))
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.stats()['bytes'], 350)
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import json
+import random
+import unittest
+from ai.response_decoder import EntryStream, decode_response
+
+RESPONSE = (
+    'Voici le classement :\n```json\n'
+    '{"1": ["Factures", "EDF"], "2": {"theme": "Cours \\"maths\\"", "sous_theme": "{2023}"},\n'
+    ' "3": ["Photos", ""]}\n```\nBonne journée !'
+)
+EXPECTED = [('1', ['Factures', 'EDF']), ('2', {'theme': 'Cours "maths"', 'sous_theme': '{2023}'}), ('3', ['Photos', ''])]
+
+class TestEntryStream(unittest.TestCase):
+    def feed_by(self, text, size):
+        stream = EntryStream()
+        entries = []
+        for i in range(0, len(text), size):
+            entries.extend(stream.feed(text[i:i + size]))
+        return stream, entries
+
+    def test_same_entries_whatever_the_chunking(self):
+        for size in (1, 2, 7, 64, len(RESPONSE)):
+            stream, entries = self.feed_by(RESPONSE, size)
+            self.assertEqual(entries, EXPECTED, size)
+            self.assertTrue(stream.done)
+
+    def test_entries_emitted_as_soon_as_complete(self):
+        stream = EntryStream()
+        self.assertEqual(stream.feed('{"1": ["Factures", "EDF"'), [])
+        self.assertEqual(stream.feed('], "2"'), [('1', ['Factures', 'EDF'])])
+        self.assertEqual(stream.feed(': ["Cours", ""]}'), [('2', ['Cours', ''])])
+        self.assertEqual(stream.feed(', "3": ["x", ""]}'), [])
+        self.assertEqual(stream.entries, 2)
+
+    def test_bad_entry_skipped(self):
+        stream, entries = self.feed_by('{"1": ["A", ""], "2": {: }, 3: [\'B\', ""],}', 5)
+        self.assertEqual(entries, [('1', ['A', '']), ('3', ['B', ''])])
+
+    def test_single_quoted_strings(self):
+        text = "{'a, b.pdf': ['Factures', ''], 'l'école.pdf': ['Cours', \"Histoire de l'art\"], 'plan {B}.png': ['Plans', '']}"
+        for size in (1, 3, len(text)):
+            self.assertEqual(self.feed_by(text, size)[1], [
+                ('a, b.pdf', ['Factures', '']), ("l'école.pdf", ['Cours', "Histoire de l'art"]),
+                ('plan {B}.png', ['Plans', ''])], size)
+
+NAMES = ["l'école.pdf", "Relevé d'identité.pdf", 'facture "EDF".pdf', 'notes, v2.txt', 'plan {B}.png',
+         'été 2023.jpg', 'a\\b.txt', 'IMG_0042.HEIC']
+THEMES = [('Cours', "Histoire de l'art"), ('Factures', 'EDF'), ('Photos', ''), ('Divers', 'Notes: brouillon')]
+
+def render(entries, style):
+    """Réponse de l'IA dans un des styles rencontrés ; positions de fin de chaque entrée."""
+    quote = (lambda s: "'" + s + "'") if style == 'single' else (lambda s: json.dumps(s, ensure_ascii=False))
+    text = 'Voici :\n```json\n{' if style == 'fence' else '{'
+    ends = []
+    for name, (theme, sous_theme) in entries:
+        text += f"\n  {quote(name)}: [{quote(theme)}, {quote(sous_theme)}]"
+        ends.append(len(text))
+        text += ','
+    if style != 'trailing':
+        text = text[:-1]
+    return text + '\n}\n```', ends
+
+class TestDecodeResponse(unittest.TestCase):
+    def test_apostrophes_single_quotes_and_fences(self):
+        response = "```json\n{'l'école.pdf': {'theme': 'Cours', 'sous_theme': \"Histoire de l'art\"}, 'b.pdf': ['A', ''],}\n```"
+        self.assertEqual(decode_response(response), {
+            "l'école.pdf": {'theme': 'Cours', 'sous_theme': "Histoire de l'art"}, 'b.pdf': ['A', '']})
+        self.assertEqual(decode_response('{1: [True, None], 2: 3.5}'), {'1': [True, None], '2': 3.5})
+        self.assertEqual(decode_response({'a': 1}), {'a': 1})
+        self.assertEqual(decode_response('Pas de JSON ici.'), {})
+        self.assertEqual(decode_response(None), {})
+
+    def test_truncated_and_broken_entries(self):
+        stats = {}
+        self.assertEqual(decode_response('{"1": ["A", ""], "2": ["B", "x"], "3": ["C", "Va', stats), {'1': ['A', ''], '2': ['B', 'x']})
+        self.assertEqual((stats['mode'], stats['truncated']), ('tolérant', True))
+        self.assertEqual(decode_response('{"1": ["A"], "2": {: }, "3": ["B"]}', stats), {'1': ['A'], '3': ['B']})
+        self.assertEqual(stats['skipped'], 1)
+        decode_response('{"1": ["A", ""]}', stats)
+        self.assertEqual(stats['mode'], 'json')
+
+    def test_fuzz_recovers_every_complete_entry(self):
+        rng = random.Random(1234)
+        for i in range(500):
+            style = ('json', 'fence', 'single', 'trailing')[i % 4]
+            names = rng.sample(NAMES, rng.randint(1, len(NAMES)))
+            if style == 'single':
+                # Sans échappement, un guillemet simple suivi d'un séparateur reste ambigu
+                names = [n for n in names if '\\' not in n] or ['x.txt']
+            entries = [(name, rng.choice(THEMES)) for name in names]
+            text, ends = render(entries, style)
+            cut = rng.randint(0, len(text)) if rng.random() < 0.5 else len(text)
+            expected = {name: list(theme) for (name, theme), end in zip(entries, ends) if end <= cut}
+            self.assertEqual(decode_response(text[:cut]), expected, text[:cut])
+            # Même résultat entrée par entrée en streaming
+            stream = EntryStream()
+            streamed = {}
+            for j in range(0, cut, 7):
+                streamed.update(stream.feed(text[j:min(cut, j + 7)]))
+            self.assertEqual(streamed, expected, text[:cut])
+
+if __name__ == '__main__':
+    unittest.main()
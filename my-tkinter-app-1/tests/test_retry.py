@@ -0,0 +1,146 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from api.circuit_breaker import CircuitBreaker
+from api.gemini import Provider, ProviderClient, ProviderError, _gemini_text
+from api.retry import RetryPolicy, RetryBudget, InvalidResponse
+
+class FlakyProvider(BaseHTTPRequestHandler):
+    """
+    Fournisseur simulé : renvoie tour à tour les codes de `server.script`, puis 200.
+    Les chemins de `server.rejected` répondent toujours 401 (clé absente ou refusée).
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        if self.path in self.server.rejected:
+            status, retry_after = 401, None
+        else:
+            self.server.calls += 1
+            status, retry_after = self.server.script.pop(0) if self.server.script else (200, None)
+        if status == 200:
+            text = '{"a.pdf": ["Factures", ""]}'
+            payload = json.dumps({'candidates': [{'content': {'parts': [{'text': text}]}}]}).encode()
+        else:
+            payload = b'erreur'
+        self.send_response(status)
+        if retry_after is not None:
+            self.send_header('Retry-After', retry_after)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyProvider)
+        self.server.script = []
+        self.server.calls = 0
+        self.server.rejected = {'/mistral'}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        url = self.base + '/gemini'
+        # Disjoncteur permissif : seule la politique de nouvelles tentatives est testée ici
+        self.client = ProviderClient([Provider('gemini', url, 'g', 'cle', _gemini_text)], hedge=False,
+                                     breakers={'gemini': CircuitBreaker(failure_threshold=100, min_calls=100)})
+        self.sleeps = []
+        self.policy = RetryPolicy(base_delay=0.5, sleep=self.sleeps.append)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_429_and_5xx_are_retried_with_backoff(self):
+        self.server.script = [(429, '2'), (503, None), (502, None)]
+        self.assertEqual(self.policy.call(self.client.complete, 'p'), ('gemini', {'a.pdf': ['Factures', '']}))
+        self.assertEqual(self.server.calls, 4)
+        self.assertEqual(len(self.sleeps), 3)
+        self.assertGreaterEqual(self.sleeps[0], 2.0)  # Retry-After respecté
+        self.assertLessEqual(self.sleeps[1], 1.0)     # gigue sur [0, 0.5 × 2]
+        self.assertLessEqual(self.sleeps[2], 2.0)
+        self.assertEqual(self.policy.retries, 3)
+
+    def test_fatal_errors_and_attempt_limit(self):
+        self.server.script = [(401, None)]
+        with self.assertRaises(ProviderError) as raised:
+            self.policy.call(self.client.complete, 'p')
+        self.assertEqual((raised.exception.status, self.server.calls, self.sleeps), (401, 1, []))
+
+        self.server.script = [(500, None)] * 10
+        with self.assertRaises(ProviderError):
+            self.policy.call(self.client.complete, 'p')
+        self.assertEqual(self.server.calls, 1 + 4)
+
+        # Retry-After trop long : abandon immédiat
+        self.server.script = [(429, '3600')]
+        with self.assertRaises(ProviderError):
+            self.policy.call(self.client.complete, 'p')
+        self.assertEqual(self.server.calls, 6)
+
+    def test_fallback_auth_error_does_not_hide_transient_error(self):
+        # Mistral sans clé valide (401) : le 429 de Gemini décide de la nouvelle tentative
+        for hedge in (False, True):
+            self.server.calls = 0
+            self.sleeps.clear()
+            self.server.script = [(429, '2')]
+            client = ProviderClient([
+                Provider('gemini', self.base + '/gemini', 'g', 'cle', _gemini_text),
+                Provider('mistral', self.base + '/mistral', 'm', None, _gemini_text),
+            ], hedge=hedge, breakers={name: CircuitBreaker(failure_threshold=100, min_calls=100)
+                                      for name in ('gemini', 'mistral')})
+            try:
+                self.assertEqual(self.policy.call(client.complete, 'p'), ('gemini', {'a.pdf': ['Factures', '']}))
+            finally:
+                client.close()
+            self.assertEqual(self.server.calls, 2)
+            self.assertGreaterEqual(self.sleeps[0], 2.0)
+        self.assertEqual(self.policy.fatal, 0)
+
+    def test_global_budget(self):
+        policy = RetryPolicy(base_delay=0, budget=RetryBudget(ratio=0.0, min_retries=2), sleep=self.sleeps.append)
+        self.server.script = [(503, None)] * 10
+        with self.assertRaises(ProviderError):
+            policy.call(self.client.complete, 'p')
+        self.assertEqual(self.server.calls, 3)
+        with self.assertRaises(ProviderError):
+            policy.call(self.client.complete, 'p')
+        self.assertEqual(self.server.calls, 4)
+        self.assertEqual(policy.budget.refused, 2)
+
+    def test_invalid_response_is_retried(self):
+        answers = ['pas du JSON', {'a.pdf': {'theme': 'Factures'}}]
+        def ask():
+            answer = answers.pop(0)
+            if isinstance(answer, str):
+                raise InvalidResponse(answer)
+            return answer
+        self.assertEqual(self.policy.call(ask), {'a.pdf': {'theme': 'Factures'}})
+        self.assertFalse(self.policy.is_retryable(ValueError()))
+
+    def test_call_until_valid_only_retries_invalid_responses(self):
+        # Couche au-dessus de get_ai_response : pas de second enregistrement dans le budget
+        budget = RetryBudget(ratio=0.0, min_retries=1)
+        policy = RetryPolicy(base_delay=0, budget=budget, sleep=self.sleeps.append)
+        answers = ['pas du JSON', {'a.pdf': {'theme': 'Factures'}}]
+        def ask():
+            answer = answers.pop(0)
+            if isinstance(answer, str):
+                raise InvalidResponse(answer)
+            return answer
+        self.assertEqual(policy.call_until_valid(ask), {'a.pdf': {'theme': 'Factures'}})
+        self.assertEqual((len(budget._calls), policy.retries), (0, 1))
+        self.server.script = [(503, None)]
+        with self.assertRaises(ProviderError):
+            policy.call_until_valid(self.client.complete, 'p')
+        self.assertEqual(self.server.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
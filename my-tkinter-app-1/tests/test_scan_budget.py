@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import tempfile
+import unittest
+from organizer.scan_budget import ScanBudget
+from organizer.scan_index import ScanIndex
+
+class TestScanBudget(unittest.TestCase):
+    def test_max_files(self):
+        budget = ScanBudget(max_files=2).start()
+        self.assertTrue(budget.consume())
+        self.assertTrue(budget.consume())
+        self.assertFalse(budget.consume())
+        self.assertTrue(budget.exhausted())
+        self.assertEqual(budget.files, 2)
+
+    def test_deadline(self):
+        budget = ScanBudget(max_seconds=0).start()
+        self.assertTrue(budget.exhausted())
+        self.assertFalse(budget.consume())
+        self.assertFalse(ScanBudget(max_seconds=60).start().exhausted())
+
+    def test_max_depth(self):
+        budget = ScanBudget(max_depth=1)
+        self.assertTrue(budget.allows_depth(1))
+        self.assertFalse(budget.allows_depth(2))
+        self.assertTrue(ScanBudget().allows_depth(50))
+
+    def test_from_settings_overrides_defaults(self):
+        budget = ScanBudget.from_settings({'scan_budget': {'max_files': 100}}, max_seconds=20)
+        self.assertEqual((budget.max_files, budget.max_seconds), (100, 20))
+        budget = ScanBudget.from_settings({'scan_budget': {'max_seconds': None}}, max_seconds=20)
+        self.assertIsNone(budget.max_seconds)
+
+    def test_pending_dirs_persisted_per_root(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'index.db')
+            index = ScanIndex(db_path)
+            index.save_pending('/home/a', ['/home/a/x', '/home/a/y'])
+            index.save_pending('/home/b', ['/home/b/z'])
+            index.close()
+            index = ScanIndex(db_path)
+            self.assertEqual(sorted(index.pending('/home/a')), ['/home/a/x', '/home/a/y'])
+            index.save_pending('/home/a', [])
+            self.assertEqual(index.pending('/home/a'), [])
+            self.assertEqual(index.pending('/home/b'), ['/home/b/z'])
+            index.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from organizer.scan_index import ScanIndex
+
+class TestScanIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'data', 'index.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_requires_unchanged_signature(self):
+        index = ScanIndex(self.db_path)
+        index.store('/a/b.txt', 10, 1000, 42, 1700000000.0, 'extrait', 1)
+        index.commit()
+        self.assertEqual(index.lookup('/a/b.txt', 10, 1000, 42), (1700000000.0, 'extrait'))
+        self.assertIsNone(index.lookup('/a/b.txt', 11, 1000, 42))
+        self.assertIsNone(index.lookup('/a/b.txt', 10, 2000, 42))
+        self.assertIsNone(index.lookup('/a/b.txt', 10, 1000, 43))
+        index.close()
+
+    def test_persisted_between_sessions(self):
+        index = ScanIndex(self.db_path)
+        index.store('/a/b.txt', 10, 1000, 42, 0.0, 'extrait', 1)
+        index.close()
+        index = ScanIndex(self.db_path)
+        self.assertIsNotNone(index.lookup('/a/b.txt', 10, 1000, 42))
+        index.close()
+
+    def test_purge_missing_only_under_directory(self):
+        index = ScanIndex(self.db_path)
+        index.store(os.path.join('/a', 'vu.txt'), 1, 1, 1, 0.0, '', 2)
+        index.store(os.path.join('/a', 'supprime.txt'), 1, 1, 2, 0.0, '', 1)
+        index.store(os.path.join('/ab', 'autre.txt'), 1, 1, 3, 0.0, '', 1)
+        self.assertEqual(index.purge_missing('/a', 2), 1)
+        self.assertIsNotNone(index.lookup(os.path.join('/ab', 'autre.txt'), 1, 1, 3))
+        index.close()
+
+    def test_scan_ids_unique_across_connections(self):
+        index = ScanIndex(self.db_path)
+        index.store('/a/b.txt', 1, 1, 1, 0.0, '', 7)
+        index.close()
+
+        def allocate(_):
+            index = ScanIndex(self.db_path)
+            try:
+                return [index.new_scan_id() for _ in range(10)]
+            finally:
+                index.close()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            ids = sum(executor.map(allocate, range(4)), [])
+        self.assertEqual(sorted(ids), list(range(8, 48)))
+
+    def test_writes_applied_on_commit(self):
+        index = ScanIndex(self.db_path)
+        index.store('/a/b.txt', 1, 1, 1, 0.0, 'extrait', 1)
+        other = ScanIndex(self.db_path)
+        self.assertIsNone(other.lookup('/a/b.txt', 1, 1, 1))
+        index.commit()
+        self.assertEqual(other.lookup('/a/b.txt', 1, 1, 1), (0.0, 'extrait'))
+        other.close()
+        index.close()
+
+if __name__ == '__main__':
+    unittest.main()
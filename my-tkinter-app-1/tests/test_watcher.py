@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import time
+import tempfile
+import unittest
+from organizer import watcher
+from organizer.watcher import FolderWatcher, PollingSource, InotifySource
+from organizer.scan_index import ScanIndex
+from organizer.ignore_rules import IgnoreRules
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'partage')
+        os.makedirs(self.root)
+        with open(os.path.join(self.root, 'ancien.txt'), 'w') as f:
+            f.write('déjà là')
+        self.db_path = os.path.join(self.tmp.name, 'index.db')
+        self.batches = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_scenario(self):
+        w = FolderWatcher([self.root], self.batches.append, index_path=self.db_path, debounce=0.3,
+                          poll_interval=0.2, file_filter=lambda p: not p.endswith('.exe')).start()
+        try:
+            time.sleep(0.3)
+            os.makedirs(os.path.join(self.root, 'sous'))
+            for name in ('sous/facture.txt', 'cours.txt', 'setup.exe'):
+                with open(os.path.join(self.root, name), 'w') as f:
+                    f.write(name)
+            self.assertTrue(wait_for(lambda: self.batches))
+            os.rename(os.path.join(self.root, 'cours.txt'), os.path.join(self.root, 'cours_2024.txt'))
+            self.assertTrue(wait_for(lambda: w.stats['moved'] == 1))
+        finally:
+            w.stop()
+        names = sorted(f['name'] for batch in self.batches for f in batch)
+        self.assertEqual(names, ['cours.txt', 'facture.txt'])
+        index = ScanIndex(self.db_path)
+        st = os.stat(os.path.join(self.root, 'cours_2024.txt'))
+        self.assertIsNotNone(index.lookup(os.path.join(self.root, 'cours_2024.txt'), st.st_size, st.st_mtime_ns, st.st_ino))
+        index.close()
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify n'existe que sous Linux")
+    def test_inotify_only_new_files_are_batched(self):
+        self.run_scenario()
+
+    def test_polling_fallback(self):
+        original = watcher.needs_polling
+        watcher.needs_polling = lambda path: True
+        try:
+            self.run_scenario()
+        finally:
+            watcher.needs_polling = original
+
+    def test_polling_detects_moves_by_inode(self):
+        source = PollingSource(self.root, interval=0)
+        os.rename(os.path.join(self.root, 'ancien.txt'), os.path.join(self.root, 'nouveau.txt'))
+        self.assertEqual(source.read_events(0), [('moved', os.path.join(self.root, 'nouveau.txt'), os.path.join(self.root, 'ancien.txt'))])
+
+    def make_ignored_tree(self):
+        for name in ('node_modules/lib/index.js', '.git/HEAD', 'journal.log', 'projet/notes.txt'):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(name)
+        return IgnoreRules(self.root, ['*.log'])
+
+    def test_polling_snapshot_skips_ignored_paths(self):
+        source = PollingSource(self.root, interval=0, ignore=self.make_ignored_tree())
+        self.assertEqual(sorted(os.path.relpath(p, self.root) for p in source.snapshot),
+                         ['ancien.txt', os.path.join('projet', 'notes.txt')])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify n'existe que sous Linux")
+    def test_inotify_does_not_watch_ignored_dirs(self):
+        source = InotifySource(self.root, ignore=self.make_ignored_tree())
+        try:
+            self.assertEqual(sorted(source.watches.values()), [self.root, os.path.join(self.root, 'projet')])
+            # Dossier ignoré créé pendant la surveillance : ni surveillé ni signalé
+            os.makedirs(os.path.join(self.root, 'projet', 'node_modules', 'pkg'))
+            self.assertEqual(source.read_events(1.0), [])
+            self.assertEqual(len(source.watches), 2)
+        finally:
+            source.close()
+
+if __name__ == '__main__':
+    unittest.main()